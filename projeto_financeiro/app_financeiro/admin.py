@@ -1,12 +1,82 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Client, Job, Cobranca, SystemConfig, Notification
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .archive import restore
+from .models import (
+    Client, Job, Cobranca, DataVersion, SystemConfig, Notification, ScheduledTask, TaskRun, AuditLog, Pagamento, Recurrence,
+    ArchivedCobranca, ArchivedPagamento, BackgroundTask, cobranca_status_q,
+)
+
+
+def estimated_rows(model, using):
+    """Estimativa do total de linhas da tabela sem percorrê-la.
+
+    Usa o ``sqlite_stat1`` (gerado pelo ANALYZE / PRAGMA optimize) e, sem
+    estatísticas, o maior ``id`` — pode sobrar se houve exclusões.
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [model._meta.db_table])
+                row = cursor.fetchone()
+        except DatabaseError:
+            row = None
+        if row:
+            return int(row[0].split()[0])
+    return model._base_manager.using(using).aggregate(max_id=Max('pk'))['max_id'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator das listagens grandes do admin.
+
+    Conta exatamente até ``ADMIN_EXACT_COUNT_LIMIT`` linhas (COUNT sobre um
+    LIMIT, que para cedo); acima disso a listagem sem filtros usa a estimativa
+    da tabela e a filtrada fica em limite + 1 — as páginas além dele não
+    aparecem, refine o filtro.
+    """
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        queryset = self.object_list
+        if not limit or not hasattr(queryset, 'query'):
+            return super().count
+        counted = queryset.order_by()[:limit + 1].count()
+        if counted <= limit or queryset.query.has_filters():
+            return counted
+        return max(counted, estimated_rows(queryset.model, queryset.db))
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Admin de tabelas grandes: sem COUNT(*) completo nem date_hierarchy"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class PrefixSearchAdmin(admin.ModelAdmin):
+    """No autocomplete busca só por prefixo (``autocomplete_search_fields``):
+    ``LIKE 'termo%'`` usa os índices NOCASE, ao contrário do ``icontains``"""
+    autocomplete_search_fields = ()
+
+    def get_search_fields(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if self.autocomplete_search_fields and match and match.url_name == 'autocomplete':
+            return self.autocomplete_search_fields
+        return super().get_search_fields(request)
 
 
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
+class ClientAdmin(PrefixSearchAdmin):
     list_display = ['name', 'type', 'document', 'email', 'phone', 'is_active', 'created_at']
     list_filter = ['is_active', 'type', 'created_at']
     search_fields = ['name', 'document', 'email', 'phone']
+    autocomplete_search_fields = ['^name']
     date_hierarchy = 'created_at'
     ordering = ['-created_at']
     
@@ -25,13 +95,14 @@ class ClientAdmin(admin.ModelAdmin):
 
 
 @admin.register(Job)
-class JobAdmin(admin.ModelAdmin):
+class JobAdmin(PrefixSearchAdmin, LargeTableAdmin):
     list_display = ['title', 'client', 'value', 'status', 'progress', 'start_date', 'delivery_date']
     list_filter = ['status', 'start_date', 'delivery_date']
+    list_select_related = ['client']
     search_fields = ['title', 'description', 'client__name']
-    date_hierarchy = 'start_date'
+    autocomplete_search_fields = ['^title']
     ordering = ['-start_date']
-    raw_id_fields = ['client']
+    autocomplete_fields = ['client']
     
     fieldsets = (
         ('Informações do Job', {
@@ -49,21 +120,48 @@ class JobAdmin(admin.ModelAdmin):
     )
 
 
+class PagamentoInline(admin.TabularInline):
+    model = Pagamento
+    extra = 0
+    fields = ['payment_date', 'value', 'notes', 'created_at']
+    readonly_fields = ['created_at']
+
+    def has_change_permission(self, request, obj=None):
+        # Pagamentos não são alterados: exclua (estorno) e registre de novo
+        return False
+
+
+class EffectiveStatusFilter(admin.SimpleListFilter):
+    """Status efetivo na data de hoje (vencida sai do vencimento, não da coluna)"""
+    title = 'status'
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return Cobranca.STATUS_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value() in dict(Cobranca.STATUS_CHOICES):
+            return queryset.filter(cobranca_status_q(self.value(), timezone.localdate()))
+        return queryset
+
+
 @admin.register(Cobranca)
-class CobrancaAdmin(admin.ModelAdmin):
-    list_display = ['number', 'client', 'job', 'value', 'status', 'due_date', 'payment_date', 'is_overdue']
-    list_filter = ['status', 'issue_date', 'due_date', 'payment_date']
+class CobrancaAdmin(LargeTableAdmin):
+    list_display = [
+        'number', 'client', 'job', 'value', 'balance', 'effective_status', 'due_date', 'payment_date', 'is_overdue',
+    ]
+    list_filter = [EffectiveStatusFilter, 'issue_date', 'due_date', 'payment_date']
+    list_select_related = ['client', 'job']
     search_fields = ['number', 'client__name', 'job__title', 'notes']
-    date_hierarchy = 'due_date'
     ordering = ['-due_date']
-    raw_id_fields = ['client', 'job']
+    autocomplete_fields = ['client', 'job']
     
     fieldsets = (
         ('Identificação', {
             'fields': ('number', 'client', 'job')
         }),
         ('Valores', {
-            'fields': ('value', 'status')
+            'fields': ('value', 'paid_value', 'balance')
         }),
         ('Datas', {
             'fields': ('issue_date', 'due_date', 'payment_date', 'last_reminder')
@@ -74,12 +172,69 @@ class CobrancaAdmin(admin.ModelAdmin):
         }),
     )
     
+    readonly_fields = ['paid_value', 'balance']
+    inlines = [PagamentoInline]
+
+    def effective_status(self, obj):
+        return obj.get_current_status_display()
+    effective_status.short_description = 'Status'
+
     def is_overdue(self, obj):
         return obj.is_overdue
     is_overdue.boolean = True
     is_overdue.short_description = 'Vencida'
 
 
+class ArchivedPagamentoInline(admin.TabularInline):
+    model = ArchivedPagamento
+    extra = 0
+    fields = ['payment_date', 'value', 'notes', 'created_at']
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedCobranca)
+class ArchivedCobrancaAdmin(LargeTableAdmin):
+    list_display = ['number', 'client', 'job', 'value', 'due_date', 'payment_date', 'archived_at']
+    list_filter = ['payment_date']
+    list_select_related = ['client', 'job']
+    search_fields = ['=number', 'client__name']
+    ordering = ['-id']
+    readonly_fields = [field.name for field in ArchivedCobranca._meta.fields]
+    inlines = [ArchivedPagamentoInline]
+    actions = ['restore_selected']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def has_restore_permission(self, request):
+        return request.user.has_perm('app_financeiro.change_cobranca')
+
+    def restore_selected(self, request, queryset):
+        restored = restore(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f'{restored} cobrança(s) devolvida(s) à tabela principal.')
+    restore_selected.short_description = 'Devolver à tabela principal'
+    restore_selected.allowed_permissions = ('restore',)
+
+
+@admin.register(Recurrence)
+class RecurrenceAdmin(LargeTableAdmin):
+    list_display = ['client', 'job', 'value', 'day_of_month', 'start_date', 'end_date', 'is_active']
+    list_filter = ['is_active', 'day_of_month']
+    list_select_related = ['client', 'job']
+    search_fields = ['client__name', 'job__title', 'description']
+    autocomplete_fields = ['client', 'job']
+
+
 @admin.register(SystemConfig)
 class SystemConfigAdmin(admin.ModelAdmin):
     list_display = ['company_name', 'company_cnpj', 'company_email', 'whatsapp_enabled', 'updated_at']
@@ -124,13 +279,13 @@ class SystemConfigAdmin(admin.ModelAdmin):
 
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(LargeTableAdmin):
     list_display = ['title', 'user', 'type', 'is_read', 'created_at']
     list_filter = ['type', 'is_read', 'created_at']
+    list_select_related = ['user']
     search_fields = ['title', 'message', 'user__username']
-    date_hierarchy = 'created_at'
     ordering = ['-created_at']
-    raw_id_fields = ['user']
+    autocomplete_fields = ['user']
     
     fieldsets = (
         ('Informações da Notificação', {
@@ -145,10 +300,63 @@ class NotificationAdmin(admin.ModelAdmin):
     
     def mark_as_read(self, request, queryset):
         updated = queryset.update(is_read=True)
+        DataVersion.changed(Notification)
         self.message_user(request, f'{updated} notificação(ões) marcada(s) como lida(s).')
     mark_as_read.short_description = 'Marcar como lida'
     
     def mark_as_unread(self, request, queryset):
         updated = queryset.update(is_read=False)
+        DataVersion.changed(Notification)
         self.message_user(request, f'{updated} notificação(ões) marcada(s) como não lida(s).')
-    mark_as_unread.short_description = 'Marcar como não lida'
\ No newline at end of file
+    mark_as_unread.short_description = 'Marcar como não lida'
+
+
+@admin.register(ScheduledTask)
+class ScheduledTaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'last_run_at', 'last_success_at', 'locked_by', 'locked_until']
+    readonly_fields = ['name', 'last_run_at', 'last_success_at']
+
+
+@admin.register(TaskRun)
+class TaskRunAdmin(LargeTableAdmin):
+    list_display = ['task_name', 'started_at', 'duration_ms', 'rows', 'success', 'owner']
+    list_filter = ['task_name', 'success']
+    ordering = ['-started_at']
+    readonly_fields = ['task_name', 'owner', 'started_at', 'duration_ms', 'rows', 'success', 'error']
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(LargeTableAdmin):
+    list_display = ['id', 'name', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_select_related = ['created_by']
+    list_filter = ['name', 'status']
+    ordering = ['-id']
+    readonly_fields = [
+        'name', 'params', 'status', 'attempts', 'max_attempts', 'run_after', 'locked_by', 'locked_until',
+        'progress', 'message', 'result', 'error', 'created_by', 'created_at', 'started_at', 'finished_at',
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AuditLog)
+class AuditLogAdmin(LargeTableAdmin):
+    list_display = ['created_at', 'model', 'object_id', 'action', 'user']
+    list_select_related = ['user']
+    list_filter = ['model', 'action']
+    search_fields = ['user__username']
+    ordering = ['-id']
+    readonly_fields = ['model', 'object_id', 'action', 'changes', 'user', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,158 @@
+"""
+Arquivamento das cobranças pagas antigas (partição quente/fria).
+
+Cobranças pagas há mais de ``COBRANCA_ARCHIVE_AFTER_DAYS`` dias saem da
+tabela principal para ``ArchivedCobranca`` — e os pagamentos delas para
+``ArchivedPagamento`` — em lotes de ``COBRANCA_ARCHIVE_BATCH``. Cada lote é
+uma transação com INSERT ... SELECT nas tabelas de arquivo e exclusão direta
+na principal, mantendo os ids: sem signals, a auditoria não registra a
+mudança e o cubo não precisa ser recalculado (lê as duas tabelas).
+
+A tabela principal fica só com o que ainda é operado (listagens, filtros,
+contagens); relatórios e o histórico do cliente leem ``CobrancaHistory`` e os
+totais de faturamento somam ``archived_totals``. O número continua único
+entre as duas tabelas (``Cobranca.validate_unique`` e a numeração consultam
+o arquivo).
+``restore`` devolve cobranças arquivadas à tabela principal (ex.: para
+estornar um pagamento antigo).
+
+Depois de mover, as estatísticas do SQLite (``ANALYZE``) são refeitas: sem
+elas o planejador supõe tamanhos iguais para as duas tabelas e escolhe mal a
+ordem dos JOINs; a estimativa de linhas do admin também vem delas.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .models import ArchivedCobranca, ArchivedPagamento, Cobranca, DataVersion, Pagamento
+
+# Colunas copiadas (iguais nas tabelas principal e de arquivo)
+COBRANCA_COLUMNS = [
+    'id', 'number', 'client_id', 'job_id', 'value', 'issue_date', 'due_date', 'payment_date',
+    'paid_value', 'balance', 'status', 'last_reminder', 'notes', 'recurrence_id', 'period',
+    'created_at', 'updated_at',
+]
+PAGAMENTO_COLUMNS = ['id', 'cobranca_id', 'value', 'payment_date', 'notes', 'created_at']
+
+
+def archive_cutoff(today=None, days=None):
+    """Data de pagamento a partir da qual a cobrança fica na tabela principal"""
+    if today is None:
+        today = timezone.localdate()
+    if days is None:
+        days = settings.COBRANCA_ARCHIVE_AFTER_DAYS
+    return today - timedelta(days=days)
+
+
+def archivable(cutoff):
+    """Cobranças pagas antes de ``cutoff`` (índice payment_date, client, ...)"""
+    return Cobranca.objects.filter(payment_date__lt=cutoff).order_by()
+
+
+def archived_totals():
+    """Quantidade, valor e valor pago das cobranças arquivadas (todas pagas, saldo zero)"""
+    totals = ArchivedCobranca.objects.order_by().aggregate(
+        count=Count('id'), value=Sum('value'), paid_value=Sum('paid_value'),
+    )
+    return {
+        'count': totals['count'],
+        'value': totals['value'] or Decimal('0.00'),
+        'paid_value': totals['paid_value'] or Decimal('0.00'),
+    }
+
+
+def _insert_select(model, columns, queryset):
+    """INSERT ... SELECT: copia o resultado de ``queryset`` para ``model``"""
+    opts = model._meta
+    quoted = ', '.join(connection.ops.quote_name(opts.get_field(c).column) for c in columns)
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {connection.ops.quote_name(opts.db_table)} ({quoted}) {sql}', params)
+
+
+def delete_rows(queryset):
+    """DELETE direto (sem signals nem cascata) das linhas de ``queryset``.
+
+    ``DELETE ... WHERE id IN (SELECT id ...)``: o delete() normal carregaria
+    cada linha na memória. Retorna o número de linhas excluídas.
+    """
+    opts = queryset.model._meta
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {connection.ops.quote_name(opts.db_table)} '
+            f'WHERE {connection.ops.quote_name(opts.pk.column)} IN ({sql})',
+            params,
+        )
+        return cursor.rowcount
+
+
+def _move_archive_batch(cutoff, batch_size):
+    with transaction.atomic():
+        # Na ordem do índice (pagas mais antigas primeiro): sem ordenar o que falta
+        ids = list(archivable(cutoff).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        cobrancas = Cobranca.objects.filter(pk__in=ids).order_by()
+        pagamentos = Pagamento.objects.filter(cobranca_id__in=ids).order_by()
+        _insert_select(
+            ArchivedCobranca, COBRANCA_COLUMNS + ['archived_at'],
+            cobrancas.values(*COBRANCA_COLUMNS, archived=Now()),
+        )
+        _insert_select(ArchivedPagamento, PAGAMENTO_COLUMNS, pagamentos.values(*PAGAMENTO_COLUMNS))
+        delete_rows(pagamentos)
+        delete_rows(cobrancas)
+    return len(ids)
+
+
+def archive_settled(cutoff=None, batch_size=None, limit=None, progress=None):
+    """Move as cobranças pagas antes de ``cutoff`` para o arquivo, em lotes.
+
+    Para depois de ``limit`` cobranças (se informado); ``progress(movidas)``
+    é chamado a cada lote. Retorna quantas foram movidas.
+    """
+    if cutoff is None:
+        if not settings.COBRANCA_ARCHIVE_AFTER_DAYS:
+            return 0
+        cutoff = archive_cutoff()
+    batch_size = batch_size or settings.COBRANCA_ARCHIVE_BATCH
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        count = _move_archive_batch(cutoff, size)
+        moved += count
+        if progress is not None:
+            progress(moved)
+        if count < size:
+            break
+    if moved:
+        DataVersion.changed(Cobranca)
+        refresh_statistics()
+    return moved
+
+
+def refresh_statistics():
+    """Refaz o ``sqlite_stat1`` (cerca de 1 s por milhão de cobranças)"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def restore(ids):
+    """Devolve as cobranças arquivadas ``ids`` (e pagamentos) à tabela principal"""
+    with transaction.atomic():
+        cobrancas = ArchivedCobranca.objects.filter(pk__in=ids).order_by()
+        pagamentos = ArchivedPagamento.objects.filter(cobranca_id__in=ids).order_by()
+        _insert_select(Cobranca, COBRANCA_COLUMNS, cobrancas.values(*COBRANCA_COLUMNS))
+        _insert_select(Pagamento, PAGAMENTO_COLUMNS, pagamentos.values(*PAGAMENTO_COLUMNS))
+        delete_rows(pagamentos)
+        restored = delete_rows(cobrancas)
+    if restored:
+        DataVersion.changed(Cobranca)
+    return restored
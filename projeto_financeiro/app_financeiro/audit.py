@@ -0,0 +1,176 @@
+"""
+Trilha de auditoria de clientes, jobs e cobranças (``AuditLog``).
+
+Os signals (``signals.py``) guardam os valores anteriores no ``pre_save`` e,
+no ``post_save``/``post_delete``, montam as diferenças por campo. O registro
+só entra na fila no commit da transação (alterações desfeitas não aparecem).
+Durante uma requisição a fila é da própria requisição (uma ContextVar
+definida pelo ``AuditMiddleware``, separada por thread/tarefa) e é gravada
+com um único ``bulk_create`` no ``request_finished``, depois de a resposta
+ter sido enviada; fora de requisições (comandos, agendador) a gravação é
+imediata.
+
+``QuerySet.update`` e ``bulk_create`` não disparam signals e ficam fora da
+trilha (ex.: cobranças desvinculadas pelo ``SET_NULL`` ao excluir um job).
+"""
+
+import atexit
+import contextvars
+import logging
+import threading
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import AuditLog, Client, Cobranca, DataVersion, Job
+
+logger = logging.getLogger(__name__)
+
+AUDITED_MODELS = (Client, Job, Cobranca)
+IGNORED_FIELDS = {'id', 'created_at', 'updated_at'}
+HISTORY_PAGE_SIZE = 50
+
+_current_request = contextvars.ContextVar('audit_request', default=None)
+# Fila da requisição: continua definida depois do middleware, até o request_finished
+_request_pending = contextvars.ContextVar('audit_pending', default=None)
+# Lotes que falharam ao gravar, tentados de novo no próximo flush (qualquer requisição)
+_failed = []
+_failed_lock = threading.Lock()
+
+
+def _fields(model):
+    return [field for field in model._meta.concrete_fields if field.name not in IGNORED_FIELDS]
+
+
+def _values(instance):
+    """``{attname: valor}`` normalizados (a view pode ter atribuído strings)"""
+    return {
+        field.attname: field.to_python(getattr(instance, field.attname))
+        for field in _fields(type(instance))
+    }
+
+
+def remember_previous(instance, using=None):
+    """Lê do banco os valores antes do ``save`` (``pre_save``)"""
+    instance._audit_previous = None
+    if instance.pk is None or instance._state.adding:
+        return None
+    model = type(instance)
+    instance._audit_previous = (
+        model._base_manager.using(using)
+        .filter(pk=instance.pk)
+        .values(*[field.attname for field in _fields(model)])
+        .first()
+    )
+    return instance._audit_previous
+
+
+def _current_user_id():
+    request = _current_request.get()
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def _changes(instance, action):
+    model = type(instance)
+    current = _values(instance)
+    if action == 'excluido':
+        before, after = current, {}
+    elif action == 'criado':
+        before, after = {}, current
+    else:
+        before, after = getattr(instance, '_audit_previous', None) or {}, current
+    changes = {}
+    for field in _fields(model):
+        old, new = before.get(field.attname), after.get(field.attname)
+        if old != new and (old not in (None, '') or new not in (None, '')):
+            changes[field.name] = [old, new]
+    return changes
+
+
+def record(instance, action, using=None):
+    """Enfileira a alteração de ``instance`` para gravar no commit"""
+    changes = _changes(instance, action)
+    if action == 'alterado' and not changes:
+        return
+    entry = AuditLog(
+        model=DataVersion.key(type(instance)),
+        object_id=instance.pk,
+        action=action,
+        changes=changes,
+        user_id=_current_user_id(),
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: _enqueue(entry), using=using)
+
+
+def _enqueue(entry):
+    pending = _request_pending.get()
+    if _current_request.get() is None or pending is None:
+        AuditLog.objects.bulk_create([entry])
+        return
+    pending.append(entry)
+
+
+def flush():
+    """Grava a fila da requisição atual de uma vez; retorna o número de registros gravados"""
+    pending = _request_pending.get()
+    with _failed_lock:
+        batch = _failed[:]
+        _failed.clear()
+    if pending:
+        batch.extend(pending)
+        pending.clear()
+    if not batch:
+        return 0
+
+    connection = connections[AuditLog.objects.db]
+    # No request_finished o close_old_connections pode já ter fechado a conexão
+    reopened = connection.connection is None
+    try:
+        AuditLog.objects.bulk_create(batch)
+    except Exception:
+        logger.exception('Falha ao gravar %d registro(s) de auditoria', len(batch))
+        with _failed_lock:
+            _failed[:0] = batch
+        return 0
+    finally:
+        if reopened:
+            connection.close()
+    return len(batch)
+
+
+atexit.register(flush)
+
+
+class AuditMiddleware:
+    """Associa as alterações feitas na requisição ao usuário autenticado"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _request_pending.set([])
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+
+def history(model, object_id, before=None, limit=HISTORY_PAGE_SIZE):
+    """Uma página do histórico de um registro, do mais recente ao mais antigo.
+
+    Paginação por chave: ``before`` é o ``id`` do último item da página
+    anterior, e o índice (model, object_id, -id) entrega cada página sem
+    OFFSET. Retorna ``(itens, before da próxima página ou None)``.
+    """
+    queryset = AuditLog.objects.filter(model=DataVersion.key(model), object_id=object_id)
+    if before is not None:
+        queryset = queryset.filter(id__lt=before)
+    items = list(queryset.select_related('user').order_by('-id')[:limit + 1])
+    if len(items) > limit:
+        return items[:limit], items[limit - 1].id
+    return items, None
@@ -0,0 +1,45 @@
+"""
+Backend de autenticação que guarda o usuário no cache.
+
+Sem ele, toda requisição autenticada busca a linha do ``auth_user`` antes da
+view. O cache é invalidado pelos signals a cada ``save``/``delete`` do
+usuário (ativar/desativar, troca de senha, último login), então a desativação
+continua valendo na requisição seguinte — desde que o cache seja compartilhado
+entre os workers (o padrão, em arquivos, ou Redis). Com o cache em memória do
+processo o cache fica desligado (``AUTH_USER_CACHE_SECONDS = 0``): o usuário é
+lido do banco uma vez por requisição (o ``AuthenticationMiddleware`` guarda em
+``request.user``).
+"""
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+USER_CACHE_KEY = 'auth:user:{}'
+
+
+def _user_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def invalidate_cached_user(user_id):
+    _user_cache().delete(USER_CACHE_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend com ``get_user`` servido pelo cache"""
+
+    def get_user(self, user_id):
+        timeout = settings.AUTH_USER_CACHE_SECONDS
+        if not timeout:
+            return super().get_user(user_id)
+
+        cache = _user_cache()
+        key = USER_CACHE_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, timeout)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,200 @@
+"""
+Fila de tarefas em segundo plano gravada no banco (``BackgroundTask``).
+
+As funções são registradas com o decorator ``background`` (ver ``tasks.py``)
+e enfileiradas com ``enqueue``: a view grava a linha e responde na hora com o
+id da tarefa. O comando ``run_workers`` mantém N processos que pegam a
+próxima tarefa livre com um UPDATE condicional (como o lease do agendador):
+se dois workers disputam a mesma linha, só um UPDATE a altera — funciona no
+SQLite sem broker externo.
+
+Quem pega a tarefa ganha um lease de ``BACKGROUND_TASK_LEASE`` segundos,
+renovado durante a execução (``scheduler.heartbeat``) e a cada
+``report_progress``; se o worker morrer, a tarefa volta a ficar livre quando
+o lease vence. Em caso de erro ela é repetida até
+``max_attempts`` vezes, com espera crescente (``BACKGROUND_TASK_RETRY_DELAY``
+dobrando a cada tentativa). O valor retornado pela função (JSON) fica em
+``result``; arquivos gerados vão para ``BACKGROUND_TASK_FILES_DIR``.
+"""
+
+import logging
+import re
+import time
+import traceback
+from datetime import timedelta
+from functools import partial
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundTask
+from .scheduler import OWNER, heartbeat
+
+logger = logging.getLogger(__name__)
+
+CLAIM_RETRIES = 5
+
+_registry = {}
+_file_re = re.compile(r'^[\w.-]+$')
+
+
+def background(name, max_attempts=3):
+    """Registra uma função como tarefa de segundo plano.
+
+    A função recebe a ``BackgroundTask`` (para ``report_progress``) e os
+    parâmetros do ``enqueue`` como argumentos nomeados; o retorno precisa ser
+    serializável em JSON.
+    """
+    def decorator(func):
+        func.max_attempts = max_attempts
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_functions():
+    """Retorna as tarefas registradas, carregando o módulo de tarefas"""
+    from . import tasks  # noqa: F401  (registra as tarefas)
+    return dict(_registry)
+
+
+def enqueue(name, user=None, **params):
+    """Enfileira a tarefa ``name``; retorna a ``BackgroundTask`` criada"""
+    func = get_functions().get(name)
+    if func is None:
+        raise KeyError(f'Tarefa desconhecida: {name}')
+    return BackgroundTask.objects.create(
+        name=name,
+        params=params,
+        max_attempts=func.max_attempts,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def _lease():
+    return timedelta(seconds=settings.BACKGROUND_TASK_LEASE)
+
+
+def claim(owner=OWNER):
+    """Pega a próxima tarefa livre (pendente ou com lease vencido), ou None"""
+    for _ in range(CLAIM_RETRIES):
+        now = timezone.now()
+        available = (
+            Q(status='pendente', run_after__lte=now)
+            | Q(status='executando', locked_until__lt=now)
+        )
+        candidate = BackgroundTask.objects.filter(available).order_by('id').values_list('id', flat=True).first()
+        if candidate is None:
+            return None
+        claimed = BackgroundTask.objects.filter(available, pk=candidate).update(
+            status='executando',
+            locked_by=owner,
+            locked_until=now + _lease(),
+            attempts=F('attempts') + 1,
+            started_at=now,
+        )
+        if claimed:
+            task = BackgroundTask.objects.get(pk=candidate)
+            task.lease = _lease()
+            return task
+        # Outro worker pegou a mesma tarefa: tenta a próxima
+    return None
+
+
+def _renew(task):
+    """Estende o lease da tarefa (somente se ainda for deste worker)"""
+    BackgroundTask.objects.filter(pk=task.pk, locked_by=task.locked_by).update(
+        locked_until=timezone.now() + task.lease
+    )
+
+
+def _finish(task, **fields):
+    """Grava o desfecho, somente se o lease ainda for deste worker"""
+    return BackgroundTask.objects.filter(pk=task.pk, locked_by=task.locked_by).update(
+        locked_by='', locked_until=None, **fields
+    )
+
+
+def execute(task):
+    """Executa uma tarefa já obtida por ``claim``; retorna o status final"""
+    func = get_functions().get(task.name)
+    now = timezone.now()
+    if func is None:
+        _finish(task, status='falhou', error=f'Tarefa desconhecida: {task.name}', finished_at=now)
+        return 'falhou'
+    if task.attempts > task.max_attempts:
+        # Lease vencido na última tentativa (worker interrompido ou tarefa travada)
+        _finish(task, status='falhou', error=task.error or 'Tempo esgotado', finished_at=now)
+        return 'falhou'
+
+    start = time.perf_counter()
+    try:
+        with heartbeat(partial(_renew, task), task.lease.total_seconds() / 3):
+            result = func(task, **task.params)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Erro na tarefa %s #%s (tentativa %s)', task.name, task.pk, task.attempts)
+        if task.attempts < task.max_attempts:
+            delay = settings.BACKGROUND_TASK_RETRY_DELAY * 2 ** (task.attempts - 1)
+            _finish(task, status='pendente', error=error, run_after=timezone.now() + timedelta(seconds=delay))
+            return 'pendente'
+        _finish(task, status='falhou', error=error, finished_at=timezone.now())
+        return 'falhou'
+
+    _finish(task, status='concluida', result=result, error='', progress=100, finished_at=timezone.now())
+    logger.info('Tarefa %s #%s concluída em %.1fs', task.name, task.pk, time.perf_counter() - start)
+    return 'concluida'
+
+
+def work(owner=OWNER, burst=False, poll=1.0, should_stop=lambda: False):
+    """Loop de um worker: executa tarefas até ``should_stop()`` (ou a fila esvaziar, com ``burst``).
+
+    Retorna o número de tarefas executadas.
+    """
+    executed = 0
+    while not should_stop():
+        close_old_connections()
+        task = claim(owner)
+        if task is None:
+            if burst:
+                break
+            time.sleep(poll)
+            continue
+        execute(task)
+        executed += 1
+    close_old_connections()
+    return executed
+
+
+def files_dir():
+    return Path(settings.BACKGROUND_TASK_FILES_DIR)
+
+
+def task_file_path(task, filename):
+    """Caminho para um arquivo gerado pela tarefa (prefixado com o id)"""
+    directory = files_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f'{task.pk}-{filename}'
+
+
+def result_file(task):
+    """Arquivo do resultado da tarefa (``result['arquivo']``), se existir"""
+    name = task.result.get('arquivo') if isinstance(task.result, dict) else None
+    if not name or not _file_re.match(name):
+        return None
+    path = files_dir() / name
+    return path if path.exists() else None
+
+
+def purge(cutoff):
+    """Remove as tarefas encerradas antes de ``cutoff`` e seus arquivos"""
+    finished = BackgroundTask.objects.filter(status__in=['concluida', 'falhou'], finished_at__lt=cutoff)
+    for task in finished.only('id', 'result').iterator():
+        path = result_file(task)
+        if path is not None:
+            path.unlink(missing_ok=True)
+    deleted, _ = finished.delete()
+    return deleted
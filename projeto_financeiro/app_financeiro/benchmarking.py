@@ -0,0 +1,84 @@
+"""
+Utilitários comuns aos comandos de benchmark (benchmark_*).
+"""
+
+import json
+import math
+import os
+from pathlib import Path
+
+
+def percentile(values, pct):
+    """Percentil (0-100) por interpolação linear; 0 para lista vazia"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower = math.floor(k)
+    upper = math.ceil(k)
+    if lower == upper:
+        return ordered[int(k)]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def summarize(latencies):
+    """Resumo de uma lista de latências em segundos (resultado em ms)"""
+    return {
+        'count': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def save_results(path, results):
+    """Grava os resultados em JSON (cria o diretório se preciso)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False, default=str))
+    return path
+
+
+def load_results(path):
+    return json.loads(Path(path).read_text())
+
+
+def setup_django(db_path, profile=None):
+    """Configura o Django num processo novo apontando para ``db_path``"""
+    os.environ['DATABASE_PATH'] = str(db_path)
+    if profile:
+        os.environ['DB_PROFILE'] = profile
+    import django
+    django.setup()
+
+
+BENCH_USER = 'benchmark'
+
+
+def prepare_seeded_db(db_path, scale, seed):
+    """Migra e popula (seed_scale) o banco de uma escala, se ainda não existir"""
+    setup_django(db_path)
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from app_financeiro.seeding import seed as seed_data
+
+    call_command('migrate', verbosity=0)
+    if User.objects.filter(username=BENCH_USER).exists():
+        return
+    User.objects.create_superuser(BENCH_USER, 'benchmark@example.com', BENCH_USER)
+    seed_data(
+        clients=max(50, scale // 100),
+        jobs=max(100, scale // 20),
+        cobrancas=scale,
+        seed=seed,
+    )
+
+
+def bench_client():
+    """Client de teste apontando para um host aceito por ALLOWED_HOSTS"""
+    from django.conf import settings
+    from django.test import Client
+
+    hosts = [h for h in settings.ALLOWED_HOSTS if h and h != '*' and not h.startswith('.')]
+    host = hosts[0] if hosts else 'localhost'
+    return Client(raise_request_exception=False, HTTP_HOST=host)
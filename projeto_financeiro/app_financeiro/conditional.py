@@ -0,0 +1,87 @@
+"""
+GET condicional (ETag/Last-Modified) para as listas e o dashboard.
+
+O ETag combina as versões de dados (``DataVersion``) dos modelos que a
+página mostra com o usuário, os parâmetros da URL, a data de hoje (o status
+efetivo das cobranças muda com ela) e o cookie CSRF (os formulários da página
+guardam o token). Quando o navegador já tem a versão atual, a resposta é um
+304 sem executar as consultas da lista nem o template.
+"""
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import DataVersion
+
+
+def page_validators(request, models):
+    """Retorna (etag, last_modified) da página para o request atual"""
+    versions = DataVersion.current(*models)
+    user = request.user
+    params = sorted((key, value) for key, values in request.GET.lists() for value in values)
+    parts = [
+        settings.ETAG_SALT,
+        request.path,
+        f'{user.pk}:{user.is_staff}',
+        timezone.localdate().isoformat(),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        repr(params),
+    ]
+    parts.extend(f'{name}:{version}' for name, (version, _) in sorted(versions.items()))
+    etag = quote_etag(hashlib.blake2b('|'.join(parts).encode(), digest_size=16).hexdigest())
+
+    changed = [updated_at for _, updated_at in versions.values() if updated_at]
+    last_modified = int(max(changed).timestamp()) if changed else None
+    return etag, last_modified
+
+
+def _precondition(request, models):
+    # Mensagens pendentes são exibidas uma única vez: a página precisa renderizar
+    if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+        return None, None
+    etag, last_modified = page_validators(request, models)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        response.headers['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    return response, (etag, last_modified)
+
+
+def _finish(response, validators):
+    if validators is None:
+        return response
+    etag, last_modified = validators
+    if response.status_code == 200:
+        response.headers.setdefault('ETag', etag)
+        if last_modified:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(*models):
+    """Responde 304 enquanto os ``models`` não mudarem (views síncronas ou assíncronas)"""
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _view(request, *args, **kwargs):
+                response, validators = await sync_to_async(_precondition)(request, models)
+                if response is not None:
+                    return response
+                return _finish(await view_func(request, *args, **kwargs), validators)
+        else:
+            @wraps(view_func)
+            def _view(request, *args, **kwargs):
+                response, validators = _precondition(request, models)
+                if response is not None:
+                    return response
+                return _finish(view_func(request, *args, **kwargs), validators)
+        return _view
+    return decorator
@@ -0,0 +1,203 @@
+"""
+Cubo de relatórios: fato agregado das cobranças.
+
+``CobrancaCube`` guarda uma linha por (mês de emissão, cliente, tipo do
+cliente, status do job, status efetivo da cobrança) com a soma dos valores e
+a quantidade. ``slice_cube`` responde às perguntas de "fatiar e agrupar"
+(faturamento por tipo de cliente e trimestre, taxa de vencidas por status do
+job...) lendo só o cubo.
+
+A atualização (tarefa ``cube_refresh``) recalcula as linhas por cliente.
+Entram no lote os clientes com cobranças, jobs ou cadastro alterados desde a
+marca d'água (``updated_at``), os marcados pelos signals (exclusões e troca
+de cliente, que a marca d'água não enxerga) e os que têm cobranças vencidas
+desde a última atualização (o status efetivo muda com a data).
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import (
+    Client, Cobranca, CobrancaCube, CobrancaHistory, CubeDirtyClient, CubeState, DataVersion, Job,
+    OPEN_Q, effective_status_case,
+)
+
+# Transações que gravaram antes da marca d'água mas terminaram depois dela
+WATERMARK_OVERLAP = timedelta(minutes=5)
+CLIENT_BATCH = 500
+
+# Colunas do cubo, na ordem do SELECT de ``cube_facts``
+CUBE_COLUMNS = ['client', 'month', 'client_type', 'job_status', 'status', 'value', 'count']
+
+# Dimensões aceitas por ``slice_cube`` (nome na API -> coluna do cubo)
+DIMENSIONS = {
+    'mes': 'month',
+    'trimestre': 'month',
+    'ano': 'month',
+    'cliente': 'client_id',
+    'tipo_cliente': 'client_type',
+    'status_job': 'job_status',
+    'status': 'status',
+}
+FILTERS = {
+    'cliente': 'client_id',
+    'tipo_cliente': 'client_type',
+    'status_job': 'job_status',
+    'status': 'status',
+}
+
+CENTS = Decimal('0.01')
+
+
+def cube_facts(today, client_ids=None):
+    """Cobranças (ativas e arquivadas) agregadas no formato do cubo (todas ou só de ``client_ids``)"""
+    queryset = CobrancaHistory.objects.order_by()
+    if client_ids is not None:
+        queryset = queryset.filter(client_id__in=client_ids)
+    return queryset.values(
+        'client_id',
+        cube_month=TruncMonth('issue_date'),
+        cube_client_type=F('client__type'),
+        cube_job_status=Coalesce('job__status', Value('')),
+        cube_status=effective_status_case(today),
+    ).annotate(cube_value=Sum('value'), cube_count=Count('id'))
+
+
+def _insert_facts(queryset):
+    """INSERT ... SELECT: o banco grava o resultado de ``cube_facts`` direto no cubo"""
+    opts = CobrancaCube._meta
+    columns = ', '.join(connection.ops.quote_name(opts.get_field(f).column) for f in CUBE_COLUMNS)
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {connection.ops.quote_name(opts.db_table)} ({columns}) {sql}', params)
+        return cursor.rowcount
+
+
+def _dirty_clients(since, refreshed_on, today):
+    """Clientes alterados desde ``since`` e com cobranças vencidas desde ``refreshed_on``"""
+    clients = set()
+    changed_jobs = Job.objects.filter(updated_at__gt=since).values('id')
+    querysets = [
+        Cobranca.objects.filter(updated_at__gt=since).values_list('client_id', flat=True),
+        Cobranca.objects.filter(job__in=changed_jobs).values_list('client_id', flat=True),
+        Client.objects.filter(updated_at__gt=since).values_list('id', flat=True),
+    ]
+    if refreshed_on and refreshed_on < today:
+        querysets.append(
+            Cobranca.objects.filter(
+                OPEN_Q, due_date__gte=refreshed_on, due_date__lt=today,
+            ).values_list('client_id', flat=True)
+        )
+    # Sem DISTINCT: o SQLite trocaria o índice de updated_at pelo de client_id
+    for queryset in querysets:
+        clients.update(queryset.order_by())
+    return clients
+
+
+def _latest_change():
+    latest = [
+        model.objects.aggregate(latest=Max('updated_at'))['latest']
+        for model in (Cobranca, Job, Client)
+    ]
+    return max(filter(None, latest), default=None)
+
+
+def refresh_cube(full=False):
+    """Atualiza o cubo; retorna o número de linhas gravadas"""
+    today = timezone.localdate()
+    state, _ = CubeState.objects.get_or_create(pk=1)
+    marked = list(CubeDirtyClient.objects.values_list('client_id', flat=True))
+    # Lida antes dos dados: o que mudar durante a atualização fica para a próxima
+    watermark = _latest_change()
+
+    if state.watermark is None:
+        full = True
+    clients = None
+    if not full:
+        clients = _dirty_clients(state.watermark - WATERMARK_OVERLAP, state.refreshed_on, today)
+        clients.update(marked)
+        if len(clients) > settings.CUBE_FULL_REFRESH_CLIENTS:
+            full = True
+
+    rows = 0
+    with transaction.atomic():
+        if full:
+            CobrancaCube.objects.all().delete()
+            rows = _insert_facts(cube_facts(today))
+        else:
+            ordered = sorted(clients)
+            for start in range(0, len(ordered), CLIENT_BATCH):
+                batch = ordered[start:start + CLIENT_BATCH]
+                CobrancaCube.objects.filter(client_id__in=batch).delete()
+                rows += _insert_facts(cube_facts(today, batch))
+        CubeDirtyClient.objects.filter(client_id__in=marked).delete()
+
+        state.watermark = watermark or state.watermark or timezone.now()
+        state.refreshed_on = today
+        state.refreshed_at = timezone.now()
+        state.save()
+        if full or clients:
+            DataVersion.changed(CobrancaCube)
+    return rows
+
+
+def _period(month, dimension):
+    if dimension == 'mes':
+        return f'{month:%Y-%m}'
+    if dimension == 'trimestre':
+        return f'{month.year}-T{(month.month - 1) // 3 + 1}'
+    return str(month.year)
+
+
+def slice_cube(dimensions, filters=None, start=None, end=None):
+    """Agrega o cubo pelas ``dimensions`` (nomes de ``DIMENSIONS``).
+
+    ``filters`` usa os nomes de ``FILTERS``; ``start``/``end`` limitam o mês de
+    emissão. Trimestre e ano são somados a partir dos meses, sem funções de
+    data no banco. Retorna uma lista de dicionários ordenada pelas dimensões.
+    """
+    queryset = CobrancaCube.objects.order_by()
+    for name, value in (filters or {}).items():
+        queryset = queryset.filter(**{FILTERS[name]: value})
+    if start:
+        queryset = queryset.filter(month__gte=start)
+    if end:
+        queryset = queryset.filter(month__lte=end)
+
+    columns = sorted({DIMENSIONS[name] for name in dimensions})
+    grouped = queryset.values(*columns).annotate(
+        cube_value=Sum('value'),
+        cube_count=Sum('count'),
+        paid_value=Sum('value', filter=Q(status='paga')),
+        overdue_value=Sum('value', filter=Q(status='vencida')),
+        overdue_count=Sum('count', filter=Q(status='vencida')),
+    )
+
+    cells = {}
+    for row in grouped:
+        key = tuple(
+            _period(row['month'], name) if DIMENSIONS[name] == 'month' else row[DIMENSIONS[name]]
+            for name in dimensions
+        )
+        cell = cells.setdefault(key, {
+            'valor': Decimal('0.00'), 'quantidade': 0, 'valor_pago': Decimal('0.00'),
+            'valor_vencido': Decimal('0.00'), 'quantidade_vencida': 0,
+        })
+        cell['valor'] += Decimal(row['cube_value'] or 0).quantize(CENTS)
+        cell['quantidade'] += row['cube_count'] or 0
+        cell['valor_pago'] += Decimal(row['paid_value'] or 0).quantize(CENTS)
+        cell['valor_vencido'] += Decimal(row['overdue_value'] or 0).quantize(CENTS)
+        cell['quantidade_vencida'] += row['overdue_count'] or 0
+
+    result = []
+    for key in sorted(cells, key=lambda k: tuple(str(part) for part in k)):
+        cell = cells[key]
+        cell['taxa_vencidas'] = round(cell['quantidade_vencida'] / cell['quantidade'], 4) if cell['quantidade'] else 0
+        result.append({**dict(zip(dimensions, key)), **cell})
+    return result
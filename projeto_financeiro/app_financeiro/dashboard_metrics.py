@@ -0,0 +1,124 @@
+"""
+Métricas do dashboard, divididas em grupos independentes.
+
+Cada grupo é uma função síncrona registrada com ``metric_group`` que recebe a
+data de hoje e retorna um dicionário. ``gather_metrics`` executa os grupos ao
+mesmo tempo, cada um numa thread do executor com a própria conexão ao banco,
+então a latência fica limitada pelo grupo mais lento e não pela soma deles.
+"""
+
+import asyncio
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.db.models import Count, Q, Sum
+
+from .archive import archived_totals
+from .forecast import get_forecast
+from .instrumentation import current_stats, track_queries
+from .models import Client, Cobranca, Job, cobranca_status_q
+
+_groups = {}
+
+
+def metric_group(name):
+    """Registra uma função como grupo de métricas do dashboard"""
+    def decorator(func):
+        _groups[name] = func
+        return func
+    return decorator
+
+
+def get_groups():
+    return dict(_groups)
+
+
+def _run_isolated(stats, func, *args):
+    # Roda numa thread do executor: conta as consultas na requisição e libera a
+    # conexão da thread ao final (respeitando CONN_MAX_AGE)
+    start = time.perf_counter()
+    try:
+        with track_queries(stats):
+            result = func(*args)
+    finally:
+        close_old_connections()
+    return result, time.perf_counter() - start
+
+
+async def run_isolated(func, *args):
+    """Executa ``func`` numa thread separada (e conexão separada); retorna (resultado, duração)"""
+    # As estatísticas vão explícitas: não depende do contexto copiado para o executor
+    return await sync_to_async(_run_isolated, thread_sensitive=False)(current_stats(), func, *args)
+
+
+async def gather_metrics(today, names=None):
+    """Executa os grupos em paralelo; retorna ``{nome: (valores, duração em s)}``"""
+    groups = get_groups()
+    names = list(names or groups)
+    results = await asyncio.gather(*(run_isolated(groups[name], today) for name in names))
+    return dict(zip(names, results))
+
+
+# =========================
+# GRUPOS
+# =========================
+
+@metric_group('cadastros')
+def cadastros(today):
+    return {
+        'total_clientes': Client.objects.filter(is_active=True).count(),
+        'jobs_ativos': Job.objects.filter(status__in=['pendente', 'em_andamento']).count(),
+    }
+
+
+@metric_group('faturamento')
+def faturamento(today):
+    """Faturamento do mês atual e do anterior (cobranças pagas) e o crescimento"""
+    inicio = today.replace(day=1)
+    inicio_anterior = (inicio - timedelta(days=1)).replace(day=1)
+    proximo = (inicio + timedelta(days=32)).replace(day=1)
+    totais = Cobranca.objects.filter(
+        status='paga', payment_date__gte=inicio_anterior, payment_date__lt=proximo,
+    ).aggregate(
+        mensal=Sum('value', filter=Q(payment_date__gte=inicio)),
+        anterior=Sum('value', filter=Q(payment_date__lt=inicio)),
+    )
+    mensal = totais['mensal'] or Decimal('0.00')
+    anterior = totais['anterior'] or Decimal('0.00')
+
+    crescimento = 0
+    if anterior > 0:
+        crescimento = ((mensal - anterior) / anterior) * 100
+    return {
+        'faturamento_mensal': mensal,
+        'faturamento_mes_anterior': anterior,
+        'crescimento': round(crescimento, 2),
+    }
+
+
+@metric_group('cobrancas')
+def cobrancas(today):
+    """Contadores pelo status efetivo de hoje (as pagas incluem as arquivadas)"""
+    resumo = Cobranca.objects.aggregate(
+        vencidas=Count('id', filter=cobranca_status_q('vencida', today)),
+        em_dia=Count('id', filter=cobranca_status_q('paga', today)),
+        vencem_semana=Count(
+            'id',
+            filter=cobranca_status_q('pendente', today) & Q(due_date__lte=today + timedelta(days=7)),
+        ),
+    )
+    return {
+        'cobrancas_vencidas': resumo['vencidas'],
+        'vencidas': resumo['vencidas'],
+        'em_dia': resumo['em_dia'] + archived_totals()['count'],
+        'vencem_semana': resumo['vencem_semana'],
+    }
+
+
+@metric_group('previsao')
+def previsao(today):
+    """Recebimentos previstos por semana (ver forecast.py; em cache por versão de dados)"""
+    return {'previsao': get_forecast(today)}
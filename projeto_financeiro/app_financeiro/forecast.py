@@ -0,0 +1,185 @@
+"""
+Previsão de recebimentos por semana (fluxo de caixa) para os próximos meses.
+
+O saldo de cada cobrança em aberto deve ser recebido em ``vencimento +
+atraso``, com o atraso seguindo o histórico de pagamentos do cliente
+(``payment_date - due_date`` das cobranças pagas, em semanas). Clientes com pouco histórico
+puxam para a distribuição geral (média ponderada com ``PRIOR_WEIGHT``
+cobranças "virtuais"). Para cobranças já vencidas, só os atrasos maiores que
+o atraso atual contam (a distribuição é renormalizada); se nenhum atraso
+histórico chega lá, o valor fica em "sem previsão".
+
+O banco faz o trabalho pesado: os dois histogramas (atrasos por cliente e
+valores em aberto por cliente e semana de vencimento) saem de consultas
+agrupadas, e a convolução roda sobre esses poucos milhares de linhas. O
+resultado fica no cache até a versão de dados das cobranças mudar.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, F, Func, IntegerField, Q, Sum, Value
+
+from .models import Cobranca, CobrancaHistory, DataVersion, OPEN_Q
+
+HORIZON_WEEKS = 26          # ~6 meses
+HISTORY_DAYS = 365          # pagamentos considerados no histórico de atrasos
+PRIOR_WEIGHT = 10           # peso da distribuição geral para cada cliente
+MIN_DELAY_WEEKS = -4        # pagamentos mais adiantados contam como 4 semanas
+MAX_DELAY_WEEKS = 52        # e os mais atrasados, como 52
+
+CACHE_KEY = 'forecast:{today}:{version}'
+CACHE_SECONDS = 60 * 60 * 24
+
+CENTS = Decimal('0.01')
+
+
+class WeeksBetween(Func):
+    """Semanas inteiras (arredondadas para baixo) de ``start`` até ``end``"""
+
+    output_field = IntegerField()
+    arity = 2
+    # Desloca para valores positivos antes do CAST (que trunca em direção a zero)
+    offset = 10000
+
+    def as_sql(self, compiler, connection, **extra_context):
+        start, end = (compiler.compile(expression) for expression in self.source_expressions)
+        return f'CAST(FLOOR(({end[0]} - {start[0]}) / 7.0) AS INTEGER)', (*end[1], *start[1])
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        start, end = (compiler.compile(expression) for expression in self.source_expressions)
+        sql = (
+            f'CAST((julianday({end[0]}) - julianday({start[0]}) + {7 * self.offset}) / 7 AS INTEGER)'
+            f' - {self.offset}'
+        )
+        return sql, (*end[1], *start[1])
+
+
+def delay_histograms(today):
+    """``{cliente: {semanas de atraso: quantidade}}`` dos pagamentos recentes (inclui arquivadas)"""
+    rows = (
+        CobrancaHistory.objects.filter(
+            payment_date__gte=today - timedelta(days=HISTORY_DAYS),
+        )
+        .order_by()
+        .annotate(atraso=WeeksBetween(F('due_date'), F('payment_date')))
+        .values('client_id', 'atraso')
+        .annotate(quantidade=Count('id'))
+    )
+    histograms = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        atraso = min(max(row['atraso'], MIN_DELAY_WEEKS), MAX_DELAY_WEEKS)
+        histograms[row['client_id']][atraso] += row['quantidade']
+    return histograms
+
+
+class _DelayModel:
+    """Distribuição de atrasos por cliente, suavizada pela distribuição geral"""
+
+    def __init__(self, histograms):
+        overall = defaultdict(int)
+        for histogram in histograms.values():
+            for atraso, quantidade in histogram.items():
+                overall[atraso] += quantidade
+        self.weeks = sorted(overall)
+        total = sum(overall.values())
+        self.overall = [overall[week] / total for week in self.weeks] if total else []
+        self.histograms = histograms
+        self._cache = {}
+
+    def distribution(self, client_id):
+        """(probabilidades, somas a partir de cada índice) alinhadas com ``weeks``"""
+        if client_id not in self._cache:
+            histogram = self.histograms.get(client_id, {})
+            count = sum(histogram.values())
+            probs = [
+                (histogram.get(week, 0) + PRIOR_WEIGHT * prior) / (count + PRIOR_WEIGHT)
+                for week, prior in zip(self.weeks, self.overall)
+            ]
+            tails = probs[:]
+            for i in range(len(tails) - 2, -1, -1):
+                tails[i] += tails[i + 1]
+            self._cache[client_id] = (probs, tails)
+        return self._cache[client_id]
+
+
+def compute_forecast(today):
+    """Projeção semanal dos recebimentos a partir de ``today``"""
+    model = _DelayModel(delay_histograms(today))
+    curve = [0.0] * HORIZON_WEEKS
+    after_horizon = 0.0
+    unforecast = Decimal('0.00')
+
+    open_qs = Cobranca.objects.filter(OPEN_Q).order_by()
+    if model.weeks:
+        # Vencidas há mais tempo que o maior atraso histórico, ou com vencimento
+        # depois do horizonte mesmo pagando adiantado: ficam fora da convolução
+        first_due = today - timedelta(weeks=model.weeks[-1] + 1)
+        last_due = today + timedelta(weeks=HORIZON_WEEKS - model.weeks[0])
+        outside = open_qs.aggregate(
+            sem_previsao=Sum('balance', filter=Q(due_date__lt=first_due)),
+            depois=Sum('balance', filter=Q(due_date__gte=last_due)),
+        )
+        unforecast += outside['sem_previsao'] or 0
+        after_horizon += float(outside['depois'] or 0)
+
+        grouped = (
+            open_qs.filter(due_date__gte=first_due, due_date__lt=last_due)
+            .annotate(semana=WeeksBetween(Value(today), F('due_date')))
+            .values('client_id', 'semana')
+            .annotate(valor=Sum('balance'))
+        )
+        for row in grouped:
+            due_week, amount = row['semana'], float(row['valor'])
+            probs, tails = model.distribution(row['client_id'])
+            # Ainda não foi paga: só atrasos que caem de hoje em diante
+            start = bisect_left(model.weeks, -due_week)
+            if start == len(model.weeks) or tails[start] <= 0:
+                unforecast += row['valor']
+                continue
+            scale = amount / tails[start]
+            for i in range(start, len(model.weeks)):
+                week = due_week + model.weeks[i]
+                if week >= HORIZON_WEEKS:
+                    after_horizon += scale * tails[i]
+                    break
+                curve[week] += scale * probs[i]
+    else:
+        # Sem histórico de pagamentos: cada cobrança cai na semana do vencimento
+        for row in open_qs.annotate(semana=WeeksBetween(Value(today), F('due_date'))).values('semana').annotate(
+            valor=Sum('balance')
+        ):
+            if row['semana'] < 0:
+                unforecast += row['valor']
+            elif row['semana'] >= HORIZON_WEEKS:
+                after_horizon += float(row['valor'])
+            else:
+                curve[row['semana']] += float(row['valor'])
+
+    semanas = []
+    acumulado = Decimal('0.00')
+    for week, value in enumerate(curve):
+        valor = Decimal(value).quantize(CENTS)
+        acumulado += valor
+        semanas.append({'inicio': today + timedelta(weeks=week), 'valor': valor, 'acumulado': acumulado})
+    return {
+        'semanas': semanas,
+        'total_previsto': acumulado,
+        'apos_horizonte': Decimal(after_horizon).quantize(CENTS),
+        'sem_previsao': Decimal(unforecast).quantize(CENTS),
+        'maximo_semanal': max((s['valor'] for s in semanas), default=Decimal('0.00')),
+    }
+
+
+def get_forecast(today):
+    """``compute_forecast`` em cache até a próxima alteração de cobranças"""
+    version, _ = DataVersion.current(Cobranca)[DataVersion.key(Cobranca)]
+    key = CACHE_KEY.format(today=today.isoformat(), version=version)
+    forecast = cache.get(key)
+    if forecast is None:
+        forecast = compute_forecast(today)
+        cache.set(key, forecast, CACHE_SECONDS)
+    return forecast
@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
-from .models import Client, Job, Cobranca, SystemConfig
+from .models import Client, Job, Cobranca, Pagamento, SystemConfig
 from decimal import Decimal, InvalidOperation
 
 
@@ -100,7 +100,6 @@ class CobrancaForm(forms.ModelForm):
             "client",
             "job",
             "value",
-            "status",
             "issue_date",
             "due_date",
             "payment_date",
@@ -133,6 +132,19 @@ class CobrancaForm(forms.ModelForm):
             )
 
 
+class PagamentoForm(forms.ModelForm):
+    value = forms.CharField(label="Valor")
+
+    class Meta:
+        model = Pagamento
+        fields = ["value", "payment_date", "notes"]
+        widgets = {
+            "payment_date": forms.DateInput(attrs={"type": "date"}),
+        }
+
+    clean_value = CobrancaForm.clean_value
+
+
 class SystemConfigForm(forms.ModelForm):
     class Meta:
         model = SystemConfig
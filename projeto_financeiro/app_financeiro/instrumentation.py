@@ -0,0 +1,271 @@
+"""
+Instrumentação por requisição: número de consultas, tempo de banco, tempo de
+renderização e tamanho da resposta, agregados por nome de URL.
+
+- ``RequestMetricsMiddleware`` mede cada requisição e registra as consultas
+  lentas (acima de ``SLOW_QUERY_MS``) no logger ``app_financeiro.slow_queries``.
+- ``InstrumentedDjangoTemplates`` é o backend de templates que mede o tempo
+  de renderização (inclui as consultas disparadas pelo template).
+- ``render_prometheus`` gera os histogramas no formato texto do Prometheus
+  (servidos pela view ``metrics``).
+
+As métricas ficam em memória, por processo: com vários workers, cada scrape
+mostra os números do worker que atendeu.
+"""
+
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+slow_query_logger = logging.getLogger('app_financeiro.slow_queries')
+
+
+class RequestStats:
+    # As consultas chegam também das threads auxiliares da requisição (ver
+    # ``track_queries``), por isso a contagem passa pelo lock
+    __slots__ = ('queries', 'db_time', 'render_time', 'render_depth', '_lock')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_depth = 0
+        self._lock = threading.Lock()
+
+    def add_query(self, elapsed):
+        with self._lock:
+            self.queries += 1
+            self.db_time += elapsed
+
+
+_current_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+def current_stats():
+    """Estatísticas da requisição em andamento (None fora de uma requisição)"""
+    return _current_stats.get()
+
+
+# =========================
+# HISTOGRAMAS
+# =========================
+
+METRICS = {
+    'request_duration_seconds': (
+        'Duração total da requisição',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'db_queries': (
+        'Consultas SQL por requisição',
+        (1, 2, 5, 10, 20, 50, 100, 200, 500),
+    ),
+    'db_duration_seconds': (
+        'Tempo total de banco por requisição',
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    ),
+    'render_duration_seconds': (
+        'Tempo de renderização de templates por requisição',
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    ),
+    'response_size_bytes': (
+        'Tamanho do corpo da resposta',
+        (1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000),
+    ),
+}
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, view, values):
+        with self._lock:
+            for name, value in values.items():
+                key = (name, view)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(METRICS[name][1])
+                histogram.observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: (h.buckets, list(h.counts), h.total, h.count)
+                for key, h in self._histograms.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+registry = MetricsRegistry()
+
+
+def _format_le(bound):
+    return repr(float(bound)) if isinstance(bound, float) else str(bound)
+
+
+def render_prometheus():
+    """Histogramas no formato texto de exposição do Prometheus"""
+    data = registry.snapshot()
+    lines = []
+    for name, (description, _) in METRICS.items():
+        metric = f'app_{name}'
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} histogram')
+        for (metric_name, view), (buckets, counts, total, count) in sorted(data.items()):
+            if metric_name != name:
+                continue
+            label = view.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{view="{label}",le="{_format_le(bound)}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{view="{label}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{view="{label}"}} {total}')
+            lines.append(f'{metric}_count{{view="{label}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+
+def _query_timer(stats, threshold):
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.add_query(elapsed)
+            if elapsed >= threshold:
+                slow_query_logger.warning(
+                    '%.1f ms [%s] %s; params=%r',
+                    elapsed * 1000, context['connection'].alias, sql, params,
+                )
+    return wrapper
+
+
+@contextmanager
+def track_queries(stats=None):
+    """Conta as consultas desta thread em ``stats`` (por padrão, a requisição em andamento).
+
+    As conexões são por thread e os wrappers do middleware valem só para as
+    da thread da requisição; threads auxiliares (ex.: métricas do dashboard)
+    usam isto para instalar o wrapper nas próprias conexões, de todos os
+    aliases.
+    """
+    if stats is None:
+        stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+    with _installed(stats, settings.SLOW_QUERY_MS / 1000):
+        yield
+
+
+@contextmanager
+def _installed(stats, threshold):
+    with ExitStack() as stack:
+        wrapper = _query_timer(stats, threshold)
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+        yield
+
+
+class RequestMetricsMiddleware:
+    """Mede consultas, tempo de banco/renderização e tamanho da resposta"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_query_threshold = settings.SLOW_QUERY_MS / 1000
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with _installed(stats, self.slow_query_threshold):
+                response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        values = {
+            'request_duration_seconds': duration,
+            'db_queries': stats.queries,
+            'db_duration_seconds': stats.db_time,
+            'render_duration_seconds': stats.render_time,
+        }
+        if not response.streaming:
+            values['response_size_bytes'] = len(response.content)
+        registry.observe(view, values)
+
+        response['Server-Timing'] = (
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+            f'render;dur={stats.render_time * 1000:.1f}, '
+            f'total;dur={duration * 1000:.1f}'
+        )
+        return response
+
+
+# =========================
+# BACKEND DE TEMPLATES
+# =========================
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return super().render(context, request)
+
+        # Só a renderização mais externa conta (include/render_to_string aninhados)
+        stats.render_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.render_depth -= 1
+            if stats.render_depth == 0:
+                stats.render_time += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
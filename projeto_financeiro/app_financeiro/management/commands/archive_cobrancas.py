@@ -0,0 +1,54 @@
+"""
+Move as cobranças pagas antigas para o arquivo (ver app_financeiro/archive.py)
+
+Uso:
+    python manage.py archive_cobrancas                   # pagas há mais de COBRANCA_ARCHIVE_AFTER_DAYS dias
+    python manage.py archive_cobrancas --dias 365 --lote 5000
+    python manage.py archive_cobrancas --limite 100000   # arquiva aos poucos
+
+A tarefa 'archive' do run_scheduler faz o mesmo todo dia.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app_financeiro.archive import archivable, archive_cutoff, archive_settled
+
+
+class Command(BaseCommand):
+    help = 'Move as cobranças pagas antigas da tabela principal para o arquivo, em lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=settings.COBRANCA_ARCHIVE_AFTER_DAYS,
+            help='Idade mínima do pagamento, em dias (padrão: COBRANCA_ARCHIVE_AFTER_DAYS)',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=settings.COBRANCA_ARCHIVE_BATCH,
+            help='Cobranças por transação (padrão: COBRANCA_ARCHIVE_BATCH)',
+        )
+        parser.add_argument('--limite', type=int, help='Máximo de cobranças movidas nesta execução')
+        parser.add_argument('--dry-run', action='store_true', help='Só conta, sem mover')
+
+    def handle(self, *args, **options):
+        if options['dias'] <= 0 or options['lote'] <= 0:
+            raise CommandError('--dias e --lote devem ser positivos')
+        cutoff = archive_cutoff(days=options['dias'])
+
+        if options['dry_run']:
+            count = archivable(cutoff).count()
+            self.stdout.write(f'{count} cobrança(s) paga(s) antes de {cutoff:%d/%m/%Y} seriam arquivadas')
+            return
+
+        start = time.perf_counter()
+        moved = archive_settled(cutoff, batch_size=options['lote'], limit=options['limite'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{moved} cobrança(s) paga(s) antes de {cutoff:%d/%m/%Y} arquivada(s) '
+            f'em {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,175 @@
+"""
+Benchmark de concorrência do SQLite: vários processos lendo a lista de
+cobranças e gravando via cobranca_atualizar ao mesmo tempo.
+
+Cada perfil (DB_PROFILE) roda num banco temporário próprio, criado e
+migrado do zero, então o banco configurado não é tocado.
+
+Uso:
+    python manage.py benchmark_sqlite --processes 8 --duration 15
+    python manage.py benchmark_sqlite --profile production --output bench/sqlite.json
+"""
+
+import multiprocessing
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from app_financeiro.benchmarking import save_results, setup_django, summarize
+
+PROFILES = ['default', 'production']
+
+
+def _prepare(db_path, profile, rows):
+    """Cria o banco do perfil com um usuário e ``rows`` cobranças"""
+    setup_django(db_path, profile)
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from app_financeiro.models import Client, Cobranca
+
+    call_command('migrate', verbosity=0)
+    User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+
+    clients = Client.objects.bulk_create([
+        Client(name=f'Cliente {i:03d}', document=f'{i:011d}') for i in range(50)
+    ])
+    today = date.today()
+    rng = random.Random(0)
+    Cobranca.objects.bulk_create([
+        Cobranca(
+            number=f'BENCH-{i:07d}',
+            client=clients[i % len(clients)],
+            value=Decimal(rng.randint(100, 10000)),
+            issue_date=today - timedelta(days=rng.randint(0, 365)),
+            due_date=today + timedelta(days=rng.randint(-120, 60)),
+        )
+        for i in range(rows)
+    ], batch_size=1000)
+
+
+def _worker(db_path, profile, duration, write_ratio, rows, seed):
+    """Executa requisições até ``duration`` segundos; devolve as métricas"""
+    setup_django(db_path, profile)
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, connection
+    from app_financeiro.benchmarking import bench_client
+
+    lock_errors = 0
+
+    def count_locks(execute, sql, params, many, context):
+        nonlocal lock_errors
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as e:
+            if 'locked' in str(e) or 'busy' in str(e):
+                lock_errors += 1
+            raise
+
+    client = bench_client()
+    client.force_login(User.objects.get(username='benchmark'))
+    ids = list(range(1, rows + 1))
+    rng = random.Random(seed)
+    today = date.today()
+
+    reads, writes, failures = [], [], 0
+    deadline = time.monotonic() + duration
+    with connection.execute_wrapper(count_locks):
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            if rng.random() < write_ratio:
+                due = today + timedelta(days=rng.randint(-60, 60))
+                response = client.post('/cobrancas/atualizar/', {
+                    'cobranca_id': rng.choice(ids),
+                    'value': f'{rng.randint(100, 10000)},00',
+                    'due_date': due.isoformat(),
+                    'notes': f'benchmark {rng.random()}',
+                })
+                bucket = writes
+            else:
+                response = client.get('/cobrancas/', {'status': rng.choice(['todos', 'pendente', 'vencida'])})
+                bucket = reads
+            elapsed = time.perf_counter() - start
+            if response.status_code >= 500:
+                failures += 1
+            else:
+                bucket.append(elapsed)
+
+    return {'reads': reads, 'writes': writes, 'failures': failures, 'lock_errors': lock_errors}
+
+
+class Command(BaseCommand):
+    help = 'Mede vazão de leitura/escrita e erros de lock do SQLite por perfil de banco'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4, help='Processos simultâneos (padrão: 4)')
+        parser.add_argument('--duration', type=float, default=10, help='Segundos por perfil (padrão: 10)')
+        parser.add_argument('--rows', type=int, default=2000, help='Cobranças no banco de teste (padrão: 2000)')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Fração de escritas (padrão: 0.2)')
+        parser.add_argument(
+            '--profile',
+            action='append',
+            choices=PROFILES,
+            help='Perfil a medir (pode repetir; padrão: todos)',
+        )
+        parser.add_argument('--output', help='Arquivo JSON para gravar os resultados')
+
+    def handle(self, *args, **options):
+        ctx = multiprocessing.get_context('spawn')
+        profiles = options['profile'] or PROFILES
+        results = {}
+
+        with tempfile.TemporaryDirectory(prefix='bench_sqlite_') as tmpdir:
+            for profile in profiles:
+                db_path = Path(tmpdir) / f'{profile}.sqlite3'
+                self.stdout.write(f'Preparando banco ({profile})...')
+                with ctx.Pool(1) as pool:
+                    pool.apply(_prepare, (db_path, profile, options['rows']))
+
+                self.stdout.write(
+                    f'Executando {options["processes"]} processo(s) por {options["duration"]}s ({profile})...'
+                )
+                args = [
+                    (db_path, profile, options['duration'], options['write_ratio'], options['rows'], seed)
+                    for seed in range(options['processes'])
+                ]
+                with ctx.Pool(options['processes']) as pool:
+                    worker_results = pool.starmap(_worker, args)
+
+                journal_mode = sqlite3.connect(db_path).execute('PRAGMA journal_mode').fetchone()[0]
+                results[profile] = self._aggregate(worker_results, options['duration'], journal_mode)
+
+        self._report(results)
+        if options['output']:
+            path = save_results(options['output'], {'options': {
+                k: options[k] for k in ('processes', 'duration', 'rows', 'write_ratio')
+            }, 'results': results})
+            self.stdout.write(f'Resultados gravados em {path}')
+
+    def _aggregate(self, worker_results, duration, journal_mode):
+        reads = [t for r in worker_results for t in r['reads']]
+        writes = [t for r in worker_results for t in r['writes']]
+        return {
+            'journal_mode': journal_mode,
+            'reads_per_s': round(len(reads) / duration, 1),
+            'writes_per_s': round(len(writes) / duration, 1),
+            'read_latency': summarize(reads),
+            'write_latency': summarize(writes),
+            'failures': sum(r['failures'] for r in worker_results),
+            'lock_errors': sum(r['lock_errors'] for r in worker_results),
+        }
+
+    def _report(self, results):
+        header = f'{"perfil":<12}{"journal":<10}{"leituras/s":>12}{"escritas/s":>12}{"p95 leit.":>12}{"p95 escr.":>12}{"falhas":>8}{"locks":>8}'
+        self.stdout.write(header)
+        for profile, r in results.items():
+            self.stdout.write(
+                f'{profile:<12}{r["journal_mode"]:<10}{r["reads_per_s"]:>12}{r["writes_per_s"]:>12}'
+                f'{r["read_latency"]["p95_ms"]:>12}{r["write_latency"]["p95_ms"]:>12}'
+                f'{r["failures"]:>8}{r["lock_errors"]:>8}'
+            )
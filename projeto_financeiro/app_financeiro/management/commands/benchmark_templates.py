@@ -0,0 +1,122 @@
+"""
+Tempo de renderização das páginas com e sem os caches de template.
+
+"frio": antes de cada requisição o cached loader é esvaziado e o cache de
+fragmentos ({% cache %} da sidebar) é limpo, como no primeiro acesso de um
+processo; "quente": os dois caches já preenchidos. O tempo vem do cabeçalho
+Server-Timing (render) da instrumentação e inclui as consultas disparadas
+pelo template, que são as mesmas nos dois modos.
+
+Uso:
+    python manage.py benchmark_templates
+    python manage.py benchmark_templates --scale 1000 --iterations 50 --output bench/templates.json
+"""
+
+import multiprocessing
+import re
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app_financeiro.benchmarking import (
+    BENCH_USER, percentile, prepare_seeded_db, save_results, setup_django,
+)
+
+PAGES = [
+    ('dashboard', '/dashboard/'),
+    ('cobrancas', '/cobrancas/'),
+    ('jobs', '/jobs/'),
+    ('clientes', '/clientes/'),
+    ('notificacoes_list', '/notificacoes/'),
+    ('configuracoes', '/configuracoes/'),
+]
+
+_render_re = re.compile(r'render;dur=([\d.]+)')
+
+
+def _render_ms(response):
+    match = _render_re.search(response.get('Server-Timing', ''))
+    return float(match.group(1)) if match else 0.0
+
+
+def _measure(db_path, pages, iterations):
+    setup_django(db_path)
+    from django.contrib.auth.models import User
+    from django.core.cache import caches
+    from django.template import engines
+    from app_financeiro.benchmarking import bench_client
+
+    engine = engines.all()[0].engine
+    fragments = caches['template_fragments']
+
+    def reset():
+        for loader in engine.template_loaders:
+            if hasattr(loader, 'reset'):
+                loader.reset()
+        fragments.clear()
+
+    client = bench_client()
+    client.force_login(User.objects.get(username=BENCH_USER))
+
+    results = {'cached_loader': any(hasattr(l, 'reset') for l in engine.template_loaders), 'pages': {}}
+    for name, url in pages:
+        client.get(url)
+        cold = []
+        for _ in range(iterations):
+            reset()
+            cold.append(_render_ms(client.get(url)))
+        client.get(url)
+        warm = [_render_ms(client.get(url)) for _ in range(iterations)]
+
+        cold_p50 = percentile(cold, 50)
+        warm_p50 = percentile(warm, 50)
+        results['pages'][name] = {
+            'url': url,
+            'cold_p50_ms': round(cold_p50, 2),
+            'warm_p50_ms': round(warm_p50, 2),
+            'saved_ms': round(cold_p50 - warm_p50, 2),
+            'saved_pct': round((cold_p50 - warm_p50) / cold_p50 * 100, 1) if cold_p50 else 0.0,
+        }
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Mede o tempo de renderização economizado pelo cached loader e pelo cache de fragmentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1000, help='Cobranças no banco de teste (padrão: 1000)')
+        parser.add_argument('--iterations', type=int, default=30, help='Requisições por página e modo (padrão: 30)')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos dados (padrão: 42)')
+        parser.add_argument('--db-dir', help='Diretório para reaproveitar o banco populado (padrão: temporário)')
+        parser.add_argument('--output', help='Arquivo JSON para gravar os resultados')
+
+    def handle(self, *args, **options):
+        ctx = multiprocessing.get_context('spawn')
+        with tempfile.TemporaryDirectory(prefix='bench_templates_') as tmpdir:
+            db_dir = Path(options['db_dir'] or tmpdir)
+            db_dir.mkdir(parents=True, exist_ok=True)
+            db_path = db_dir / f'views-{options["scale"]}-seed{options["seed"]}.sqlite3'
+            self.stdout.write(f'Preparando {options["scale"]} cobranças ({db_path.name})...')
+            with ctx.Pool(1) as pool:
+                pool.apply(prepare_seeded_db, (db_path, options['scale'], options['seed']))
+            with ctx.Pool(1) as pool:
+                results = pool.apply(_measure, (db_path, PAGES, options['iterations']))
+
+        if not results['cached_loader']:
+            self.stdout.write(self.style.WARNING(
+                'DEBUG=True: o cached loader não está ativo, só o cache de fragmentos é medido'
+            ))
+        self.stdout.write(f'{"página":<20}{"frio ms":>10}{"quente ms":>11}{"economia ms":>13}{"%":>7}')
+        for name, r in results['pages'].items():
+            self.stdout.write(
+                f'{name:<20}{r["cold_p50_ms"]:>10}{r["warm_p50_ms"]:>11}{r["saved_ms"]:>13}{r["saved_pct"]:>7}'
+            )
+
+        if options['output']:
+            path = save_results(options['output'], {
+                'meta': {'created_at': timezone.now().isoformat(), 'iterations': options['iterations']},
+                'results': results,
+            })
+            self.stdout.write(f'Resultados gravados em {path}')
@@ -0,0 +1,230 @@
+"""
+Benchmark das views principais em várias escalas de dados.
+
+Para cada escala (quantidade de cobranças) um banco temporário é migrado e
+populado com o seed_scale; as views são chamadas pelo Client de teste e o
+resultado (p50/p95, número de consultas, pico de memória e tamanho da
+resposta) pode ser gravado em JSON e comparado com uma execução anterior.
+
+Uso:
+    python manage.py benchmark_views --scales 1000,100000 --output bench/antes.json
+    python manage.py benchmark_views --scales 1000,100000 --baseline bench/antes.json
+    python manage.py benchmark_views --scales 1000000 --db-dir /var/tmp/bench --iterations 5
+"""
+
+import math
+import multiprocessing
+import platform
+import re
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app_financeiro.benchmarking import (
+    BENCH_USER, load_results, prepare_seeded_db, save_results, setup_django, summarize,
+)
+
+# (nome, URL) — nomes estáveis, usados na comparação entre execuções.
+# ``{pagina_meio}`` é trocado pela página do meio do changelist de cobranças,
+# calculada pelo tamanho do banco (uma página fixa sai do intervalo e vira 302)
+VIEWS = [
+    ('dashboard', '/dashboard/'),
+    ('cobrancas', '/cobrancas/'),
+    ('cobrancas_vencidas', '/cobrancas/?status=vencida'),
+    ('cobrancas_busca', '/cobrancas/?q=SEED'),
+    ('cobrancas_fragmento', '/cobrancas/?status=vencida&fragment=1'),
+    ('jobs', '/jobs/'),
+    ('clientes', '/clientes/'),
+    ('notificacoes_list', '/notificacoes/'),
+    ('admin_cobrancas', '/admin/app_financeiro/cobranca/'),
+    ('admin_cobrancas_vencidas', '/admin/app_financeiro/cobranca/?status=vencida'),
+    ('admin_cobrancas_pagina', '/admin/app_financeiro/cobranca/?p={pagina_meio}'),
+    ('admin_jobs', '/admin/app_financeiro/job/'),
+    ('admin_notificacoes', '/admin/app_financeiro/notification/'),
+    ('admin_autocomplete', '/admin/autocomplete/?app_label=app_financeiro&model_name=cobranca&field_name=client&term=Agro'),
+]
+
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def _url_params():
+    from django.contrib import admin
+    from app_financeiro.models import Cobranca
+
+    per_page = admin.site._registry[Cobranca].list_per_page
+    pages = math.ceil(Cobranca.objects.count() / per_page)
+    return {'pagina_meio': max(1, pages // 2)}
+
+
+def _query_count(response):
+    # Contagem do RequestMetricsMiddleware: soma as consultas de todas as
+    # conexões da requisição, inclusive as das threads do dashboard, que um
+    # CaptureQueriesContext na conexão desta thread não vê
+    match = SERVER_TIMING_QUERIES.search(response.headers.get('Server-Timing', ''))
+    if match is None:
+        raise RuntimeError('Resposta sem Server-Timing: o RequestMetricsMiddleware está ativo?')
+    return int(match.group(1))
+
+
+def _measure(db_path, views, iterations):
+    """Executa as views e devolve as métricas de cada uma"""
+    setup_django(db_path)
+    from django.contrib.auth.models import User
+    from app_financeiro.benchmarking import bench_client
+
+    client = bench_client()
+    client.force_login(User.objects.get(username=BENCH_USER))
+    params = _url_params()
+
+    results = {}
+    for name, url in views:
+        url = url.format(**params)
+        # Primeira chamada aquece caches/templates e mede consultas e tamanho
+        response = client.get(url)
+        if response.status_code != 200:
+            results[name] = {'url': url, 'error': f'HTTP {response.status_code}'}
+            continue
+        query_count = _query_count(response)
+
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {
+            'url': url,
+            **summarize(latencies),
+            'queries': query_count,
+            'peak_memory_kb': round(peak / 1024, 1),
+            'response_bytes': len(response.content),
+        }
+    return results
+
+
+def find_regressions(current, baseline, threshold):
+    """Lista as views cujo p95 piorou mais que ``threshold`` ou que fazem mais consultas"""
+    regressions = []
+    for scale, views in current.items():
+        for name, metrics in views.items():
+            before = baseline.get(scale, {}).get(name)
+            if not before or 'error' in before or 'error' in metrics:
+                continue
+            if before['p95_ms'] and metrics['p95_ms'] > before['p95_ms'] * (1 + threshold):
+                regressions.append(
+                    f'{scale} {name}: p95 {before["p95_ms"]} ms -> {metrics["p95_ms"]} ms'
+                )
+            if metrics['queries'] > before['queries']:
+                regressions.append(
+                    f'{scale} {name}: consultas {before["queries"]} -> {metrics["queries"]}'
+                )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = 'Mede latência, consultas e memória das views em várias escalas de dados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            default='1000,100000',
+            help='Quantidades de cobranças separadas por vírgula (padrão: 1000,100000)',
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Requisições por view (padrão: 20)')
+        parser.add_argument(
+            '--view',
+            action='append',
+            dest='views',
+            choices=[name for name, _ in VIEWS],
+            help='Mede apenas esta view (pode repetir)',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos dados (padrão: 42)')
+        parser.add_argument(
+            '--db-dir',
+            help='Diretório para guardar e reaproveitar os bancos populados (padrão: temporário)',
+        )
+        parser.add_argument('--output', help='Arquivo JSON para gravar os resultados')
+        parser.add_argument('--baseline', help='JSON de uma execução anterior para comparar')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Piora relativa do p95 considerada regressão (padrão: 0.2 = 20%%)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(s) for s in options['scales'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--scales deve ser uma lista de inteiros, ex.: 1000,100000')
+        views = [(n, u) for n, u in VIEWS if not options['views'] or n in options['views']]
+
+        ctx = multiprocessing.get_context('spawn')
+        results = {}
+        with tempfile.TemporaryDirectory(prefix='bench_views_') as tmpdir:
+            db_dir = Path(options['db_dir'] or tmpdir)
+            db_dir.mkdir(parents=True, exist_ok=True)
+            for scale in scales:
+                db_path = db_dir / f'views-{scale}-seed{options["seed"]}.sqlite3'
+                self.stdout.write(f'Preparando {scale} cobranças ({db_path.name})...')
+                # Processos novos: cada escala usa o próprio banco
+                with ctx.Pool(1) as pool:
+                    pool.apply(prepare_seeded_db, (db_path, scale, options['seed']))
+                with ctx.Pool(1) as pool:
+                    results[str(scale)] = pool.apply(_measure, (db_path, views, options['iterations']))
+                self._report(scale, results[str(scale)])
+
+        if options['output']:
+            path = save_results(options['output'], {
+                'meta': {
+                    'created_at': timezone.now().isoformat(),
+                    'python': platform.python_version(),
+                    'iterations': options['iterations'],
+                    'seed': options['seed'],
+                },
+                'results': results,
+            })
+            self.stdout.write(f'Resultados gravados em {path}')
+
+        # Uma view que não respondeu 200 não foi medida: não passa em silêncio
+        errors = [
+            f'{scale} {name}: {r["error"]} ({r["url"]})'
+            for scale, views in results.items() for name, r in views.items() if 'error' in r
+        ]
+        if errors:
+            for line in errors:
+                self.stdout.write(self.style.ERROR(f'ERRO {line}'))
+            raise CommandError(f'{len(errors)} view(s) não responderam 200')
+
+        if options['baseline']:
+            baseline = load_results(options['baseline'])['results']
+            regressions = find_regressions(results, baseline, options['threshold'])
+            if regressions:
+                for line in regressions:
+                    self.stdout.write(self.style.ERROR(f'REGRESSÃO {line}'))
+                raise CommandError(f'{len(regressions)} regressão(ões) em relação a {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS('Sem regressões em relação à linha de base'))
+
+    def _report(self, scale, results):
+        self.stdout.write(
+            f'{"view":<26}{"p50 ms":>10}{"p95 ms":>10}{"consultas":>11}{"pico KB":>11}{"bytes":>11}'
+        )
+        for name, r in results.items():
+            if 'error' in r:
+                self.stdout.write(f'{name:<26}{r["error"]:>10}')
+                continue
+            self.stdout.write(
+                f'{name:<26}{r["p50_ms"]:>10}{r["p95_ms"]:>10}{r["queries"]:>11}'
+                f'{r["peak_memory_kb"]:>11}{r["response_bytes"]:>11}'
+            )
+        self.stdout.write('')
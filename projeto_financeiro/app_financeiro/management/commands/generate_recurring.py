@@ -0,0 +1,48 @@
+"""
+Gera as cobranças recorrentes de um intervalo de meses
+
+Uso:
+    python manage.py generate_recurring                  # mês atual
+    python manage.py generate_recurring --de 2026-01 --ate 2026-12
+
+Pode ser repetido: meses já gerados são ignorados. A tarefa
+'recurring_billing' do run_scheduler faz o mesmo todo dia para o mês
+anterior e o atual.
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app_financeiro.recurrence import generate
+
+
+def _month(value):
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        return date(year, month, 1)
+    except ValueError:
+        raise CommandError(f'Mês inválido: {value} (use AAAA-MM)') from None
+
+
+class Command(BaseCommand):
+    help = 'Gera as cobranças das recorrências ativas nos meses informados (idempotente)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--de', help='Primeiro mês, AAAA-MM (padrão: mês atual)')
+        parser.add_argument('--ate', help='Último mês, AAAA-MM (padrão: igual a --de)')
+
+    def handle(self, *args, **options):
+        first = _month(options['de']) if options['de'] else timezone.localdate().replace(day=1)
+        last = _month(options['ate']) if options['ate'] else first
+        if last < first:
+            raise CommandError('--ate deve ser igual ou posterior a --de')
+
+        start = time.perf_counter()
+        created = generate(first, last)
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} cobrança(s) gerada(s) de {first:%m/%Y} a {last:%m/%Y} '
+            f'em {time.perf_counter() - start:.1f}s'
+        ))
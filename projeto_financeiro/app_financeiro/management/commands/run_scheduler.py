@@ -0,0 +1,85 @@
+"""
+Agendador interno: executa as tarefas periódicas registradas em tasks.py
+
+Uso:
+    python manage.py run_scheduler            # loop contínuo
+    python manage.py run_scheduler --once     # executa o que estiver devido e sai
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from app_financeiro.scheduler import get_tasks, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas periódicas (status, lembretes, retenção) nos seus intervalos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Executa uma única rodada e encerra',
+        )
+        parser.add_argument(
+            '--tick',
+            type=int,
+            default=30,
+            help='Segundos entre verificações no modo contínuo (padrão: 30)',
+        )
+        parser.add_argument(
+            '--task',
+            action='append',
+            dest='tasks',
+            help='Limita a execução a esta tarefa (pode repetir)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Executa as tarefas mesmo que não estejam devidas',
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='Lista as tarefas registradas e sai',
+        )
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for task in get_tasks().values():
+                self.stdout.write(f'{task.name}: a cada {task.every}')
+            return
+
+        self._stop = False
+        signal.signal(signal.SIGTERM, self._handle_stop)
+
+        try:
+            while True:
+                self._run_round(options['tasks'], options['force'])
+                if options['once'] or self._stop:
+                    break
+                time.sleep(options['tick'])
+                if self._stop:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+    def _run_round(self, names, force):
+        close_old_connections()
+        try:
+            runs = run_pending(names=names, force=force)
+        except KeyError as e:
+            raise CommandError(e.args[0])
+
+        for run in runs:
+            line = f'{run.task_name}: {run.rows} linha(s) em {run.duration_ms} ms'
+            if run.success:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(self.style.ERROR(f'{line} (erro)'))
+
+    def _handle_stop(self, signum, frame):
+        self._stop = True
@@ -0,0 +1,95 @@
+"""
+Workers da fila de tarefas em segundo plano (``BackgroundTask``)
+
+Uso:
+    python manage.py run_workers                # BACKGROUND_WORKERS processos, loop contínuo
+    python manage.py run_workers --workers 4
+    python manage.py run_workers --burst        # executa o que estiver na fila e sai
+"""
+
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _worker(index, burst, poll, stop):
+    """Processo de um worker (iniciado com spawn: configura o Django de novo)"""
+    import django
+    django.setup()
+
+    from app_financeiro.background import work
+    from app_financeiro.scheduler import OWNER
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    work(owner=f'{OWNER}:{index}', burst=burst, poll=poll, should_stop=stop.is_set)
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas em segundo plano enfileiradas (exportações, arquivamento, tarefas periódicas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.BACKGROUND_WORKERS,
+            help=f'Número de processos (padrão: {settings.BACKGROUND_WORKERS})',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Encerra quando a fila estiver vazia',
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=1.0,
+            help='Segundos entre consultas com a fila vazia (padrão: 1)',
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='Lista as tarefas registradas e sai',
+        )
+
+    def handle(self, *args, **options):
+        from app_financeiro.background import get_functions, work
+
+        if options['list']:
+            for name, func in get_functions().items():
+                self.stdout.write(f'{name}: até {func.max_attempts} tentativa(s)')
+            return
+        if options['workers'] < 1:
+            raise CommandError('--workers precisa ser pelo menos 1')
+
+        context = multiprocessing.get_context('spawn')
+        stop = context.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+        if options['workers'] == 1:
+            try:
+                executed = work(burst=options['burst'], poll=options['poll'], should_stop=stop.is_set)
+            except KeyboardInterrupt:
+                return
+            self.stdout.write(self.style.SUCCESS(f'{executed} tarefa(s) executada(s)'))
+            return
+
+        processes = [
+            context.Process(target=_worker, args=(i, options['burst'], options['poll'], stop), daemon=True)
+            for i in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f'{len(processes)} worker(s) iniciado(s)')
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for process in processes:
+                process.join()
+        failed = [p for p in processes if p.exitcode]
+        if failed:
+            raise CommandError(f'{len(failed)} worker(s) encerrado(s) com erro')
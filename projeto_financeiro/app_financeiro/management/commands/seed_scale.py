@@ -0,0 +1,80 @@
+"""
+Gera dados sintéticos em volume para testes de escala
+
+Uso:
+    python manage.py seed_scale --cobrancas 1000000
+    python manage.py seed_scale --clear --seed 7 --clients 5000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from app_financeiro.models import Cobranca
+from app_financeiro.seeding import clear_seed_data, seed
+
+
+class Command(BaseCommand):
+    help = 'Gera clientes, jobs, cobranças e notificações sintéticos (determinístico pela semente)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000, help='Clientes (padrão: 1000)')
+        parser.add_argument('--jobs', type=int, default=5000, help='Jobs (padrão: 5000)')
+        parser.add_argument('--cobrancas', type=int, default=100_000, help='Cobranças (padrão: 100000)')
+        parser.add_argument(
+            '--notifications',
+            type=int,
+            default=200,
+            help='Notificações por usuário staff (padrão: 200)',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Semente do gerador (padrão: 42)')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='Linhas por transação (padrão: 10000)')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Remove os dados de execuções anteriores do seed antes de gerar',
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            removed = clear_seed_data()
+            self.stdout.write(
+                f"Removidos: {removed['cobrancas']} cobranças, {removed['jobs']} jobs, "
+                f"{removed['clients']} clientes, {removed['notifications']} notificações"
+            )
+
+        if Cobranca.objects.filter(number__startswith=f"SEED{options['seed']}-").exists():
+            raise CommandError(
+                f"Já existem cobranças geradas com a semente {options['seed']}. "
+                "Use --clear ou outra --seed."
+            )
+
+        if connection.vendor == 'sqlite':
+            # Carga em massa: o seed pode ser refeito se algo falhar no meio
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = OFF')
+
+        total = options['cobrancas']
+        start = time.perf_counter()
+
+        def progress(done):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'  {done}/{total} cobranças ({elapsed:.1f}s)')
+
+        created = seed(
+            clients=options['clients'],
+            jobs=options['jobs'],
+            cobrancas=total,
+            notifications_per_user=options['notifications'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=progress if options['verbosity'] > 1 else None,
+        )
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Gerados {created['clients']} clientes, {created['jobs']} jobs, "
+            f"{created['cobrancas']} cobranças e {created['notifications']} notificações "
+            f"em {elapsed:.1f}s"
+        ))
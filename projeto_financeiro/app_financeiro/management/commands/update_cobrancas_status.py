@@ -1,66 +1,39 @@
 """
-Comando para atualizar status de cobranças automaticamente
-Crie em: app_financeiro/management/commands/update_cobrancas_status.py
+Comando para notificar cobranças vencidas e a vencer
+
+O status efetivo das cobranças é calculado na consulta, então este comando
+não reescreve mais a tabela. Mantido para compatibilidade com o cron externo:
+executa as tarefas 'status_refresh' e 'reminders' do agendador, sob o mesmo
+lease do run_scheduler e respeitando os intervalos registrados, então
+execuções sobrepostas (ou junto com o run_scheduler) não duplicam
+notificações.
 """
 
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from app_financeiro.models import Cobranca, Notification
-from django.contrib.auth.models import User
+
+from app_financeiro.scheduler import run_pending
 
 
 class Command(BaseCommand):
-    help = 'Atualiza o status das cobranças baseado na data de vencimento'
+    help = 'Notifica a equipe sobre cobranças vencidas e a vencer'
 
     def handle(self, *args, **kwargs):
-        today = timezone.localdate()
-        
-        # Atualizar cobranças vencidas
-        cobrancas_vencidas = Cobranca.objects.filter(
-            status='pendente',
-            due_date__lt=today
-        )
-        
-        count_vencidas = cobrancas_vencidas.count()
-        cobrancas_vencidas.update(status='vencida')
-        
-        # Criar notificações para cobranças vencidas
-        if count_vencidas > 0:
-            # Notificar todos os usuários staff
-            staff_users = User.objects.filter(is_staff=True, is_active=True)
-            
-            for user in staff_users:
-                Notification.objects.create(
-                    user=user,
-                    type='cobranca_vencida',
-                    title=f'{count_vencidas} cobrança(s) vencida(s)',
-                    message=f'Existem {count_vencidas} cobrança(s) que venceram e precisam de atenção.',
-                    link='/cobrancas/?status=vencida'
-                )
-        
-        # Notificar sobre cobranças que vencem em 3 dias
-        tres_dias = today + timezone.timedelta(days=3)
-        cobrancas_vencendo = Cobranca.objects.filter(
-            status='pendente',
-            due_date=tres_dias
-        )
-        
-        count_vencendo = cobrancas_vencendo.count()
-        
-        if count_vencendo > 0:
-            staff_users = User.objects.filter(is_staff=True, is_active=True)
-            
-            for user in staff_users:
-                Notification.objects.create(
-                    user=user,
-                    type='cobranca_vencendo',
-                    title=f'{count_vencendo} cobrança(s) vencendo em 3 dias',
-                    message=f'Existem {count_vencendo} cobrança(s) que vencem em 3 dias.',
-                    link='/cobrancas/?status=pendente'
-                )
-        
+        runs = {
+            run.task_name: run
+            for run in run_pending(names=['status_refresh', 'reminders'])
+        }
+
+        if not runs:
+            self.stdout.write(
+                self.style.WARNING('Nenhuma tarefa devida ou já em execução em outra instância')
+            )
+            return
+
+        count_vencidas = runs['status_refresh'].rows if 'status_refresh' in runs else 0
+        count_vencendo = runs['reminders'].rows if 'reminders' in runs else 0
+
         self.stdout.write(
             self.style.SUCCESS(
-                f'Status atualizado: {count_vencidas} vencidas, {count_vencendo} vencendo em breve'
+                f'Notificações: {count_vencidas} vencidas, {count_vencendo} vencendo em breve'
             )
-        )
\ No newline at end of file
+        )
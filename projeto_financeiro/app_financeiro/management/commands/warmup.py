@@ -0,0 +1,145 @@
+"""
+Aquece o processo (imports, URL resolver, templates, conexão) e mostra o
+tempo de cada etapa.
+
+Com --compare, mede a latência da primeira requisição em processos novos,
+sem e com o aquecimento, contra um banco populado de teste. Cada rodada usa
+um processo recém-criado, como um worker que acabou de subir depois da
+hibernação; a sessão já existe no banco, então só a requisição é medida.
+
+Uso:
+    python manage.py warmup
+    python manage.py warmup --compare --runs 10 --output bench/warmup.json
+"""
+
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app_financeiro.benchmarking import (
+    BENCH_USER, percentile, prepare_seeded_db, save_results, setup_django,
+)
+from app_financeiro.warmup import STAGES, warmup
+
+# Primeiras páginas visitadas depois do login, na ordem
+FIRST_PAGES = [
+    ('dashboard', '/dashboard/'),
+    ('cobrancas', '/cobrancas/'),
+    ('clientes', '/clientes/'),
+    ('jobs', '/jobs/'),
+]
+
+
+def _login_cookie(db_path):
+    """Cria a sessão do usuário de benchmark; retorna (nome, valor) do cookie"""
+    setup_django(db_path)
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from app_financeiro.benchmarking import bench_client
+
+    client = bench_client()
+    client.force_login(User.objects.get(username=BENCH_USER))
+    return settings.SESSION_COOKIE_NAME, client.cookies[settings.SESSION_COOKIE_NAME].value
+
+
+def _first_requests(db_path, cookie, warm):
+    setup_django(db_path)
+    from app_financeiro.benchmarking import bench_client
+
+    client = bench_client()
+    client.cookies[cookie[0]] = cookie[1]
+
+    timings = warmup() if warm else []
+    pages = {}
+    for name, url in FIRST_PAGES:
+        start = time.perf_counter()
+        response = client.get(url)
+        pages[name] = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} respondeu {response.status_code}')
+    return {'stages': {name: seconds for name, seconds, _ in timings}, 'pages': pages}
+
+
+def _ms(values):
+    return round(percentile(values, 50) * 1000, 2)
+
+
+class Command(BaseCommand):
+    help = 'Aquece imports, URLs, templates e conexão; com --compare mede a primeira requisição sem e com aquecimento'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stage',
+            action='append',
+            dest='stages',
+            choices=[name for name, _ in STAGES],
+            help='Executa só esta etapa (pode repetir)',
+        )
+        parser.add_argument('--compare', action='store_true', help='Mede a primeira requisição em processos novos')
+        parser.add_argument('--runs', type=int, default=5, help='Processos por modo no --compare (padrão: 5)')
+        parser.add_argument('--scale', type=int, default=1000, help='Cobranças no banco de teste (padrão: 1000)')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos dados (padrão: 42)')
+        parser.add_argument('--db-dir', help='Diretório para reaproveitar o banco populado (padrão: temporário)')
+        parser.add_argument('--output', help='Arquivo JSON para gravar os resultados do --compare')
+
+    def handle(self, *args, **options):
+        if not options['compare']:
+            timings = warmup(options['stages'])
+            for name, seconds, detail in timings:
+                self.stdout.write(f'{name:<12}{seconds * 1000:>10.1f} ms  {detail}')
+            self.stdout.write(self.style.SUCCESS(
+                f'Aquecido em {sum(seconds for _, seconds, _ in timings) * 1000:.1f} ms'
+            ))
+            return
+        self.compare(options)
+
+    def compare(self, options):
+        ctx = multiprocessing.get_context('spawn')
+        runs = {'frio': [], 'aquecido': []}
+        with tempfile.TemporaryDirectory(prefix='bench_warmup_') as tmpdir:
+            db_dir = Path(options['db_dir'] or tmpdir)
+            db_dir.mkdir(parents=True, exist_ok=True)
+            db_path = db_dir / f'views-{options["scale"]}-seed{options["seed"]}.sqlite3'
+            self.stdout.write(f'Preparando {options["scale"]} cobranças ({db_path.name})...')
+            with ctx.Pool(1) as pool:
+                pool.apply(prepare_seeded_db, (db_path, options['scale'], options['seed']))
+                cookie = pool.apply(_login_cookie, (db_path,))
+
+            # Um processo novo por rodada, alternando os modos
+            with ctx.Pool(1, maxtasksperchild=1) as pool:
+                for _ in range(options['runs']):
+                    for mode, warm in (('frio', False), ('aquecido', True)):
+                        runs[mode].append(pool.apply(_first_requests, (db_path, cookie, warm)))
+
+        results = {
+            mode: {'pages_p50_ms': {name: _ms([s['pages'][name] for s in samples]) for name, _ in FIRST_PAGES}}
+            for mode, samples in runs.items()
+        }
+        results['aquecido']['stages_p50_ms'] = {
+            name: _ms([s['stages'][name] for s in runs['aquecido']]) for name, _ in STAGES
+        }
+
+        self.stdout.write(f'\n{"primeira requisição":<22}{"frio ms":>10}{"aquecido ms":>13}')
+        for name, _ in FIRST_PAGES:
+            self.stdout.write(
+                f'{name:<22}{results["frio"]["pages_p50_ms"][name]:>10}'
+                f'{results["aquecido"]["pages_p50_ms"][name]:>13}'
+            )
+        self.stdout.write('\nEtapas do aquecimento (p50): ' + ', '.join(
+            f'{name}={ms}ms' for name, ms in results['aquecido']['stages_p50_ms'].items()
+        ))
+
+        if options['output']:
+            path = save_results(options['output'], {
+                'meta': {
+                    'created_at': timezone.now().isoformat(),
+                    'runs': options['runs'],
+                    'scale': options['scale'],
+                },
+                'results': results,
+            })
+            self.stdout.write(f'Resultados gravados em {path}')
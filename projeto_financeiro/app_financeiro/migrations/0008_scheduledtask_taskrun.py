@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0007_alter_client_options_alter_job_value'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Tarefa')),
+                ('locked_by', models.CharField(blank=True, max_length=255, verbose_name='Travada por')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Travada até')),
+                ('last_run_at', models.DateTimeField(blank=True, null=True, verbose_name='Última execução')),
+                ('last_success_at', models.DateTimeField(blank=True, null=True, verbose_name='Último sucesso')),
+            ],
+            options={
+                'verbose_name': 'Tarefa agendada',
+                'verbose_name_plural': 'Tarefas agendadas',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_name', models.CharField(max_length=100, verbose_name='Tarefa')),
+                ('owner', models.CharField(blank=True, max_length=255, verbose_name='Executada por')),
+                ('started_at', models.DateTimeField(verbose_name='Início')),
+                ('duration_ms', models.PositiveIntegerField(default=0, verbose_name='Duração (ms)')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Linhas afetadas')),
+                ('success', models.BooleanField(default=True, verbose_name='Sucesso')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+            ],
+            options={
+                'verbose_name': 'Execução de tarefa',
+                'verbose_name_plural': 'Execuções de tarefas',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['task_name', '-started_at'], name='app_finance_task_na_de0542_idx')],
+            },
+        ),
+    ]
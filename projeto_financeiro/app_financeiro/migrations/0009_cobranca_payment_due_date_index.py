@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0008_scheduledtask_taskrun'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cobranca',
+            index=models.Index(fields=['payment_date', 'due_date'], name='app_finance_payment_a9e2b5_idx'),
+        ),
+    ]
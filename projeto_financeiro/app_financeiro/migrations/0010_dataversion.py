@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0009_cobranca_payment_due_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Modelo')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versão')),
+                ('updated_at', models.DateTimeField(verbose_name='Alterado em')),
+            ],
+            options={
+                'verbose_name': 'Versão de dados',
+                'verbose_name_plural': 'Versões de dados',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0010_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cobranca',
+            index=models.Index(fields=['payment_date', 'client', 'due_date', 'value'], name='app_finance_payment_7afd3e_idx'),
+        ),
+    ]
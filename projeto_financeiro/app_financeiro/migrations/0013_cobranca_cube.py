@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0011_cobranca_aging_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CobrancaCube',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Mês de emissão')),
+                ('client_type', models.CharField(max_length=4, verbose_name='Tipo do cliente')),
+                ('job_status', models.CharField(blank=True, max_length=20, verbose_name='Status do job')),
+                ('status', models.CharField(max_length=10, verbose_name='Status')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Valor')),
+                ('count', models.PositiveIntegerField(verbose_name='Quantidade')),
+            ],
+            options={
+                'verbose_name': 'Célula do cubo de cobranças',
+                'verbose_name_plural': 'Cubo de cobranças',
+            },
+        ),
+        migrations.CreateModel(
+            name='CubeDirtyClient',
+            fields=[
+                ('client_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Cliente pendente no cubo',
+                'verbose_name_plural': 'Clientes pendentes no cubo',
+            },
+        ),
+        migrations.CreateModel(
+            name='CubeState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('watermark', models.DateTimeField(blank=True, null=True, verbose_name='Alterações processadas até')),
+                ('refreshed_on', models.DateField(blank=True, null=True, verbose_name='Status calculado em')),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True, verbose_name='Última atualização')),
+            ],
+            options={
+                'verbose_name': 'Estado do cubo',
+                'verbose_name_plural': 'Estado do cubo',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='cobranca',
+            index=models.Index(fields=['updated_at'], name='app_finance_updated_a494e0_idx'),
+        ),
+        migrations.AddField(
+            model_name='cobrancacube',
+            name='client',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app_financeiro.client', verbose_name='Cliente'),
+        ),
+        migrations.AddConstraint(
+            model_name='cobrancacube',
+            constraint=models.UniqueConstraint(fields=('client', 'month', 'client_type', 'job_status', 'status'), name='cobrancacube_unique_cell'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F
+
+
+def materialize_balances(apps, schema_editor):
+    """Saldo das cobranças existentes e um pagamento para cada cobrança paga"""
+    Cobranca = apps.get_model('app_financeiro', 'Cobranca')
+    Pagamento = apps.get_model('app_financeiro', 'Pagamento')
+    db = schema_editor.connection.alias
+    Cobranca.objects.using(db).filter(status='paga').update(paid_value=F('value'), balance=Decimal('0.00'))
+    Cobranca.objects.using(db).exclude(status='paga').update(balance=F('value'))
+
+    quote = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(Pagamento._meta.db_table)} (cobranca_id, value, payment_date, notes, created_at) "
+            f"SELECT id, value, COALESCE(payment_date, due_date), %s, updated_at "
+            f"FROM {quote(Cobranca._meta.db_table)} WHERE status = %s",
+            ['Pagamento integral (anterior ao livro de pagamentos)', 'paga'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0014_auditlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pagamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor')),
+                ('payment_date', models.DateField(default=django.utils.timezone.localdate, verbose_name='Data do pagamento')),
+                ('notes', models.CharField(blank=True, max_length=255, verbose_name='Observações')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Pagamento',
+                'verbose_name_plural': 'Pagamentos',
+                'ordering': ['-payment_date', '-id'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='cobranca',
+            name='app_finance_payment_7afd3e_idx',
+        ),
+        migrations.AddField(
+            model_name='cobranca',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10, verbose_name='Saldo em aberto'),
+        ),
+        migrations.AddField(
+            model_name='cobranca',
+            name='paid_value',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10, verbose_name='Valor pago'),
+        ),
+        migrations.AddField(
+            model_name='pagamento',
+            name='cobranca',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pagamentos', to='app_financeiro.cobranca', verbose_name='Cobrança'),
+        ),
+        migrations.RunPython(materialize_balances, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cobranca',
+            index=models.Index(fields=['payment_date', 'client', 'due_date', 'balance'], name='app_finance_payment_d6aa65_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0015_pagamento'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cobranca',
+            name='number',
+            field=models.CharField(blank=True, help_text='Em branco: numeração automática (ano-sequencial).', max_length=30, unique=True, verbose_name='Número'),
+        ),
+        migrations.CreateModel(
+            name='NumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(blank=True, max_length=10, verbose_name='Prefixo')),
+                ('year', models.PositiveIntegerField(verbose_name='Ano')),
+                ('next_value', models.PositiveBigIntegerField(default=1, verbose_name='Próximo número')),
+            ],
+            options={
+                'verbose_name': 'Sequência de numeração',
+                'verbose_name_plural': 'Sequências de numeração',
+                'constraints': [models.UniqueConstraint(fields=('prefix', 'year'), name='numbersequence_unique_prefix_year')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:34
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0016_number_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cobranca',
+            name='period',
+            field=models.DateField(blank=True, null=True, verbose_name='Competência'),
+        ),
+        migrations.CreateModel(
+            name='Recurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor')),
+                ('day_of_month', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(31)], verbose_name='Dia do vencimento')),
+                ('start_date', models.DateField(default=django.utils.timezone.localdate, verbose_name='Início')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Término')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Ativa')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='Descrição')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criada em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizada em')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recurrences', to='app_financeiro.client', verbose_name='Cliente')),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='recurrences', to='app_financeiro.job', verbose_name='Job (opcional)')),
+            ],
+            options={
+                'verbose_name': 'Recorrência',
+                'verbose_name_plural': 'Recorrências',
+                'ordering': ['client__name', 'day_of_month'],
+            },
+        ),
+        migrations.AddField(
+            model_name='cobranca',
+            name='recurrence',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cobrancas', to='app_financeiro.recurrence', verbose_name='Recorrência'),
+        ),
+        migrations.AddConstraint(
+            model_name='cobranca',
+            constraint=models.UniqueConstraint(fields=('recurrence', 'period'), name='cobranca_unique_recurrence_period'),
+        ),
+    ]
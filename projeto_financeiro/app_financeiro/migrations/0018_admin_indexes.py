@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:40
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0017_recurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(django.db.models.functions.comparison.Collate('name', 'NOCASE'), name='client_name_nocase_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cobranca',
+            index=models.Index(fields=['due_date'], name='app_finance_due_dat_078ad9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(django.db.models.functions.comparison.Collate('title', 'NOCASE'), name='job_title_nocase_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['created_at'], name='app_finance_created_e39d1a_idx'),
+        ),
+    ]
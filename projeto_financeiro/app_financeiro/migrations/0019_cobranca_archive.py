@@ -0,0 +1,98 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Colunas comuns às duas tabelas, na ordem de CobrancaHistory
+HISTORY_COLUMNS = (
+    'id, number, client_id, job_id, value, issue_date, due_date, payment_date, '
+    'paid_value, balance, status, notes, created_at'
+)
+
+CREATE_HISTORY_VIEW = f"""
+CREATE VIEW app_financeiro_cobrancahistory AS
+SELECT {HISTORY_COLUMNS}, 0 AS archived FROM app_financeiro_cobranca
+UNION ALL
+SELECT {HISTORY_COLUMNS}, 1 AS archived FROM app_financeiro_archivedcobranca
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0018_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CobrancaHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(max_length=30, verbose_name='Número')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor')),
+                ('issue_date', models.DateField(verbose_name='Data de emissão')),
+                ('due_date', models.DateField(verbose_name='Data de vencimento')),
+                ('payment_date', models.DateField(null=True, verbose_name='Data de pagamento')),
+                ('paid_value', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor pago')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Saldo em aberto')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('vencida', 'Vencida'), ('paga', 'Paga')], max_length=10, verbose_name='Status')),
+                ('notes', models.TextField(verbose_name='Observações')),
+                ('created_at', models.DateTimeField()),
+                ('archived', models.BooleanField(verbose_name='Arquivada')),
+            ],
+            options={
+                'db_table': 'app_financeiro_cobrancahistory',
+                'ordering': ['-issue_date', '-id'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedCobranca',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('number', models.CharField(max_length=30, unique=True, verbose_name='Número')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor')),
+                ('issue_date', models.DateField(verbose_name='Data de emissão')),
+                ('due_date', models.DateField(verbose_name='Data de vencimento')),
+                ('payment_date', models.DateField(blank=True, null=True, verbose_name='Data de pagamento')),
+                ('paid_value', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor pago')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Saldo em aberto')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('vencida', 'Vencida'), ('paga', 'Paga')], max_length=10, verbose_name='Status')),
+                ('last_reminder', models.DateField(blank=True, null=True, verbose_name='Último lembrete')),
+                ('notes', models.TextField(blank=True, verbose_name='Observações')),
+                ('period', models.DateField(blank=True, null=True, verbose_name='Competência')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(verbose_name='Arquivada em')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_cobrancas', to='app_financeiro.client', verbose_name='Cliente')),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_cobrancas', to='app_financeiro.job', verbose_name='Job')),
+                ('recurrence', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_cobrancas', to='app_financeiro.recurrence', verbose_name='Recorrência')),
+            ],
+            options={
+                'verbose_name': 'Cobrança arquivada',
+                'verbose_name_plural': 'Cobranças arquivadas',
+                'ordering': ['-issue_date', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPagamento',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('value', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor')),
+                ('payment_date', models.DateField(verbose_name='Data do pagamento')),
+                ('notes', models.CharField(blank=True, max_length=255, verbose_name='Observações')),
+                ('created_at', models.DateTimeField()),
+                ('cobranca', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pagamentos', to='app_financeiro.archivedcobranca', verbose_name='Cobrança')),
+            ],
+            options={
+                'verbose_name': 'Pagamento arquivado',
+                'verbose_name_plural': 'Pagamentos arquivados',
+                'ordering': ['-payment_date', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedcobranca',
+            index=models.Index(fields=['payment_date'], name='app_finance_payment_8b4f48_idx'),
+        ),
+        migrations.RunSQL(CREATE_HISTORY_VIEW, 'DROP VIEW app_financeiro_cobrancahistory'),
+    ]
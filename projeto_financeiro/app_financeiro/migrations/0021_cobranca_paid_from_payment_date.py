@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:10
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import F
+
+
+def paid_from_payment_date(apps, schema_editor):
+    """Toda cobrança com data de pagamento fica quitada (daqui em diante, é a data que diz se está paga)"""
+    Cobranca = apps.get_model('app_financeiro', 'Cobranca')
+    Pagamento = apps.get_model('app_financeiro', 'Pagamento')
+    db = schema_editor.connection.alias
+    # Mesma data do pagamento criado pela 0015 para as pagas sem data
+    Cobranca.objects.using(db).filter(status='paga', payment_date__isnull=True).update(payment_date=F('due_date'))
+
+    # Pagas sem pagamento no livro (status "paga" ou só a data preenchida): o
+    # restante entra como um pagamento, para valor pago e saldo fecharem
+    quote = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(Pagamento._meta.db_table)} (cobranca_id, value, payment_date, notes, created_at) "
+            f"SELECT id, value - paid_value, payment_date, %s, updated_at "
+            f"FROM {quote(Cobranca._meta.db_table)} WHERE payment_date IS NOT NULL AND paid_value < value",
+            ['Quitação (anterior ao livro de pagamentos)'],
+        )
+    Cobranca.objects.using(db).filter(payment_date__isnull=False).update(
+        status='paga', paid_value=F('value'), balance=Decimal('0.00'),
+    )
+    # "vencida" não é mais gravada: sai do vencimento na consulta
+    Cobranca.objects.using(db).filter(status='vencida').update(status='pendente')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_financeiro', '0020_background_task'),
+    ]
+
+    operations = [
+        # Sem volta: os pagamentos de quitação são pagamentos de verdade no
+        # livro e o código anterior lê as cobranças quitadas como pagas
+        migrations.RunPython(paid_from_payment_date, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,17 @@
-from django.db import models
+import time
+from functools import partial
+
+from asgiref.local import Local
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Case, CharField, DateField, F, Q, Value, When
+from django.db.models.functions import Collate, Round
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.core.serializers.json import DjangoJSONEncoder
 from decimal import Decimal
 from django.utils import timezone
 
@@ -76,6 +87,10 @@ class Client(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Autocomplete do admin: LIKE 'termo%' (sem diferenciar maiúsculas)
+            models.Index(Collate('name', 'NOCASE'), name='client_name_nocase_idx'),
+        ]
 
 
 class Job(models.Model):
@@ -108,11 +123,144 @@ class Job(models.Model):
 
     class Meta:
         ordering = ["-start_date", "title"]
+        indexes = [
+            # Autocomplete do admin: LIKE 'termo%' (sem diferenciar maiúsculas)
+            models.Index(Collate("title", "NOCASE"), name="job_title_nocase_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class Recurrence(models.Model):
+    """Cobrança recorrente mensal de um cliente (opcionalmente de um job).
+
+    ``recurrence.generate`` cria uma cobrança por mês (``period``), emitida
+    no dia 1 e com vencimento em ``day_of_month`` (ou no último dia do mês).
+    """
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.PROTECT,
+        related_name="recurrences",
+        verbose_name="Cliente",
+    )
+    job = models.ForeignKey(
+        Job,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="recurrences",
+        verbose_name="Job (opcional)",
+    )
+    value = models.DecimalField("Valor", max_digits=10, decimal_places=2)
+    day_of_month = models.PositiveSmallIntegerField(
+        "Dia do vencimento",
+        validators=[MinValueValidator(1), MaxValueValidator(31)],
+    )
+    start_date = models.DateField("Início", default=timezone.localdate)
+    end_date = models.DateField("Término", null=True, blank=True)
+    is_active = models.BooleanField("Ativa", default=True)
+    description = models.CharField("Descrição", max_length=255, blank=True)
+    created_at = models.DateTimeField("Criada em", auto_now_add=True)
+    updated_at = models.DateTimeField("Atualizada em", auto_now=True)
+
+    class Meta:
+        ordering = ["client__name", "day_of_month"]
+        verbose_name = "Recorrência"
+        verbose_name_plural = "Recorrências"
+
+    def __str__(self):
+        return f"{self.client} - R$ {self.value} todo dia {self.day_of_month}"
+
+    def clean(self):
+        if self.job_id and self.client_id and self.job.client_id != self.client_id:
+            raise ValidationError({"job": "O job deve ser do mesmo cliente."})
+        if self.end_date and self.start_date and self.end_date < self.start_date:
+            raise ValidationError({"end_date": "O término deve ser depois do início."})
+
+
+# Em aberto: a cobrança é paga quando tem data de pagamento (ver Cobranca.save)
+OPEN_Q = Q(payment_date__isnull=True)
+
+
+def cobranca_status_q(status, today):
+    """Filtro pelo status efetivo na data ``today``.
+
+    Usa apenas ``payment_date`` e ``due_date`` diretamente (sem a anotação),
+    para aproveitar o índice (payment_date, due_date).
+    """
+    if status == "paga":
+        return Q(payment_date__isnull=False)
+    if status == "vencida":
+        return OPEN_Q & Q(due_date__lt=today)
+    if status == "pendente":
+        return OPEN_Q & Q(due_date__gte=today)
+    raise ValueError(f"Status inválido: {status}")
+
+
+def effective_status_case(today):
+    """Expressão com o status efetivo ("paga", "vencida" ou "pendente") em ``today``"""
+    return Case(
+        When(payment_date__isnull=False, then=Value("paga")),
+        When(due_date__lt=today, then=Value("vencida")),
+        default=Value("pendente"),
+        output_field=CharField(),
+    )
+
+
+class CobrancaQuerySet(models.QuerySet):
+    def with_status(self, today=None):
+        """Anota o status efetivo e a distância (em dias) até o vencimento.
+
+        ``effective_status`` é calculado na consulta a partir de ``today``,
+        então não depende da última atualização em lote de ``status``.
+        ``due_delta`` é ``today - due_date`` (positivo = em atraso).
+        """
+        if today is None:
+            today = timezone.localdate()
+        return self.annotate(
+            effective_status=effective_status_case(today),
+            due_delta=Value(today, output_field=DateField()) - F("due_date"),
+        )
+
+    def with_effective_status(self, status, today=None):
+        """Filtra pelo status efetivo ("pendente", "vencida" ou "paga")"""
+        if today is None:
+            today = timezone.localdate()
+        return self.filter(cobranca_status_q(status, today))
+
+    def apply_payment(self, value, payment_date=None, today=None):
+        """Soma ``value`` ao valor pago num único UPDATE (negativo = estorno).
+
+        Saldo, status e data de pagamento são recalculados pelo banco a partir
+        da linha atual, sem ler a cobrança antes: pagamentos simultâneos não
+        se sobrescrevem.
+        """
+        if today is None:
+            today = timezone.localdate()
+        quitada = Q(balance__lte=value)
+        if value > 0:
+            # Já marcada como paga fora do livro de pagamentos: continua paga
+            quitada |= Q(payment_date__isnull=False)
+        return self.update(
+            paid_value=Round(F("paid_value") + value, 2),
+            balance=Case(
+                When(quitada, then=Value(Decimal("0.00"))),
+                default=Round(F("value") - F("paid_value") - value, 2),
+            ),
+            status=Case(
+                When(quitada, then=Value("paga")),
+                default=Value("pendente"),
+            ),
+            payment_date=Case(
+                When(quitada, then=Value(payment_date or today)),
+                default=Value(None),
+                output_field=DateField(),
+            ),
+            updated_at=timezone.now(),
+        )
+
+
 class Cobranca(models.Model):
     STATUS_CHOICES = [
         ("pendente", "Pendente"),
@@ -120,7 +268,13 @@ class Cobranca(models.Model):
         ("paga", "Paga"),
     ]
 
-    number = models.CharField("Número", max_length=30, unique=True)
+    number = models.CharField(
+        "Número",
+        max_length=30,
+        unique=True,
+        blank=True,
+        help_text="Em branco: numeração automática (ano-sequencial).",
+    )
     client = models.ForeignKey(
         Client,
         on_delete=models.PROTECT,
@@ -139,6 +293,9 @@ class Cobranca(models.Model):
     issue_date = models.DateField("Data de emissão")
     due_date = models.DateField("Data de vencimento")
     payment_date = models.DateField("Data de pagamento", null=True, blank=True)
+    # Materializados a cada pagamento (Pagamento.save): leituras não somam pagamentos
+    paid_value = models.DecimalField("Valor pago", max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    balance = models.DecimalField("Saldo em aberto", max_digits=10, decimal_places=2, default=Decimal("0.00"))
     status = models.CharField(
         "Status",
         max_length=10,
@@ -151,52 +308,368 @@ class Cobranca(models.Model):
         blank=True,
     )
     notes = models.TextField("Observações", blank=True)
+    recurrence = models.ForeignKey(
+        Recurrence,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="cobrancas",
+        verbose_name="Recorrência",
+    )
+    period = models.DateField("Competência", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CobrancaQuerySet.as_manager()
+
     class Meta:
         ordering = ["-issue_date", "-id"]
         verbose_name = "Cobrança"
         verbose_name_plural = "Cobranças"
+        indexes = [
+            # Filtros pelo status efetivo (cobranca_status_q)
+            models.Index(fields=["payment_date", "due_date"]),
+            # Cobre o aging por cliente (reports.aging_by_client, payment_date nulo)
+            # e o histórico de atrasos da previsão (forecast.delay_histograms)
+            models.Index(fields=["payment_date", "client", "due_date", "balance"]),
+            # Alterações desde a marca d'água do cubo (cube.refresh_cube)
+            models.Index(fields=["updated_at"]),
+            # Listagem do admin (ordenada por -due_date) sem ordenar a tabela toda
+            models.Index(fields=["due_date"]),
+        ]
+        constraints = [
+            # Uma cobrança por recorrência e mês: a geração pode ser repetida
+            models.UniqueConstraint(fields=["recurrence", "period"], name="cobranca_unique_recurrence_period"),
+        ]
 
     def __str__(self):
         return f"{self.number} - {self.client.name}"
 
+    def clean(self):
+        if self.value is not None and self.paid_value and self.value < self.paid_value:
+            raise ValidationError({"value": f"O valor não pode ser menor que o já pago (R$ {self.paid_value})."})
+
+    def validate_unique(self, exclude=None):
+        super().validate_unique(exclude)
+        # O número é único também entre as arquivadas (restore as devolve à tabela)
+        if self.number and "number" not in (exclude or ()) and self._number_archived():
+            raise ValidationError({"number": "Já existe uma cobrança arquivada com este número."})
+
+    def _number_archived(self):
+        return ArchivedCobranca.objects.filter(number=self.number).exclude(pk=self.pk).exists()
+
+    # Paga ao ser lida (from_db): editar uma cobrança já paga não a quita de novo
+    _loaded_paid = False
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_paid = instance.__dict__.get("payment_date") is not None
+        return instance
+
+    def _refresh_ledger(self, using):
+        """Relê (com a linha travada) valor pago e data de pagamento.
+
+        São campos do livro de pagamentos (``apply_payment``): uma edição da
+        cobrança lida antes de um pagamento não pode sobrescrevê-los. Retorna
+        se a cobrança já está paga no banco.
+        """
+        if self._state.adding or self.pk is None:
+            return False
+        current = (
+            Cobranca.objects.using(using).select_for_update()
+            .filter(pk=self.pk).values("paid_value", "payment_date").first()
+        )
+        if current is None:
+            return False
+        self.paid_value = current["paid_value"]
+        if current["payment_date"] is None:
+            return False
+        if not self.payment_date:
+            self.payment_date = current["payment_date"]
+        return True
+
     def save(self, *args, **kwargs):
-        # Atualiza status automaticamente baseado na data
-        if self.status != 'paga' and self.due_date:
-            today = timezone.localdate()
-            # Converte due_date para date se for string
-            if isinstance(self.due_date, str):
-                from datetime import datetime
-                self.due_date = datetime.strptime(self.due_date, '%Y-%m-%d').date()
-            
-            if self.due_date < today:
-                self.status = 'vencida'
+        # Paga = tem data de pagamento; "vencida" não é gravada, sai da consulta
+        # (effective_status_case). ``status`` só espelha a data de pagamento.
+        using = kwargs.get("using") or router.db_for_write(Cobranca, instance=self)
+        with transaction.atomic(using=using):
+            was_paid = self._refresh_ledger(using)
+            if self.value < self.paid_value:
+                raise ValidationError({"value": f"O valor não pode ser menor que o já pago (R$ {self.paid_value})."})
+
+            quitacao = Decimal("0.00")
+            payment_date = self.payment_date
+            if was_paid:
+                if self.value > self.paid_value:
+                    # Valor aumentado depois de quitada: volta a ficar em aberto pela diferença
+                    self.payment_date = None
+            elif self.paid_value >= self.value or (
+                not self._loaded_paid and (self.payment_date or self.status == 'paga')
+            ):
+                # Passa a ser paga: o saldo em aberto entra no livro como um
+                # Pagamento, que grava valor pago, saldo e data (apply_payment)
+                payment_date = self.payment_date or timezone.localdate()
+                quitacao = self.value - self.paid_value
+                self.payment_date = None if quitacao else payment_date
             else:
-                self.status = 'pendente'
-        super().save(*args, **kwargs)
+                # Pagamento estornado depois que a cobrança foi lida
+                self.payment_date = None
+
+            self.status = 'paga' if self.payment_date else 'pendente'
+            self.balance = Decimal("0.00") if self.payment_date else self.value - self.paid_value
+            if self.number:
+                if self._state.adding and self._number_archived():
+                    raise IntegrityError(f"Número {self.number} já usado por uma cobrança arquivada")
+                super().save(*args, **kwargs)
+            else:
+                self._save_with_next_number(*args, **kwargs)
+            if quitacao:
+                Pagamento.objects.using(using).create(
+                    cobranca=self, value=quitacao, payment_date=payment_date, notes="Quitação",
+                )
+                self.paid_value, self.balance = self.value, Decimal("0.00")
+                self.status, self.payment_date = 'paga', payment_date
+            self._loaded_paid = self.payment_date is not None
+
+    def _save_with_next_number(self, *args, **kwargs):
+        """Numera pela sequência do ano de emissão (ver numbering.py)"""
+        from .numbering import discard, next_number
+
+        year = self.issue_date.year if hasattr(self.issue_date, "year") else None
+        for attempt in range(3):
+            self.number = next_number(year=year)
+            if self._number_archived():
+                # Digitado à mão antes de a sequência existir e já arquivado
+                discard(year=year)
+                continue
+            try:
+                with transaction.atomic(using=kwargs.get("using")):
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # Número já usado (digitado à mão ou bloco desfeito): nova reserva
+                if not Cobranca.objects.filter(number=self.number).exists() or attempt == 2:
+                    self.number = ""
+                    raise
+                discard(year=year)
+        self.number = ""
+        raise IntegrityError("Não foi possível numerar a cobrança")
+
+    @property
+    def current_status(self):
+        """Status efetivo (usa a anotação de ``with_status`` quando presente)"""
+        if "effective_status" in self.__dict__:
+            return self.effective_status
+        if self.payment_date:
+            return "paga"
+        if self.due_date and self.due_date < timezone.localdate():
+            return "vencida"
+        return "pendente"
+
+    def get_current_status_display(self):
+        return dict(self.STATUS_CHOICES).get(self.current_status, self.current_status)
+
+    def _days_past_due(self):
+        """Dias desde o vencimento (negativo = ainda não venceu)"""
+        if self.__dict__.get("due_delta") is not None:
+            return self.due_delta.days
+        return (timezone.localdate() - self.due_date).days
 
     @property
     def is_overdue(self):
-        if self.status == "paga" or not self.due_date:
+        if not self.due_date:
             return False
-        today = timezone.localdate()
-        return today > self.due_date
+        return self.current_status == "vencida"
 
     @property
     def days_overdue(self):
         if not self.is_overdue:
             return 0
-        today = timezone.localdate()
-        return (today - self.due_date).days
+        return self._days_past_due()
 
     @property
     def days_to_due(self):
-        if self.status == "paga" or not self.due_date or self.is_overdue:
+        if self.current_status == "paga" or not self.due_date or self.is_overdue:
             return 0
-        today = timezone.localdate()
-        return (self.due_date - today).days
+        return -self._days_past_due()
+
+
+class Pagamento(models.Model):
+    """Pagamento (parcial ou total) de uma cobrança.
+
+    A inclusão atualiza valor pago, saldo e status da cobrança na mesma
+    transação (``CobrancaQuerySet.apply_payment``); a exclusão estorna
+    (signal ``pagamento_deleted``). Pagamentos não são alterados.
+    """
+    cobranca = models.ForeignKey(
+        Cobranca,
+        on_delete=models.PROTECT,
+        related_name="pagamentos",
+        verbose_name="Cobrança",
+    )
+    value = models.DecimalField("Valor", max_digits=10, decimal_places=2)
+    payment_date = models.DateField("Data do pagamento", default=timezone.localdate)
+    notes = models.CharField("Observações", max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-payment_date", "-id"]
+        verbose_name = "Pagamento"
+        verbose_name_plural = "Pagamentos"
+
+    def __str__(self):
+        return f"R$ {self.value} em {self.payment_date:%d/%m/%Y}"
+
+    def clean(self):
+        if self.value is not None and self.value <= 0:
+            raise ValidationError({"value": "O valor do pagamento deve ser positivo."})
+        if self.value is not None and self.cobranca_id and self.pk is None:
+            balance = Cobranca.objects.filter(pk=self.cobranca_id).values_list("balance", flat=True).first()
+            if balance is not None and self.value > balance:
+                raise ValidationError({"value": f"O valor excede o saldo em aberto (R$ {balance})."})
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError("Pagamentos não podem ser alterados; exclua e registre novamente.")
+        using = kwargs.get("using") or router.db_for_write(Pagamento, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            Cobranca.objects.using(using).filter(pk=self.cobranca_id).apply_payment(
+                self.value, self.payment_date
+            )
+            DataVersion.changed(Cobranca)
+
+
+class ArchivedCobranca(models.Model):
+    """Cobrança paga antiga movida da tabela principal (ver archive.py).
+
+    Mantém o ``id`` e o número originais; é somente leitura. Relatórios e
+    histórico leem ativas e arquivadas juntas por ``CobrancaHistory``.
+    """
+    # Sem sequência própria: recebe o id da cobrança original
+    id = models.BigAutoField(primary_key=True)
+    number = models.CharField("Número", max_length=30, unique=True)
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.PROTECT,
+        related_name="archived_cobrancas",
+        verbose_name="Cliente",
+    )
+    job = models.ForeignKey(
+        Job,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_cobrancas",
+        verbose_name="Job",
+    )
+    value = models.DecimalField("Valor", max_digits=10, decimal_places=2)
+    issue_date = models.DateField("Data de emissão")
+    due_date = models.DateField("Data de vencimento")
+    payment_date = models.DateField("Data de pagamento", null=True, blank=True)
+    paid_value = models.DecimalField("Valor pago", max_digits=10, decimal_places=2)
+    balance = models.DecimalField("Saldo em aberto", max_digits=10, decimal_places=2)
+    status = models.CharField("Status", max_length=10, choices=Cobranca.STATUS_CHOICES)
+    last_reminder = models.DateField("Último lembrete", null=True, blank=True)
+    notes = models.TextField("Observações", blank=True)
+    recurrence = models.ForeignKey(
+        Recurrence,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_cobrancas",
+        verbose_name="Recorrência",
+    )
+    period = models.DateField("Competência", null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField("Arquivada em")
+
+    class Meta:
+        ordering = ["-issue_date", "-id"]
+        verbose_name = "Cobrança arquivada"
+        verbose_name_plural = "Cobranças arquivadas"
+        indexes = [
+            # Histórico de atrasos da previsão (forecast.delay_histograms, via CobrancaHistory)
+            models.Index(fields=["payment_date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.number} - {self.client.name}"
+
+
+class ArchivedPagamento(models.Model):
+    """Pagamento de uma cobrança arquivada (movido junto com ela)"""
+    id = models.BigAutoField(primary_key=True)
+    cobranca = models.ForeignKey(
+        ArchivedCobranca,
+        on_delete=models.CASCADE,
+        related_name="pagamentos",
+        verbose_name="Cobrança",
+    )
+    value = models.DecimalField("Valor", max_digits=10, decimal_places=2)
+    payment_date = models.DateField("Data do pagamento")
+    notes = models.CharField("Observações", max_length=255, blank=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-payment_date", "-id"]
+        verbose_name = "Pagamento arquivado"
+        verbose_name_plural = "Pagamentos arquivados"
+
+    def __str__(self):
+        return f"R$ {self.value} em {self.payment_date:%d/%m/%Y}"
+
+
+class CobrancaHistory(models.Model):
+    """Cobranças ativas e arquivadas juntas (somente leitura).
+
+    Lê a view SQL ``app_financeiro_cobrancahistory`` (UNION ALL das duas
+    tabelas, criada na migração 0019); os filtros chegam às duas tabelas e
+    usam os índices de cada uma. Campo novo em ``Cobranca`` que os relatórios
+    precisem ler exige recriar a view numa migração.
+    """
+    number = models.CharField("Número", max_length=30)
+    client = models.ForeignKey(Client, on_delete=models.DO_NOTHING, related_name="+", verbose_name="Cliente")
+    job = models.ForeignKey(
+        Job, on_delete=models.DO_NOTHING, null=True, related_name="+", verbose_name="Job",
+    )
+    value = models.DecimalField("Valor", max_digits=10, decimal_places=2)
+    issue_date = models.DateField("Data de emissão")
+    due_date = models.DateField("Data de vencimento")
+    payment_date = models.DateField("Data de pagamento", null=True)
+    paid_value = models.DecimalField("Valor pago", max_digits=10, decimal_places=2)
+    balance = models.DecimalField("Saldo em aberto", max_digits=10, decimal_places=2)
+    status = models.CharField("Status", max_length=10, choices=Cobranca.STATUS_CHOICES)
+    notes = models.TextField("Observações")
+    created_at = models.DateTimeField()
+    archived = models.BooleanField("Arquivada")
+
+    class Meta:
+        managed = False
+        db_table = "app_financeiro_cobrancahistory"
+        ordering = ["-issue_date", "-id"]
+
+    def __str__(self):
+        return f"{self.number} - {self.client.name}"
+
+
+class NumberSequence(models.Model):
+    """Próximo número livre da numeração automática por (prefixo, ano)"""
+    prefix = models.CharField("Prefixo", max_length=10, blank=True)
+    year = models.PositiveIntegerField("Ano")
+    next_value = models.PositiveBigIntegerField("Próximo número", default=1)
+
+    class Meta:
+        verbose_name = "Sequência de numeração"
+        verbose_name_plural = "Sequências de numeração"
+        constraints = [
+            models.UniqueConstraint(fields=["prefix", "year"], name="numbersequence_unique_prefix_year"),
+        ]
+
+    def __str__(self):
+        return f"{self.prefix}{self.year}: {self.next_value}"
 
 
 class SystemConfig(models.Model):
@@ -245,12 +718,65 @@ class SystemConfig(models.Model):
     def __str__(self):
         return f"Configurações - {self.company_name}"
     
+    CACHE_VERSION_KEY = 'systemconfig:version'
+
+    # (versão, instância, momento da última verificação) compartilhado pelo processo
+    _cached = None
+
     @classmethod
     def get_config(cls):
-        """Retorna a configuração atual ou cria uma padrão"""
-        config, created = cls.objects.get_or_create(pk=1)
+        """Retorna a configuração atual ou cria uma padrão.
+
+        A instância fica em memória no processo e no cache compartilhado,
+        identificada pela versão (``updated_at``). A versão atual só é
+        conferida a cada ``SYSTEM_CONFIG_CHECK_SECONDS``: no cache
+        compartilhado ou, se o cache for o LocMem do processo (que os outros
+        workers não enxergam), no ``updated_at`` do banco. O objeto retornado
+        é compartilhado e deve ser tratado como somente leitura (para editar,
+        carregue do banco).
+        """
+        now = time.monotonic()
+        cached = cls._cached
+        if cached is not None and now - cached[2] < settings.SYSTEM_CONFIG_CHECK_SECONDS:
+            return cached[1]
+
+        version = cls.current_version()
+        if cached is not None and version == cached[0]:
+            cls._cached = (version, cached[1], now)
+            return cached[1]
+
+        config = cache.get(f'systemconfig:{version}') if version else None
+        if config is None:
+            config, created = cls.objects.get_or_create(pk=1)
+            version = cls.publish(config)
+        cls._cached = (version, config, now)
         return config
 
+    @classmethod
+    def current_version(cls):
+        """Versão atual: do cache compartilhado, ou do banco se o cache é local"""
+        if isinstance(caches['default'], LocMemCache):
+            updated_at = cls.objects.filter(pk=1).values_list('updated_at', flat=True).first()
+            return updated_at.isoformat() if updated_at else None
+        return cache.get(cls.CACHE_VERSION_KEY)
+
+    @classmethod
+    def publish(cls, config):
+        """Grava a instância no cache compartilhado e retorna a versão"""
+        version = config.updated_at.isoformat()
+        cache.set(f'systemconfig:{version}', config, None)
+        cache.set(cls.CACHE_VERSION_KEY, version, None)
+        return version
+
+    @classmethod
+    def invalidate_cache(cls, config=None):
+        """Descarta a configuração em cache (chamado ao salvar/excluir)"""
+        cls._cached = None
+        if config is not None and config.pk == 1:
+            cls.publish(config)
+        else:
+            cache.delete(cls.CACHE_VERSION_KEY)
+
 
 class Notification(models.Model):
     """Notificações do sistema"""
@@ -274,6 +800,288 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Listagem do admin e limpeza por idade (NOTIFICATION_RETENTION_DAYS)
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
-        return f"{self.title} - {self.user.username}"
\ No newline at end of file
+        return f"{self.title} - {self.user.username}"
+
+
+class ScheduledTask(models.Model):
+    """Estado de uma tarefa periódica e seu lease (trava) entre hosts"""
+    name = models.CharField("Tarefa", max_length=100, unique=True)
+    locked_by = models.CharField("Travada por", max_length=255, blank=True)
+    locked_until = models.DateTimeField("Travada até", null=True, blank=True)
+    last_run_at = models.DateTimeField("Última execução", null=True, blank=True)
+    last_success_at = models.DateTimeField("Último sucesso", null=True, blank=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Tarefa agendada"
+        verbose_name_plural = "Tarefas agendadas"
+
+    def __str__(self):
+        return self.name
+
+
+class TaskRun(models.Model):
+    """Histórico de execuções das tarefas periódicas"""
+    task_name = models.CharField("Tarefa", max_length=100)
+    owner = models.CharField("Executada por", max_length=255, blank=True)
+    started_at = models.DateTimeField("Início")
+    duration_ms = models.PositiveIntegerField("Duração (ms)", default=0)
+    rows = models.PositiveIntegerField("Linhas afetadas", default=0)
+    success = models.BooleanField("Sucesso", default=True)
+    error = models.TextField("Erro", blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = "Execução de tarefa"
+        verbose_name_plural = "Execuções de tarefas"
+        indexes = [
+            models.Index(fields=['task_name', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} - {self.started_at:%d/%m/%Y %H:%M}"
+
+
+class BackgroundTask(models.Model):
+    """Tarefa na fila de segundo plano (ver background.py e ``run_workers``)"""
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('executando', 'Executando'),
+        ('concluida', 'Concluída'),
+        ('falhou', 'Falhou'),
+    ]
+
+    name = models.CharField("Tarefa", max_length=100)
+    params = models.JSONField("Parâmetros", default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default='pendente')
+    attempts = models.PositiveSmallIntegerField("Tentativas", default=0)
+    max_attempts = models.PositiveSmallIntegerField("Máximo de tentativas", default=3)
+    run_after = models.DateTimeField("Executar a partir de", default=timezone.now)
+    locked_by = models.CharField("Travada por", max_length=255, blank=True)
+    locked_until = models.DateTimeField("Travada até", null=True, blank=True)
+    progress = models.PositiveSmallIntegerField("Progresso (%)", default=0)
+    message = models.CharField("Mensagem", max_length=255, blank=True)
+    result = models.JSONField("Resultado", null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField("Erro", blank=True)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Criada por",
+    )
+    created_at = models.DateTimeField("Criada em", auto_now_add=True)
+    started_at = models.DateTimeField("Início", null=True, blank=True)
+    finished_at = models.DateTimeField("Fim", null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = "Tarefa em segundo plano"
+        verbose_name_plural = "Tarefas em segundo plano"
+        indexes = [
+            # Próxima tarefa livre (background.claim)
+            models.Index(fields=['status', 'run_after', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    def report_progress(self, done, total=None, message=''):
+        """Grava o progresso (``done`` de ``total``, ou ``done`` em %) e renova o lease do worker"""
+        progress = int(done * 100 / total) if total else int(done)
+        self.progress = max(0, min(progress, 100))
+        self.message = message[:255]
+        fields = {'progress': self.progress, 'message': self.message}
+        lease = getattr(self, 'lease', None)  # definido por background.claim
+        if lease is not None:
+            self.locked_until = fields['locked_until'] = timezone.now() + lease
+        BackgroundTask.objects.filter(pk=self.pk, locked_by=self.locked_by).update(**fields)
+
+
+class DataVersion(models.Model):
+    """Contador de alterações por modelo (base dos ETags das páginas).
+
+    Incrementado pelos signals a cada save/delete e explicitamente após
+    operações em lote (``update``/``bulk_create``), que não disparam signals.
+    """
+    name = models.CharField("Modelo", max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField("Versão", default=0)
+    updated_at = models.DateTimeField("Alterado em")
+
+    class Meta:
+        verbose_name = "Versão de dados"
+        verbose_name_plural = "Versões de dados"
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    @staticmethod
+    def key(model):
+        return model._meta.model_name
+
+    @classmethod
+    def bump(cls, *models):
+        """Incrementa a versão dos modelos imediatamente"""
+        now = timezone.now()
+        for name in {cls.key(model) for model in models}:
+            updated = cls.objects.filter(name=name).update(version=F('version') + 1, updated_at=now)
+            if not updated:
+                _, created = cls.objects.get_or_create(
+                    name=name, defaults={'version': 1, 'updated_at': now}
+                )
+                if not created:
+                    cls.objects.filter(name=name).update(version=F('version') + 1, updated_at=now)
+
+    @classmethod
+    def changed(cls, *models):
+        """Marca os modelos como alterados.
+
+        Dentro de uma transação o incremento fica para o commit e acontece uma
+        vez por modelo (um delete em cascata não gera um UPDATE por linha): os
+        modelos se acumulam num conjunto da conexão, esvaziado pelo primeiro
+        callback a rodar no commit. Cada chamada registra o seu callback (os
+        demais não fazem nada), então um savepoint desfeito não leva embora o
+        incremento das alterações que ficaram. O modelo de uma alteração
+        desfeita pode ser incrementado no próximo commit: só invalida ETags.
+        """
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            cls.bump(*models)
+            return
+        pending = getattr(_pending_versions, connection.alias, None)
+        if pending is None:
+            pending = set()
+            setattr(_pending_versions, connection.alias, pending)
+        pending.update(models)
+        transaction.on_commit(partial(_bump_pending, connection.alias))
+
+    @classmethod
+    def current(cls, *models):
+        """``{nome: (versão, alterado em)}`` dos modelos, numa única consulta"""
+        names = [cls.key(model) for model in models]
+        rows = cls.objects.filter(name__in=names).values_list('name', 'version', 'updated_at')
+        found = {name: (version, updated_at) for name, version, updated_at in rows}
+        return {name: found.get(name, (0, None)) for name in names}
+
+
+# Modelos alterados na transação em curso, por conexão (por thread, como as conexões)
+_pending_versions = Local()
+
+
+def _bump_pending(alias):
+    models = getattr(_pending_versions, alias, None)
+    if models:
+        setattr(_pending_versions, alias, set())
+        DataVersion.bump(*models)
+
+
+class CobrancaCube(models.Model):
+    """Fato agregado das cobranças para relatórios (ver cube.py).
+
+    Uma linha por (mês de emissão, cliente, tipo do cliente, status do job,
+    status efetivo da cobrança), mantida pela tarefa ``cube_refresh``.
+    """
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Cliente",
+    )
+    month = models.DateField("Mês de emissão")
+    client_type = models.CharField("Tipo do cliente", max_length=4)
+    job_status = models.CharField("Status do job", max_length=20, blank=True)
+    status = models.CharField("Status", max_length=10)
+    value = models.DecimalField("Valor", max_digits=14, decimal_places=2)
+    count = models.PositiveIntegerField("Quantidade")
+
+    class Meta:
+        verbose_name = "Célula do cubo de cobranças"
+        verbose_name_plural = "Cubo de cobranças"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["client", "month", "client_type", "job_status", "status"],
+                name="cobrancacube_unique_cell",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%m/%Y} - {self.client_id} - {self.status}"
+
+
+class CubeDirtyClient(models.Model):
+    """Cliente com linhas do cubo a recalcular por alterações sem ``updated_at``
+    (exclusões de cobranças e jobs)"""
+    client_id = models.BigIntegerField("Cliente", primary_key=True)
+
+    class Meta:
+        verbose_name = "Cliente pendente no cubo"
+        verbose_name_plural = "Clientes pendentes no cubo"
+
+    @classmethod
+    def mark(cls, *client_ids):
+        cls.objects.bulk_create(
+            [cls(client_id=client_id) for client_id in set(client_ids) if client_id is not None],
+            ignore_conflicts=True,
+        )
+
+
+class CubeState(models.Model):
+    """Marca d'água da atualização incremental do cubo (linha única)"""
+    watermark = models.DateTimeField("Alterações processadas até", null=True, blank=True)
+    refreshed_on = models.DateField("Status calculado em", null=True, blank=True)
+    refreshed_at = models.DateTimeField("Última atualização", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Estado do cubo"
+        verbose_name_plural = "Estado do cubo"
+
+    def __str__(self):
+        return f"Cubo até {self.watermark}"
+
+
+class AuditLog(models.Model):
+    """Histórico de alterações de clientes, jobs e cobranças (somente inclusão).
+
+    Gravado em lote ao fim da requisição por ``app_financeiro.audit``; cada
+    linha guarda as diferenças por campo (``{campo: [antes, depois]}``).
+    """
+    ACTION_CHOICES = [
+        ('criado', 'Criado'),
+        ('alterado', 'Alterado'),
+        ('excluido', 'Excluído'),
+    ]
+
+    model = models.CharField("Modelo", max_length=50)
+    object_id = models.BigIntegerField("Registro")
+    action = models.CharField("Ação", max_length=10, choices=ACTION_CHOICES)
+    changes = models.JSONField("Alterações", default=dict, encoder=DjangoJSONEncoder)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Usuário",
+    )
+    created_at = models.DateTimeField("Data", default=timezone.now)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = "Registro de auditoria"
+        verbose_name_plural = "Auditoria"
+        indexes = [
+            models.Index(fields=['model', 'object_id', '-id']),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} {self.action} em {self.created_at:%d/%m/%Y %H:%M}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValidationError("Registros de auditoria não podem ser alterados.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Registros de auditoria não podem ser excluídos.")
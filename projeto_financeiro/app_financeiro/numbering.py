@@ -0,0 +1,114 @@
+"""
+Numeração automática das cobranças (``<prefixo><ano>-000123``).
+
+Cada (prefixo, ano) tem uma linha em ``NumberSequence`` com o próximo número
+livre. Um processo reserva um bloco de ``COBRANCA_NUMBER_BLOCK`` números com
+um único UPDATE (``next_value = next_value + n``) e distribui o bloco da
+memória, sem ir ao banco a cada cobrança; ``allocate(n)`` reserva de uma vez
+o que faltar para lotes grandes (importações, recorrências).
+
+Números de um bloco não usados até o fim do processo ficam sem uso: a
+sequência é única e crescente por processo, mas pode ter lacunas. Se a
+reserva for desfeita junto com a transação de quem chamou, o bloco em
+memória pode repetir números de outro processo; ``Cobranca.save`` descarta
+o bloco (``discard``) e tenta de novo quando o número já existe.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ArchivedCobranca, Cobranca, NumberSequence
+
+DIGITS = 6
+
+_blocks = {}
+_blocks_pid = None
+_lock = threading.Lock()
+
+
+def format_number(prefix, year, value):
+    return f'{prefix}{year}-{value:0{DIGITS}d}'
+
+
+def _first_free(prefix, year):
+    """Próximo número depois dos já usados no formato (digitados à mão, importados ou arquivados)"""
+    start = f'{prefix}{year}-'
+    numbers = Cobranca.objects.filter(number__startswith=start).order_by().values_list('number', flat=True).union(
+        ArchivedCobranca.objects.filter(number__startswith=start).order_by().values_list('number', flat=True),
+        all=True,
+    )
+    used = [int(n[len(start):]) for n in numbers if n[len(start):].isdigit()]
+    return max(used, default=0) + 1
+
+
+def reserve(count, prefix, year):
+    """Reserva ``count`` números no banco; retorna o primeiro"""
+    with transaction.atomic():
+        updated = NumberSequence.objects.filter(prefix=prefix, year=year).update(
+            next_value=F('next_value') + count
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    NumberSequence.objects.create(
+                        prefix=prefix, year=year, next_value=_first_free(prefix, year) + count,
+                    )
+            except IntegrityError:
+                # Outro processo criou a sequência ao mesmo tempo
+                NumberSequence.objects.filter(prefix=prefix, year=year).update(
+                    next_value=F('next_value') + count
+                )
+        next_value = NumberSequence.objects.filter(prefix=prefix, year=year).values_list(
+            'next_value', flat=True
+        ).get()
+    return next_value - count
+
+
+def _local_blocks():
+    global _blocks_pid
+    # Depois de um fork o bloco do processo pai não pode ser reaproveitado
+    if _blocks_pid != os.getpid():
+        _blocks.clear()
+        _blocks_pid = os.getpid()
+    return _blocks
+
+
+def allocate(count, prefix=None, year=None):
+    """``count`` números novos, em ordem (no máximo uma ida ao banco)"""
+    if prefix is None:
+        prefix = settings.COBRANCA_NUMBER_PREFIX
+    if year is None:
+        year = timezone.localdate().year
+    with _lock:
+        blocks = _local_blocks()
+        start, end = blocks.get((prefix, year), (0, 0))
+        values = list(range(start, min(end, start + count)))
+        missing = count - len(values)
+        start += len(values)
+        if missing:
+            block = max(settings.COBRANCA_NUMBER_BLOCK, 1)
+            first = reserve(missing + block, prefix, year)
+            values.extend(range(first, first + missing))
+            start, end = first + missing, first + missing + block
+        blocks[(prefix, year)] = (start, end)
+    return [format_number(prefix, year, value) for value in values]
+
+
+def discard(prefix=None, year=None):
+    """Esquece o bloco em memória: o próximo número vem de uma nova reserva"""
+    if prefix is None:
+        prefix = settings.COBRANCA_NUMBER_PREFIX
+    if year is None:
+        year = timezone.localdate().year
+    with _lock:
+        _local_blocks().pop((prefix, year), None)
+
+
+def next_number(prefix=None, year=None):
+    """Um número novo (do bloco do processo)"""
+    return allocate(1, prefix, year)[0]
@@ -0,0 +1,176 @@
+"""
+Captura de perfil (cProfile) sob demanda, apenas para usuários staff.
+
+Ative com ``?_profile=1`` na URL ou com o cabeçalho ``X-Profile: 1``. A view
+roda sob o cProfile e o resultado (estatísticas do pstats e um resumo em
+JSON com os tempos acumulados por função e o SQL executado) vai para
+``PROFILE_DIR``, que guarda no máximo ``PROFILE_MAX_ENTRIES`` capturas.
+Sem o gatilho, o middleware não faz nada além de duas consultas a dicionários.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+TOP_FUNCTIONS = 60
+
+_name_re = re.compile(r'^[\w.-]+$')
+
+
+def profile_dir():
+    return Path(settings.PROFILE_DIR)
+
+
+def list_profiles():
+    """Resumos das capturas guardadas, mais recentes primeiro"""
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    entries = []
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        try:
+            summary = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        summary['name'] = path.stem
+        entries.append(summary)
+    return entries
+
+
+def profile_file(name, extension):
+    """Caminho de uma captura, validando o nome (evita path traversal)"""
+    if not _name_re.match(name) or extension not in ('prof', 'json'):
+        return None
+    path = profile_dir() / f'{name}.{extension}'
+    return path if path.exists() else None
+
+
+def _prune(directory, keep):
+    names = sorted({p.stem for p in directory.glob('*.json')})
+    for name in names[:-keep] if keep else names:
+        for extension in ('json', 'prof'):
+            try:
+                (directory / f'{name}.{extension}').unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _top_functions(profiler):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    rows = []
+    for func in stats.fcn_list[:TOP_FUNCTIONS]:
+        primitive_calls, total_calls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            'function': f'{filename}:{line}({name})',
+            'calls': total_calls,
+            'primitive_calls': primitive_calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        })
+    return rows
+
+
+def save_profile(request, profiler, queries, duration, status_code):
+    """Grava a captura no diretório de perfis e retorna o nome dela"""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    match = request.resolver_match
+    view = match.view_name if match else 'unresolved'
+    slug = re.sub(r'[^\w-]', '_', view)
+    name = f'{time.time_ns()}-{os.getpid()}-{slug}'
+
+    profiler.dump_stats(directory / f'{name}.prof')
+    summary = {
+        'created_at': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'view': view,
+        'user': request.user.get_username(),
+        'status_code': status_code,
+        'duration_ms': round(duration * 1000, 2),
+        'query_count': len(queries),
+        'query_time_ms': round(sum(q['time_ms'] for q in queries), 2),
+        'functions': _top_functions(profiler),
+        'queries': queries,
+    }
+    (directory / f'{name}.json').write_text(json.dumps(summary, indent=2, ensure_ascii=False))
+
+    _prune(directory, settings.PROFILE_MAX_ENTRIES)
+    return name
+
+
+class ProfilingMiddleware:
+    """Executa a view sob o cProfile quando um staff pede (?_profile=1)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if PROFILE_PARAM not in request.GET and PROFILE_HEADER not in request.META:
+            return None
+        if not request.user.is_staff:
+            return None
+
+        requested = request.GET.get(PROFILE_PARAM) == '1' or request.META.get(PROFILE_HEADER) == '1'
+        if PROFILE_PARAM in request.GET:
+            # Remove o gatilho para a view (o admin trata parâmetros como filtros)
+            request.GET = request.GET.copy()
+            del request.GET[PROFILE_PARAM]
+        if not requested:
+            return None
+
+        if iscoroutinefunction(view_func):
+            # Views assíncronas: só o que roda nesta thread entra no perfil
+            view_func = async_to_sync(view_func)
+
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({
+                    'sql': sql,
+                    'params': repr(params),
+                    'time_ms': round((time.perf_counter() - start) * 1000, 3),
+                })
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(capture))
+            profiler.enable()
+            try:
+                response = view_func(request, *view_args, **view_kwargs)
+                # TemplateResponse (ex.: admin) renderiza fora da view
+                if hasattr(response, 'render') and callable(response.render):
+                    response = response.render()
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+
+        name = save_profile(request, profiler, queries, duration, response.status_code)
+        response['X-Profile-Id'] = name
+        return response
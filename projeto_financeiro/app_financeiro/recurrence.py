@@ -0,0 +1,144 @@
+"""
+Geração das cobranças recorrentes (``Recurrence``).
+
+``generate(primeiro_mes, ultimo_mes)`` cria, para cada recorrência ativa, uma
+cobrança por mês do intervalo: emitida no dia 1, vencendo em
+``day_of_month`` (limitado ao último dia do mês), dentro de início/término da
+recorrência. As cobranças saem de um ``bulk_create`` por lote de
+recorrências, com números reservados de uma vez (``numbering.allocate``).
+
+É idempotente: os meses já gerados são pulados. Se uma execução simultânea
+gerar parte dos mesmos meses, a restrição única (recurrence, period) desfaz o
+lote, que é refiltrado e inserido de novo; qualquer outro conflito (ex.:
+número repetido) sobe para quem chamou. Como ``bulk_create`` não dispara
+signals, a versão de dados é atualizada aqui; a trilha de auditoria não
+registra a geração.
+"""
+
+import calendar
+from collections import defaultdict
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Cobranca, DataVersion, Recurrence
+from .numbering import allocate
+
+RECURRENCE_BATCH = 5000
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def months(first, last):
+    """Primeiro dia de cada mês de ``first`` até ``last`` (inclusive)"""
+    current = month_start(first)
+    while current <= last:
+        yield current
+        current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+
+
+def due_date_for(period, day_of_month):
+    last_day = calendar.monthrange(period.year, period.month)[1]
+    return period.replace(day=min(day_of_month, last_day))
+
+
+def _pending(recurrences, periods):
+    """(recorrência, mês, vencimento) ainda não gerados para o lote"""
+    generated = set(
+        Cobranca.objects.filter(
+            recurrence_id__in=[r['id'] for r in recurrences],
+            period__gte=periods[0],
+            period__lte=periods[-1],
+        ).values_list('recurrence_id', 'period')
+    )
+    for recurrence in recurrences:
+        for period in periods:
+            due_date = due_date_for(period, recurrence['day_of_month'])
+            if due_date < recurrence['start_date']:
+                continue
+            if recurrence['end_date'] and due_date > recurrence['end_date']:
+                continue
+            if (recurrence['id'], period) not in generated:
+                yield recurrence, period, due_date
+
+
+def _build(pending):
+    """Instâncias de ``Cobranca`` para ``pending``, numeradas por ano de emissão"""
+    by_year = defaultdict(list)
+    for item in pending:
+        by_year[item[1].year].append(item)
+
+    now = timezone.now()
+    objs = []
+    for year, items in by_year.items():
+        for number, (recurrence, period, due_date) in zip(allocate(len(items), year=year), items):
+            objs.append(Cobranca(
+                number=number,
+                client_id=recurrence['client_id'],
+                job_id=recurrence['job_id'],
+                recurrence_id=recurrence['id'],
+                period=period,
+                value=recurrence['value'],
+                balance=recurrence['value'],
+                issue_date=period,
+                due_date=due_date,
+                status='pendente',
+                notes=recurrence['description'],
+                created_at=now,
+                updated_at=now,
+            ))
+    return objs
+
+
+def generate(first, last):
+    """Gera as cobranças recorrentes dos meses de ``first`` a ``last``.
+
+    Retorna o número de cobranças criadas.
+    """
+    periods = list(months(first, last))
+    if not periods:
+        return 0
+
+    recurrences = (
+        Recurrence.objects.filter(is_active=True, start_date__lte=due_date_for(periods[-1], 31))
+        .filter(Q(end_date__isnull=True) | Q(end_date__gte=periods[0]))
+        .order_by('id')
+        .values('id', 'client_id', 'job_id', 'value', 'day_of_month', 'start_date', 'end_date', 'description')
+    )
+    existing = Cobranca.objects.filter(recurrence__isnull=False, period__gte=periods[0], period__lte=periods[-1])
+    before = existing.count()
+
+    recurrences = list(recurrences)
+    for start in range(0, len(recurrences), RECURRENCE_BATCH):
+        _generate_batch(recurrences[start:start + RECURRENCE_BATCH], periods)
+
+    created = existing.count() - before
+    if created:
+        DataVersion.changed(Cobranca)
+    return created
+
+
+def _generated_meanwhile(objs, recurrences, periods):
+    """Algum mês de ``objs`` já foi gerado (por outra execução)?"""
+    pending = {(recurrence['id'], period) for recurrence, period, _ in _pending(recurrences, periods)}
+    return any((obj.recurrence_id, obj.period) not in pending for obj in objs)
+
+
+def _generate_batch(recurrences, periods, attempts=3):
+    for attempt in range(attempts):
+        objs = _build(list(_pending(recurrences, periods)))
+        if not objs:
+            return
+        try:
+            with transaction.atomic():
+                Cobranca.objects.bulk_create(objs)
+            return
+        except IntegrityError:
+            # Só a corrida na (recurrence, period) é esperada: os números
+            # reservados ficam sem uso e o lote sai de novo sem esses meses
+            if attempt == attempts - 1 or not _generated_meanwhile(objs, recurrences, periods):
+                raise
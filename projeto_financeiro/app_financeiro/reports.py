@@ -0,0 +1,131 @@
+"""
+Relatórios financeiros calculados no banco.
+
+Aging de recebíveis: cada cobrança em aberto recebe a chave da sua faixa de
+atraso por uma expressão ``Case`` sobre ``due_date``, comparada a limites
+derivados de um único "hoje". Uma consulta agrupada por (cliente, faixa)
+devolve o saldo em aberto (``balance``, já descontados os pagamentos
+parciais) e a quantidade; as linhas por cliente e o total geral são
+montados a partir dela, sem outra varredura. O índice (payment_date,
+client, due_date, balance) cobre a consulta (em aberto = ``payment_date``
+nulo).
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Case, Count, Sum, Value, When
+
+from .models import Client, Cobranca, OPEN_Q
+
+# (chave, rótulo, máximo de dias em atraso); None = sem limite
+AGING_BUCKETS = [
+    ("a_vencer", "A vencer", 0),
+    ("ate_30", "0–30 dias", 30),
+    ("de_31_a_60", "31–60 dias", 60),
+    ("de_61_a_90", "61–90 dias", 90),
+    ("acima_90", "90+ dias", None),
+]
+
+AGING_KEYS = [key for key, _, _ in AGING_BUCKETS]
+
+CENTS = Decimal("0.01")
+
+
+def aging_bucket_case(today):
+    """Chave da faixa de cada cobrança em ``today``.
+
+    Os ``When`` são avaliados em ordem, então cada faixa só precisa do seu
+    limite mais antigo de ``due_date``.
+    """
+    whens = [
+        When(due_date__gte=today - timedelta(days=max_days), then=Value(key))
+        for key, _, max_days in AGING_BUCKETS
+        if max_days is not None
+    ]
+    return Case(*whens, default=Value(AGING_KEYS[-1]))
+
+
+def open_cobrancas():
+    return Cobranca.objects.filter(OPEN_Q)
+
+
+def _empty_row(**extra):
+    row = dict.fromkeys(AGING_KEYS, Decimal("0.00"))
+    row.update(dict.fromkeys([f"{key}_count" for key in AGING_KEYS], 0))
+    row.update(total=Decimal("0.00"), count=0, **extra)
+    return row
+
+
+def aging_by_client(today, queryset=None):
+    """Uma linha por cliente: valor e quantidade em cada faixa, total e quantidade"""
+    queryset = open_cobrancas() if queryset is None else queryset
+    grouped = (
+        queryset.order_by()
+        .annotate(faixa=aging_bucket_case(today))
+        .values("client_id", "faixa")
+        .annotate(valor=Sum("balance"), quantidade=Count("id"))
+    )
+    rows = {}
+    for item in grouped:
+        row = rows.get(item["client_id"])
+        if row is None:
+            row = rows[item["client_id"]] = _empty_row(client_id=item["client_id"])
+        # SUM no SQLite volta como float: arredonda para centavos
+        valor = Decimal(item["valor"] or 0).quantize(CENTS)
+        row[item["faixa"]] += valor
+        row[f"{item['faixa']}_count"] += item["quantidade"]
+        row["total"] += valor
+        row["count"] += item["quantidade"]
+    return list(rows.values())
+
+
+def aging_totals(rows):
+    """Soma as linhas de ``aging_by_client`` (total geral por faixa)"""
+    totals = _empty_row()
+    for row in rows:
+        for field in totals:
+            totals[field] += row[field]
+    return totals
+
+
+def aging_cobrancas(cliente, today):
+    """Cobranças em aberto do cliente, com a faixa e os dias até o vencimento"""
+    return (
+        open_cobrancas().filter(client=cliente)
+        .select_related("job")
+        .with_status(today)
+        .annotate(faixa=aging_bucket_case(today))
+        .order_by("due_date", "id")
+    )
+
+
+def write_aging_csv(writer, today, cliente=None):
+    """Escreve o aging (por cliente, ou as cobranças de ``cliente``) num ``csv.writer``.
+
+    Retorna o número de linhas de dados escritas.
+    """
+    labels = [label for _, label, *_ in AGING_BUCKETS]
+    written = 0
+    if cliente is None:
+        rows = sorted(aging_by_client(today), key=lambda row: row["total"], reverse=True)
+        names = dict(Client.objects.filter(pk__in=[row["client_id"] for row in rows]).values_list("id", "name"))
+        writer.writerow(["Cliente"] + labels + ["Total", "Cobranças"])
+        for row in rows:
+            writer.writerow(
+                [names.get(row["client_id"], row["client_id"])]
+                + [row[key] for key in AGING_KEYS] + [row["total"], row["count"]]
+            )
+            written += 1
+        totals = aging_totals(rows)
+        writer.writerow(["Total"] + [totals[key] for key in AGING_KEYS] + [totals["total"], totals["count"]])
+    else:
+        labels_by_key = dict(zip(AGING_KEYS, labels))
+        writer.writerow(["Número", "Job", "Emissão", "Vencimento", "Dias em atraso", "Faixa", "Saldo"])
+        for c in aging_cobrancas(cliente, today).iterator():
+            writer.writerow([
+                c.number, c.job.title if c.job else "", c.issue_date, c.due_date,
+                c.days_overdue, labels_by_key.get(c.faixa, ""), c.balance,
+            ])
+            written += 1
+    return written
@@ -0,0 +1,54 @@
+"""
+Roteamento das leituras de relatórios para a réplica 'reporting'.
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .snapshot import REPORTING_ALIAS, snapshot_age, snapshot_stat
+
+_reporting_reads = contextvars.ContextVar('reporting_reads', default=False)
+
+
+@contextmanager
+def reporting_reads():
+    """Envia as leituras feitas dentro do bloco para o snapshot de relatórios.
+
+    Se o snapshot não existir ou for mais antigo que
+    ``REPORTING_MAX_STALENESS``, as leituras continuam no banco default.
+    """
+    token = _reporting_reads.set(True)
+    try:
+        yield
+    finally:
+        _reporting_reads.reset(token)
+
+
+class ReportingRouter:
+    def db_for_read(self, model, **hints):
+        if not _reporting_reads.get():
+            return None
+
+        stat = snapshot_stat()
+        if stat is None or snapshot_age(stat) > settings.REPORTING_MAX_STALENESS:
+            return None
+
+        # Conexão persistente ainda aberta no snapshot anterior
+        connection = connections[REPORTING_ALIAS]
+        if connection.connection is not None and getattr(connection, 'snapshot_inode', None) != stat.st_ino:
+            connection.close()
+        return REPORTING_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPORTING_ALIAS:
+            return False
+        return None
@@ -0,0 +1,191 @@
+"""
+Agendador interno de tarefas periódicas.
+
+As tarefas são registradas com o decorator ``periodic`` (ver ``tasks.py``) e
+executadas pelo comando ``run_scheduler``. Cada execução acontece sob um lease
+gravado no banco (``ScheduledTask``), então apenas uma instância roda cada
+tarefa por vez, mesmo com vários hosts/processos do gunicorn. Enquanto a
+tarefa roda, uma thread renova o lease (``heartbeat``) a cada terço da sua
+duração: uma tarefa mais longa que o lease não é pega por outra instância.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import partial
+
+from django.db import IntegrityError, connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ScheduledTask, TaskRun
+
+logger = logging.getLogger(__name__)
+
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_registry = {}
+
+
+@dataclass(frozen=True)
+class PeriodicTask:
+    name: str
+    func: object
+    every: timedelta
+    lease: timedelta
+
+    def is_due(self, last_run_at, now):
+        if last_run_at is None:
+            return True
+        # Intervalos em dias inteiros contam por data local (ex.: "uma vez por dia")
+        if self.every % timedelta(days=1) == timedelta(0):
+            last_date = timezone.localdate(last_run_at)
+            return (timezone.localdate(now) - last_date).days >= self.every.days
+        return last_run_at + self.every <= now
+
+
+def periodic(name, every, lease=timedelta(minutes=10)):
+    """Registra uma função como tarefa periódica.
+
+    A função não recebe argumentos e retorna o número de linhas afetadas.
+    """
+    def decorator(func):
+        _registry[name] = PeriodicTask(name=name, func=func, every=every, lease=lease)
+        return func
+    return decorator
+
+
+def get_tasks():
+    """Retorna as tarefas registradas, carregando o módulo de tarefas"""
+    from . import tasks  # noqa: F401  (registra as tarefas)
+    return dict(_registry)
+
+
+def acquire_lease(name, ttl, owner=OWNER):
+    """Tenta obter o lease da tarefa. Retorna True se conseguiu."""
+    try:
+        ScheduledTask.objects.get_or_create(name=name)
+    except IntegrityError:
+        # Outro processo criou a linha ao mesmo tempo
+        pass
+
+    now = timezone.now()
+    updated = ScheduledTask.objects.filter(name=name).filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now) | Q(locked_by=owner)
+    ).update(locked_by=owner, locked_until=now + ttl)
+    return updated == 1
+
+
+def renew_lease(name, ttl, owner=OWNER):
+    """Estende o lease por ``ttl`` a partir de agora (somente se ainda for deste processo)"""
+    updated = ScheduledTask.objects.filter(name=name, locked_by=owner).update(
+        locked_until=timezone.now() + ttl
+    )
+    return updated == 1
+
+
+@contextmanager
+def heartbeat(renew, interval):
+    """Chama ``renew()`` a cada ``interval`` segundos numa thread enquanto o bloco roda"""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                try:
+                    renew()
+                except Exception:
+                    # Ex.: banco travado por um instante; tenta de novo no próximo intervalo
+                    logger.exception("Erro ao renovar o lease")
+        finally:
+            connections.close_all()  # só as conexões desta thread
+
+    thread = threading.Thread(target=beat, name="lease-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def release_lease(name, owner=OWNER, **fields):
+    """Libera o lease (somente se ainda pertencer a este processo)"""
+    ScheduledTask.objects.filter(name=name, locked_by=owner).update(
+        locked_by='', locked_until=None, **fields
+    )
+
+
+def run_task(task, force=False, owner=OWNER):
+    """Executa uma tarefa sob lease e grava o histórico.
+
+    Retorna o ``TaskRun`` criado, ou None se a tarefa não estava devida ou
+    se outra instância detém o lease.
+    """
+    if not acquire_lease(task.name, task.lease, owner=owner):
+        logger.info("Tarefa %s em execução em outra instância", task.name)
+        return None
+
+    started_at = timezone.now()
+    state = ScheduledTask.objects.get(name=task.name)
+    # Confere de novo depois de travar: outra instância pode ter acabado de rodar
+    if not force and not task.is_due(state.last_run_at, started_at):
+        release_lease(task.name, owner=owner)
+        return None
+
+    start = time.perf_counter()
+    rows = 0
+    error = ''
+    try:
+        with heartbeat(partial(renew_lease, task.name, task.lease, owner), task.lease.total_seconds() / 3):
+            rows = task.func() or 0
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Erro ao executar a tarefa %s", task.name)
+    duration_ms = int((time.perf_counter() - start) * 1000)
+
+    run = TaskRun.objects.create(
+        task_name=task.name,
+        owner=owner,
+        started_at=started_at,
+        duration_ms=duration_ms,
+        rows=rows,
+        success=not error,
+        error=error,
+    )
+
+    fields = {'last_run_at': started_at}
+    if not error:
+        fields['last_success_at'] = started_at
+    release_lease(task.name, owner=owner, **fields)
+    return run
+
+
+def run_pending(names=None, force=False):
+    """Executa todas as tarefas devidas (ou apenas as indicadas em ``names``)"""
+    tasks = get_tasks()
+    if names:
+        unknown = set(names) - set(tasks)
+        if unknown:
+            raise KeyError(f"Tarefa(s) desconhecida(s): {', '.join(sorted(unknown))}")
+        tasks = {name: tasks[name] for name in names}
+
+    last_runs = dict(
+        ScheduledTask.objects.filter(name__in=tasks).values_list('name', 'last_run_at')
+    )
+    now = timezone.now()
+
+    runs = []
+    for name, task in tasks.items():
+        if not force and not task.is_due(last_runs.get(name), now):
+            continue
+        run = run_task(task, force=force)
+        if run is not None:
+            runs.append(run)
+    return runs
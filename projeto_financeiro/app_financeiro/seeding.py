@@ -0,0 +1,276 @@
+"""
+Geração de dados sintéticos para testes de escala (comando ``seed_scale``).
+
+Tudo é derivado de um ``random.Random(seed)``, então a mesma semente gera
+sempre os mesmos dados (exceto as datas, que são relativas a ``today``).
+"""
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .archive import delete_rows
+from .models import ArchivedCobranca, ArchivedPagamento, Client, Cobranca, DataVersion, Job, Notification, Pagamento
+
+SEED_MARKER = '[seed_scale]'
+SEED_LINK = '/notificacoes/#seed'
+
+FIRST_NAMES = [
+    'Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor',
+    'Isabela', 'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael',
+    'Sofia', 'Thiago', 'Valentina', 'William',
+]
+LAST_NAMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira',
+    'Lima', 'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes',
+]
+COMPANY_WORDS = [
+    'Construtora', 'Engenharia', 'Agropecuária', 'Comércio', 'Logística', 'Mineração',
+    'Transportes', 'Serviços', 'Madeireira', 'Pescados', 'Energia', 'Saneamento',
+]
+COMPANY_PLACES = [
+    'Amazonas', 'Rio Negro', 'Solimões', 'Tapajós', 'Xingu', 'Madeira', 'Purus', 'Juruá',
+]
+JOB_TITLES = [
+    'Levantamento topográfico', 'Projeto estrutural', 'Laudo técnico', 'Licenciamento ambiental',
+    'Projeto elétrico', 'Fiscalização de obra', 'Projeto hidrossanitário', 'Georreferenciamento',
+    'Consultoria', 'Regularização fundiária',
+]
+
+
+def _check_digit(digits, weights):
+    total = sum(d * w for d, w in zip(digits, weights))
+    rest = total % 11
+    return 0 if rest < 2 else 11 - rest
+
+
+def generate_cpf(rng):
+    """CPF válido (com dígitos verificadores), formatado"""
+    digits = [rng.randint(0, 9) for _ in range(9)]
+    digits.append(_check_digit(digits, range(10, 1, -1)))
+    digits.append(_check_digit(digits, range(11, 1, -1)))
+    s = ''.join(map(str, digits))
+    return f'{s[:3]}.{s[3:6]}.{s[6:9]}-{s[9:]}'
+
+
+def generate_cnpj(rng):
+    """CNPJ válido (com dígitos verificadores), formatado"""
+    digits = [rng.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    digits.append(_check_digit(digits, [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]))
+    digits.append(_check_digit(digits, [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]))
+    s = ''.join(map(str, digits))
+    return f'{s[:2]}.{s[2:5]}.{s[5:8]}/{s[8:12]}-{s[12:]}'
+
+
+def _batches(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def clear_seed_data():
+    """Remove os dados criados por execuções anteriores do seed"""
+    seeded_clients = Client.objects.filter(notes=SEED_MARKER)
+    with transaction.atomic():
+        # DELETE direto: com os signals de DataVersion o delete() normal
+        # carregaria cada cobrança na memória
+        delete_rows(Pagamento.objects.filter(cobranca__client__in=seeded_clients))
+        cobrancas = delete_rows(Cobranca.objects.filter(client__in=seeded_clients))
+        delete_rows(ArchivedPagamento.objects.filter(cobranca__client__in=seeded_clients))
+        cobrancas += delete_rows(ArchivedCobranca.objects.filter(client__in=seeded_clients))
+        DataVersion.changed(Cobranca)
+        jobs, _ = Job.objects.filter(client__in=seeded_clients).delete()
+        clients, _ = seeded_clients.delete()
+        notifications, _ = Notification.objects.filter(link=SEED_LINK).delete()
+    return {'clients': clients, 'jobs': jobs, 'cobrancas': cobrancas, 'notifications': notifications}
+
+
+def seed_clients(rng, count, batch_size):
+    created = []
+    for start, size in _batches(count, batch_size):
+        objs = []
+        for i in range(start, start + size):
+            if rng.random() < 0.7:
+                name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}'
+                type_, document = 'CPF', generate_cpf(rng)
+            else:
+                name = f'{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_PLACES)} Ltda'
+                type_, document = 'CNPJ', generate_cnpj(rng)
+            objs.append(Client(
+                name=name,
+                type=type_,
+                document=document,
+                email=f'cliente{i:07d}@exemplo.com.br',
+                phone=f'(92) 9{rng.randint(1000, 9999)}-{i % 10000:04d}',
+                notes=SEED_MARKER,
+                is_active=rng.random() < 0.9,
+            ))
+        with transaction.atomic():
+            created.extend(Client.objects.bulk_create(objs))
+    return created
+
+
+def seed_jobs(rng, clients, count, today, batch_size):
+    statuses = ['concluido'] * 6 + ['em_andamento'] * 3 + ['pendente']
+    created = []
+    for start, size in _batches(count, batch_size):
+        objs = []
+        for _ in range(size):
+            start_date = today - timedelta(days=rng.randint(0, 730))
+            objs.append(Job(
+                title=rng.choice(JOB_TITLES),
+                client=rng.choice(clients),
+                value=Decimal(rng.randint(500, 80000)),
+                start_date=start_date,
+                delivery_date=start_date + timedelta(days=rng.randint(15, 180)),
+                status=rng.choice(statuses),
+                progress=rng.randint(0, 100),
+                description=SEED_MARKER,
+            ))
+        with transaction.atomic():
+            created.extend(Job.objects.bulk_create(objs))
+    return created
+
+
+def _payment_delay(rng):
+    """Atraso do pagamento em dias: maioria em dia, cauda longa de atrasos"""
+    roll = rng.random()
+    if roll < 0.6:
+        return rng.randint(-7, 0)
+    if roll < 0.9:
+        return rng.randint(1, 30)
+    return rng.randint(31, 150)
+
+
+def insert_rows(model, fields, rows):
+    """INSERT em lote (executemany) sem instanciar os modelos.
+
+    Para milhões de linhas o custo por objeto do ``bulk_create`` domina o
+    tempo; aqui os valores já vêm prontos para o banco, na ordem de ``fields``.
+    """
+    opts = model._meta
+    columns = ', '.join(connection.ops.quote_name(opts.get_field(f).column) for f in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = f'INSERT INTO {connection.ops.quote_name(opts.db_table)} ({columns}) VALUES ({placeholders})'
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+COBRANCA_FIELDS = [
+    'number', 'client', 'job', 'value', 'issue_date', 'due_date', 'payment_date',
+    'paid_value', 'balance', 'status', 'last_reminder', 'notes', 'created_at', 'updated_at',
+]
+
+
+def insert_payments(first_number, last_number):
+    """Um pagamento integral para cada cobrança paga do intervalo de números"""
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(Pagamento._meta.db_table)} (cobranca_id, value, payment_date, notes, created_at) '
+            f'SELECT id, value, payment_date, %s, created_at FROM {quote(Cobranca._meta.db_table)} '
+            f'WHERE number BETWEEN %s AND %s AND status = %s',
+            ['', first_number, last_number, 'paga'],
+        )
+
+
+def seed_cobrancas(rng, clients, jobs, count, today, seed, batch_size, progress=None):
+    jobs_by_client = {}
+    for job in jobs:
+        jobs_by_client.setdefault(job.client_id, []).append(job.pk)
+
+    # Poucos clientes concentram a maior parte das cobranças
+    client_ids = [c.pk for c in clients]
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(client_ids))]
+    terms = [15, 30, 30, 30, 45, 60]
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+    created = 0
+    for start, size in _batches(count, batch_size):
+        chosen_clients = rng.choices(client_ids, weights=weights, k=size)
+        rows = []
+        for i, client_id in enumerate(chosen_clients, start=start):
+            issue_date = today - timedelta(days=rng.randint(0, 1095))
+            due_date = issue_date + timedelta(days=rng.choice(terms))
+            payment_date = None
+            if due_date < today:
+                if rng.random() < 0.85:
+                    payment_date = min(due_date + timedelta(days=_payment_delay(rng)), today)
+            elif rng.random() < 0.1:
+                payment_date = today - timedelta(days=rng.randint(0, 10))
+
+            status = 'paga' if payment_date is not None else 'pendente'
+
+            client_jobs = jobs_by_client.get(client_id)
+            job_id = rng.choice(client_jobs) if client_jobs and rng.random() < 0.6 else None
+
+            value = str(Decimal(rng.randint(10000, 2000000)) / 100)
+            rows.append((
+                f'SEED{seed}-{i:07d}',
+                client_id,
+                job_id,
+                value,
+                issue_date.isoformat(),
+                due_date.isoformat(),
+                payment_date.isoformat() if payment_date else None,
+                value if status == 'paga' else '0.00',
+                '0.00' if status == 'paga' else value,
+                status,
+                None,
+                '',
+                now,
+                now,
+            ))
+        with transaction.atomic():
+            insert_rows(Cobranca, COBRANCA_FIELDS, rows)
+            insert_payments(f'SEED{seed}-{start:07d}', f'SEED{seed}-{start + size - 1:07d}')
+        created += size
+        if progress:
+            progress(created)
+    return created
+
+
+def seed_notifications(rng, per_user, batch_size):
+    types = [t for t, _ in Notification.TYPE_CHOICES]
+    staff = list(User.objects.filter(is_staff=True, is_active=True).order_by('pk'))
+    objs = [
+        Notification(
+            user=user,
+            type=rng.choice(types),
+            title=f'Notificação de teste #{n}',
+            message='Gerada pelo seed_scale para testes de volume.',
+            link=SEED_LINK,
+            is_read=rng.random() < 0.7,
+        )
+        for user in staff
+        for n in range(per_user)
+    ]
+    with transaction.atomic():
+        Notification.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+def seed(clients=1000, jobs=5000, cobrancas=100_000, notifications_per_user=200,
+         seed=42, batch_size=10_000, progress=None):
+    """Gera o conjunto completo e retorna as quantidades criadas"""
+    rng = random.Random(seed)
+    today = timezone.localdate()
+
+    created_clients = seed_clients(rng, clients, batch_size)
+    created_jobs = seed_jobs(rng, created_clients, jobs, today, batch_size)
+    created_cobrancas = seed_cobrancas(
+        rng, created_clients, created_jobs, cobrancas, today, seed, batch_size, progress
+    )
+    created_notifications = seed_notifications(rng, notifications_per_user, batch_size)
+    # bulk_create/INSERT direto não disparam os signals
+    DataVersion.changed(Client, Job, Cobranca, Notification)
+
+    return {
+        'clients': len(created_clients),
+        'jobs': len(created_jobs),
+        'cobrancas': created_cobrancas,
+        'notifications': created_notifications,
+    }
@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import audit
+from .backends import invalidate_cached_user
+from .models import Client, Cobranca, CubeDirtyClient, DataVersion, Job, Notification, Pagamento, SystemConfig
+from .snapshot import REPORTING_ALIAS, snapshot_stat
+
+
+@receiver(post_save, sender=SystemConfig)
+def systemconfig_saved(sender, instance, **kwargs):
+    """Publica a nova versão da configuração (tela de configurações e admin)"""
+    SystemConfig.invalidate_cache(instance)
+
+
+@receiver(post_delete, sender=SystemConfig)
+def systemconfig_deleted(sender, instance, **kwargs):
+    SystemConfig.invalidate_cache()
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Aplica os PRAGMAs do perfil de banco (settings.SQLITE_PRAGMAS)"""
+    if connection.vendor != 'sqlite':
+        return
+
+    pragmas = dict(settings.SQLITE_PRAGMAS)
+    if connection.alias == REPORTING_ALIAS:
+        # Snapshot trocado por os.replace: sem WAL e somente leitura
+        pragmas.pop('journal_mode', None)
+        pragmas.pop('synchronous', None)
+        pragmas['query_only'] = 'ON'
+        stat = snapshot_stat()
+        connection.snapshot_inode = stat.st_ino if stat else None
+
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Cobranca)
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Cobranca)
+@receiver(post_delete, sender=Notification)
+def bump_data_version(sender, **kwargs):
+    """Invalida os ETags das páginas que mostram o modelo alterado"""
+    if kwargs.get('raw'):
+        return
+    DataVersion.changed(sender)
+
+
+@receiver(pre_save, sender=Client)
+@receiver(pre_save, sender=Job)
+@receiver(pre_save, sender=Cobranca)
+def audit_previous_values(sender, instance, raw=False, using=None, **kwargs):
+    """Guarda os valores anteriores para a auditoria (e para o cubo, abaixo)"""
+    if not raw:
+        audit.remember_previous(instance, using)
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Cobranca)
+def audit_saved(sender, instance, created, raw=False, using=None, **kwargs):
+    if not raw:
+        audit.record(instance, 'criado' if created else 'alterado', using)
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Cobranca)
+def audit_deleted(sender, instance, using=None, **kwargs):
+    audit.record(instance, 'excluido', using)
+
+
+@receiver(request_finished)
+def audit_flush(sender, **kwargs):
+    """Grava a auditoria da requisição depois de a resposta ter sido enviada"""
+    audit.flush()
+
+
+@receiver(pre_save, sender=Cobranca)
+def cobranca_client_changed(sender, instance, raw=False, **kwargs):
+    """Cobrança trocada de cliente: o cliente anterior também muda no cubo"""
+    previous = getattr(instance, '_audit_previous', None)
+    if raw or not previous:
+        return
+    if previous['client_id'] != Cobranca._meta.get_field('client').to_python(instance.client_id):
+        CubeDirtyClient.mark(previous['client_id'])
+
+
+@receiver(post_delete, sender=Cobranca)
+def cobranca_deleted(sender, instance, **kwargs):
+    CubeDirtyClient.mark(instance.client_id)
+
+
+@receiver(pre_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    """As cobranças do job ficam sem job (SET_NULL) sem alterar ``updated_at``"""
+    CubeDirtyClient.mark(*Cobranca.objects.filter(job=instance).values_list('client_id', flat=True))
+
+
+@receiver(post_delete, sender=Pagamento)
+def pagamento_deleted(sender, instance, using=None, **kwargs):
+    """Estorno: o valor volta para o saldo da cobrança"""
+    Cobranca.objects.using(using).filter(pk=instance.cobranca_id).apply_payment(-instance.value)
+    DataVersion.changed(Cobranca)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Ativação, senha ou último login alterados: descarta o usuário em cache"""
+    invalidate_cached_user(instance.pk)
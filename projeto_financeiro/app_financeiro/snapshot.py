@@ -0,0 +1,65 @@
+"""
+Snapshot do banco principal usado pela réplica de relatórios ('reporting').
+
+O snapshot é copiado com a API de backup do SQLite para um arquivo
+temporário e depois trocado com os.replace, então quem está lendo o
+snapshot anterior não é afetado e a cópia não bloqueia as escritas no
+banco principal (em WAL, leitores não bloqueiam escritores).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+REPORTING_ALIAS = 'reporting'
+
+_refresh_lock = threading.Lock()
+
+
+def snapshot_path():
+    return Path(settings.DATABASES[REPORTING_ALIAS]['NAME'])
+
+
+def snapshot_stat():
+    """``os.stat`` do snapshot, ou None se ainda não existe"""
+    try:
+        return os.stat(snapshot_path())
+    except FileNotFoundError:
+        return None
+
+
+def snapshot_age(stat=None):
+    """Idade do snapshot em segundos (None se não existe)"""
+    stat = stat or snapshot_stat()
+    if stat is None:
+        return None
+    return time.time() - stat.st_mtime
+
+
+def refresh_snapshot():
+    """Gera um novo snapshot do banco default. Retorna o número de páginas."""
+    source_path = settings.DATABASES['default']['NAME']
+    target = snapshot_path()
+    tmp = target.with_name(f'{target.name}.{os.getpid()}.tmp')
+
+    with _refresh_lock:
+        source = sqlite3.connect(source_path)
+        destination = sqlite3.connect(tmp)
+        try:
+            source.backup(destination)
+            # O snapshot é substituído inteiro: sem arquivo -wal associado
+            destination.execute('PRAGMA journal_mode = DELETE')
+            pages = destination.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            destination.close()
+            source.close()
+        os.replace(tmp, target)
+
+    # A conexão desta thread aponta para o arquivo antigo
+    connections[REPORTING_ALIAS].close()
+    return pages
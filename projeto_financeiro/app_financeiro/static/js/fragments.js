@@ -0,0 +1,68 @@
+// Filtros e busca das listas sem recarregar o layout inteiro.
+//
+// Formulários GET com o atributo data-fragment-form são enviados via fetch
+// com ?fragment=1; a view devolve só o bloco de resultados e os contadores,
+// e cada elemento [data-fragment-id] da resposta substitui o de mesmo id na
+// página. A URL do navegador continua sem o parâmetro (voltar/avançar funcionam).
+(function () {
+  function swap(html) {
+    const doc = new DOMParser().parseFromString(html, 'text/html');
+    doc.querySelectorAll('[data-fragment-id]').forEach(function (fresh) {
+      const selector = '[data-fragment-id="' + fresh.dataset.fragmentId + '"]';
+      const current = document.querySelector(selector);
+      if (current) current.replaceWith(document.adoptNode(fresh));
+    });
+  }
+
+  function syncForms(url) {
+    const params = new URL(url, window.location.href).searchParams;
+    document.querySelectorAll('form[data-fragment-form] input[name="q"]').forEach(function (input) {
+      input.value = params.get('q') || '';
+    });
+  }
+
+  function load(url, push) {
+    const fetchUrl = new URL(url, window.location.href);
+    fetchUrl.searchParams.set('fragment', '1');
+
+    return fetch(fetchUrl, { credentials: 'same-origin' })
+      .then(function (response) {
+        if (!response.ok || response.redirected) throw new Error(response.status);
+        return response.text();
+      })
+      .then(function (html) {
+        swap(html);
+        if (push) window.history.pushState({ fragment: true }, '', url);
+      })
+      .catch(function () {
+        // Sessão expirada, erro no servidor etc.: cai para a navegação normal
+        window.location.href = url;
+      });
+  }
+
+  document.addEventListener('submit', function (e) {
+    const form = e.target.closest('form[data-fragment-form]');
+    if (!form || (form.getAttribute('method') || 'get').toLowerCase() !== 'get') return;
+    e.preventDefault();
+
+    const data = new FormData(form);
+    if (e.submitter && e.submitter.name) data.set(e.submitter.name, e.submitter.value);
+
+    const url = new URL(form.getAttribute('action') || window.location.pathname, window.location.href);
+    url.search = new URLSearchParams(data).toString();
+    load(url.toString(), true);
+  });
+
+  // Links de paginação da lista ([data-fragment-link]) também trocam só o bloco
+  document.addEventListener('click', function (e) {
+    const link = e.target.closest('a[data-fragment-link]');
+    if (!link || e.ctrlKey || e.metaKey || e.shiftKey) return;
+    e.preventDefault();
+    load(link.href, true);
+  });
+
+  window.addEventListener('popstate', function () {
+    syncForms(window.location.href);
+    load(window.location.href, false);
+  });
+})();
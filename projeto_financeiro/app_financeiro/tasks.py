@@ -0,0 +1,170 @@
+"""
+Tarefas periódicas executadas pelo agendador (comando ``run_scheduler``) e
+tarefas em segundo plano executadas pelos workers (comando ``run_workers``).
+"""
+
+import csv
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .archive import archivable, archive_cutoff, archive_settled
+from .background import background, purge as purge_background_tasks, task_file_path
+from .cube import refresh_cube
+from .models import Client, Cobranca, DataVersion, Notification, ScheduledTask, SystemConfig, TaskRun
+from .recurrence import generate as generate_recurring
+from .reports import write_aging_csv
+from .routers import reporting_reads
+from .scheduler import get_tasks, periodic, run_task
+from .snapshot import refresh_snapshot
+
+
+def notify_staff(type, title, message, link=''):
+    """Cria uma notificação para cada usuário staff ativo"""
+    staff_users = User.objects.filter(is_staff=True, is_active=True)
+    Notification.objects.bulk_create([
+        Notification(user=user, type=type, title=title, message=message, link=link)
+        for user in staff_users
+    ])
+    DataVersion.changed(Notification)
+
+
+@periodic('status_refresh', every=timedelta(days=1))
+def refresh_cobrancas_status():
+    """Avisa a equipe sobre as cobranças que venceram desde a última execução.
+
+    O status "vencida" é derivado na consulta (``Cobranca.objects.with_status``),
+    então não há mais reescrita em lote da tabela: a tarefa só notifica. Os
+    dias em que o agendador não rodou entram na execução seguinte.
+    """
+    today = timezone.localdate()
+    last_success = ScheduledTask.objects.filter(name='status_refresh').values_list(
+        'last_success_at', flat=True
+    ).first()
+    # Na última execução venceram as de antes daquele dia; agora, de lá até ontem
+    since = timezone.localdate(last_success) if last_success else today - timedelta(days=1)
+
+    count_vencidas = Cobranca.objects.with_effective_status('vencida', today).filter(
+        due_date__gte=since
+    ).count()
+
+    if count_vencidas > 0:
+        notify_staff(
+            type='cobranca_vencida',
+            title=f'{count_vencidas} cobrança(s) vencida(s)',
+            message=f'Existem {count_vencidas} cobrança(s) que venceram e precisam de atenção.',
+            link='/cobrancas/?status=vencida',
+        )
+
+    return count_vencidas
+
+
+@periodic('reminders', every=timedelta(days=1))
+def send_reminders():
+    """Avisa a equipe sobre cobranças que vencem nos próximos dias"""
+    config = SystemConfig.get_config()
+    days = config.reminder_days_before
+    target = timezone.localdate() + timedelta(days=days)
+
+    count_vencendo = Cobranca.objects.with_effective_status('pendente').filter(
+        due_date=target
+    ).count()
+
+    if count_vencendo > 0:
+        notify_staff(
+            type='cobranca_vencendo',
+            title=f'{count_vencendo} cobrança(s) vencendo em {days} dias',
+            message=f'Existem {count_vencendo} cobrança(s) que vencem em {days} dias.',
+            link='/cobrancas/?status=pendente',
+        )
+
+    return count_vencendo
+
+
+@periodic('retention', every=timedelta(days=1))
+def purge_old_records():
+    """Remove notificações lidas e histórico de execuções antigos"""
+    now = timezone.now()
+
+    notifications_cutoff = now - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    deleted_notifications, _ = Notification.objects.filter(
+        is_read=True,
+        created_at__lt=notifications_cutoff
+    ).delete()
+
+    runs_cutoff = now - timedelta(days=settings.TASK_RUN_RETENTION_DAYS)
+    deleted_runs, _ = TaskRun.objects.filter(started_at__lt=runs_cutoff).delete()
+    deleted_runs += purge_background_tasks(runs_cutoff)
+
+    return deleted_notifications + deleted_runs
+
+
+@periodic('reporting_snapshot', every=timedelta(seconds=settings.REPORTING_SNAPSHOT_INTERVAL))
+def refresh_reporting_snapshot():
+    """Atualiza o snapshot usado pelas leituras de relatórios"""
+    return refresh_snapshot()
+
+
+@periodic('cube_refresh', every=timedelta(seconds=settings.CUBE_REFRESH_INTERVAL))
+def refresh_reporting_cube():
+    """Atualiza o cubo de relatórios com as alterações desde a última execução"""
+    return refresh_cube()
+
+
+@periodic('recurring_billing', every=timedelta(days=1))
+def generate_recurring_cobrancas():
+    """Gera as cobranças recorrentes do mês anterior (atrasadas) e do atual"""
+    this_month = timezone.localdate().replace(day=1)
+    previous_month = (this_month - timedelta(days=1)).replace(day=1)
+    return generate_recurring(previous_month, this_month)
+
+
+@periodic('archive', every=timedelta(days=1))
+def archive_settled_cobrancas():
+    """Move as cobranças pagas antigas para o arquivo"""
+    return archive_settled()
+
+
+@background('periodica', max_attempts=1)
+def run_periodic_now(task, nome):
+    """Executa agora uma tarefa periódica (sob o mesmo lease do agendador)"""
+    periodic_task = get_tasks().get(nome)
+    if periodic_task is None:
+        raise KeyError(f'Tarefa periódica desconhecida: {nome}')
+    task.report_progress(0, message=f'Executando {nome}')
+    run = run_task(periodic_task, force=True)
+    if run is None:
+        return {'executada': False, 'motivo': 'Em execução em outra instância'}
+    if not run.success:
+        raise RuntimeError(run.error.strip().splitlines()[-1])
+    return {'executada': True, 'linhas': run.rows, 'duracao_ms': run.duration_ms}
+
+
+@background('exportar_aging')
+def export_aging(task, cliente=None):
+    """Gera o CSV do aging (por cliente, ou das cobranças de ``cliente``) em arquivo"""
+    today = timezone.localdate()
+    client = Client.objects.get(pk=cliente) if cliente else None
+    filename = f'aging-{today:%Y-%m-%d}' + (f'-cliente-{client.pk}' if client else '') + '.csv'
+    path = task_file_path(task, filename)
+    task.report_progress(10, message='Calculando o aging')
+    with reporting_reads(), path.open('w', newline='', encoding='utf-8') as out:
+        out.write('\ufeff')  # BOM: o Excel abre os acentos corretamente
+        rows = write_aging_csv(csv.writer(out), today, client)
+    task.report_progress(100, message=f'{rows} linha(s)')
+    return {'arquivo': path.name, 'linhas': rows}
+
+
+@background('arquivar_cobrancas', max_attempts=1)
+def archive_cobrancas_now(task, dias=None):
+    """Arquiva as cobranças pagas antigas, com progresso por lote"""
+    cutoff = archive_cutoff(days=dias)
+    total = archivable(cutoff).count()
+    task.report_progress(0, total, message=f'{total} cobrança(s) a arquivar')
+    moved = archive_settled(
+        cutoff,
+        progress=lambda moved: task.report_progress(moved, total, message=f'{moved} de {total} arquivada(s)'),
+    )
+    return {'arquivadas': moved}
@@ -1,3 +1,679 @@
-from django.test import TestCase
+import csv
+import html
+import io
+import json
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import recurrence
+from .archive import archive_settled, restore
+from .audit import history
+from .background import claim
+from .cube import refresh_cube, slice_cube
+from .forecast import compute_forecast
+from .instrumentation import RequestStats, registry, track_queries
+from .models import (
+    ArchivedCobranca, ArchivedPagamento, AuditLog, BackgroundTask, Client, Cobranca, CobrancaHistory,
+    NumberSequence, Pagamento, Recurrence, ScheduledTask,
+)
+from .numbering import allocate, discard, next_number
+from .profiling import list_profiles
+from .reports import AGING_KEYS, aging_by_client, aging_totals, write_aging_csv
+from .scheduler import PeriodicTask, acquire_lease, release_lease, run_task
+
+
+def criar_cobranca(client, value="100.00", **kwargs):
+    today = timezone.localdate()
+    kwargs.setdefault("issue_date", today - timedelta(days=10))
+    kwargs.setdefault("due_date", today + timedelta(days=20))
+    return Cobranca.objects.create(client=client, value=Decimal(value), **kwargs)
+
+
+class PagamentoTests(TestCase):
+    def setUp(self):
+        self.client_obj = Client.objects.create(name="Cliente Teste")
+        self.cobranca = criar_cobranca(self.client_obj)
+
+    def test_pagamento_parcial(self):
+        Pagamento.objects.create(cobranca=self.cobranca, value=Decimal("40.00"))
+        self.cobranca.refresh_from_db()
+        self.assertEqual(self.cobranca.paid_value, Decimal("40.00"))
+        self.assertEqual(self.cobranca.balance, Decimal("60.00"))
+        self.assertIsNone(self.cobranca.payment_date)
+        self.assertEqual(self.cobranca.current_status, "pendente")
+
+    def test_pagamento_total_quita(self):
+        Pagamento.objects.create(cobranca=self.cobranca, value=Decimal("40.00"))
+        Pagamento.objects.create(
+            cobranca=self.cobranca, value=Decimal("60.00"), payment_date=date(2026, 1, 5)
+        )
+        self.cobranca.refresh_from_db()
+        self.assertEqual(self.cobranca.paid_value, Decimal("100.00"))
+        self.assertEqual(self.cobranca.balance, Decimal("0.00"))
+        self.assertEqual(self.cobranca.payment_date, date(2026, 1, 5))
+        self.assertEqual(self.cobranca.current_status, "paga")
+
+    def test_estorno_reabre(self):
+        pagamento = Pagamento.objects.create(cobranca=self.cobranca, value=Decimal("100.00"))
+        pagamento.delete()
+        self.cobranca.refresh_from_db()
+        self.assertEqual(self.cobranca.paid_value, Decimal("0.00"))
+        self.assertEqual(self.cobranca.balance, Decimal("100.00"))
+        self.assertIsNone(self.cobranca.payment_date)
+
+    def test_pagamento_acima_do_saldo(self):
+        pagamento = Pagamento(cobranca=self.cobranca, value=Decimal("150.00"))
+        with self.assertRaises(ValidationError):
+            pagamento.full_clean()
+
+    def test_valor_menor_que_o_pago(self):
+        Pagamento.objects.create(cobranca=self.cobranca, value=Decimal("40.00"))
+        self.cobranca.refresh_from_db()
+        self.cobranca.value = Decimal("30.00")
+        with self.assertRaises(ValidationError):
+            self.cobranca.full_clean()
+
+    def test_data_de_pagamento_quita_pelo_livro(self):
+        cobranca = criar_cobranca(self.client_obj, payment_date=date(2026, 2, 1))
+        cobranca.refresh_from_db()
+        self.assertEqual(cobranca.paid_value, Decimal("100.00"))
+        self.assertEqual(cobranca.balance, Decimal("0.00"))
+        self.assertEqual(cobranca.payment_date, date(2026, 2, 1))
+        self.assertEqual(list(cobranca.pagamentos.values_list("value", flat=True)), [Decimal("100.00")])
+
+
+class AgingTests(TestCase):
+    def test_detalhe_do_cliente_soma_o_saldo(self):
+        today = timezone.localdate()
+        client = Client.objects.create(name="Cliente Teste")
+        parcial = criar_cobranca(client, due_date=today - timedelta(days=40))
+        Pagamento.objects.create(cobranca=parcial, value=Decimal("60.00"))
+        criar_cobranca(client, value="25.00")
+
+        output = io.StringIO()
+        write_aging_csv(csv.writer(output), today, cliente=client)
+        header, *rows = list(csv.reader(io.StringIO(output.getvalue())))
+        self.assertEqual(header[-1], "Saldo")
+        self.assertEqual(sorted(Decimal(row[-1]) for row in rows), [Decimal("25.00"), Decimal("40.00")])
+
+        totals = aging_totals(aging_by_client(today))
+        self.assertEqual(sum(Decimal(row[-1]) for row in rows), totals["total"])
+        self.assertEqual(totals["de_31_a_60"], Decimal("40.00"))
+
+    def test_faixas_e_totais(self):
+        today = timezone.localdate()
+        client, outro = Client.objects.create(name="Cliente Teste"), Client.objects.create(name="Outro")
+        for dias, valor in [(0, "1.00"), (30, "2.00"), (31, "4.00"), (60, "8.00"), (61, "16.00"), (91, "32.00")]:
+            criar_cobranca(client, value=valor, due_date=today - timedelta(days=dias))
+        criar_cobranca(client, value="64.00", due_date=today - timedelta(days=10), payment_date=today)
+        criar_cobranca(outro, value="128.00", due_date=today - timedelta(days=200))
+
+        rows = {row["client_id"]: row for row in aging_by_client(today)}
+        row = rows[client.pk]
+        self.assertEqual(
+            [row[key] for key in AGING_KEYS],
+            [Decimal("1.00"), Decimal("2.00"), Decimal("12.00"), Decimal("16.00"), Decimal("32.00")],
+        )
+        self.assertEqual(row["de_31_a_60_count"], 2)
+        self.assertEqual((row["total"], row["count"]), (Decimal("63.00"), 6))
+
+        totals = aging_totals(rows.values())
+        self.assertEqual(totals["acima_90"], Decimal("160.00"))
+        self.assertEqual((totals["total"], totals["count"]), (Decimal("191.00"), 7))
+
+
+class ForecastTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.client_obj = Client.objects.create(name="Cliente Teste")
+
+    def _aberta(self, dias, valor):
+        return criar_cobranca(self.client_obj, value=valor, due_date=self.today + timedelta(days=dias))
+
+    def test_sem_historico_cai_no_vencimento(self):
+        self._aberta(2, "100.00")
+        self._aberta(15, "50.00")
+        self._aberta(-3, "30.00")
+        forecast = compute_forecast(self.today)
+        valores = [semana["valor"] for semana in forecast["semanas"]]
+        self.assertEqual(valores[:3], [Decimal("100.00"), Decimal("0.00"), Decimal("50.00")])
+        self.assertEqual(forecast["total_previsto"], Decimal("150.00"))
+        self.assertEqual(forecast["sem_previsao"], Decimal("30.00"))
+
+    def test_atraso_do_historico_desloca_o_recebimento(self):
+        # O cliente sempre paga uma semana depois do vencimento
+        for inicio in (30, 60, 90):
+            criar_cobranca(
+                self.client_obj, due_date=self.today - timedelta(days=inicio),
+                payment_date=self.today - timedelta(days=inicio - 8),
+            )
+        self._aberta(7, "200.00")
+        forecast = compute_forecast(self.today)
+        self.assertEqual(forecast["semanas"][2]["valor"], Decimal("200.00"))
+        self.assertEqual(
+            forecast["total_previsto"] + forecast["apos_horizonte"] + forecast["sem_previsao"],
+            Decimal("200.00"),
+        )
+
+
+class CubeTests(TestCase):
+    def setUp(self):
+        self.pf = Client.objects.create(name="Pessoa", type="CPF")
+        self.pj = Client.objects.create(name="Empresa", type="CNPJ")
+        self.today = timezone.localdate()
+        trimestre = date(self.today.year - 1, 2, 1)
+        criar_cobranca(self.pf, value="100.00", issue_date=trimestre, due_date=trimestre, payment_date=trimestre)
+        criar_cobranca(self.pj, value="300.00", issue_date=trimestre, due_date=trimestre)
+        self.aberta = criar_cobranca(self.pj, value="50.00", issue_date=trimestre, due_date=trimestre)
+
+    def _por_tipo(self):
+        return {cell["tipo_cliente"]: cell for cell in slice_cube(["tipo_cliente"])}
+
+    def test_fatias_por_tipo_e_trimestre(self):
+        refresh_cube(full=True)
+        cells = self._por_tipo()
+        self.assertEqual(cells["CPF"]["valor_pago"], Decimal("100.00"))
+        self.assertEqual(cells["CNPJ"]["valor_vencido"], Decimal("350.00"))
+        self.assertEqual(cells["CNPJ"]["taxa_vencidas"], 1)
+        [celula] = slice_cube(["trimestre"])
+        self.assertEqual(celula["trimestre"], f"{self.today.year - 1}-T1")
+        self.assertEqual(celula["valor"], Decimal("450.00"))
+
+    def test_atualizacao_incremental(self):
+        refresh_cube(full=True)
+        Pagamento.objects.create(cobranca=self.aberta, value=Decimal("50.00"))
+        Cobranca.objects.filter(value=Decimal("300.00")).get().delete()
+        refresh_cube()
+        cells = self._por_tipo()
+        self.assertEqual(cells["CNPJ"]["valor"], Decimal("50.00"))
+        self.assertEqual(cells["CNPJ"]["valor_pago"], Decimal("50.00"))
+        self.assertEqual(cells["CNPJ"]["valor_vencido"], Decimal("0.00"))
+
+
+class CobrancaViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("operador", password="senha-teste")
+        self.client.force_login(self.user)
+        self.client_obj = Client.objects.create(name="Cliente Teste")
+
+    def _atualizar(self, cobranca, **data):
+        post = {
+            "cobranca_id": cobranca.pk,
+            "value": str(cobranca.value).replace(".", ","),
+            "issue_date": cobranca.issue_date.isoformat(),
+            "due_date": cobranca.due_date.isoformat(),
+        }
+        post.update(data)
+        return self.client.post(reverse("cobranca_atualizar"), post)
+
+    def test_marcar_como_paga_registra_pagamento(self):
+        cobranca = criar_cobranca(self.client_obj)
+        self._atualizar(cobranca, status="paga", payment_date="2026-03-10")
+        cobranca.refresh_from_db()
+        self.assertEqual(cobranca.paid_value, Decimal("100.00"))
+        self.assertEqual(cobranca.balance, Decimal("0.00"))
+        self.assertEqual(cobranca.payment_date, date(2026, 3, 10))
+        pagamento = cobranca.pagamentos.get()
+        self.assertEqual(pagamento.value, Decimal("100.00"))
+        self.assertEqual(pagamento.payment_date, date(2026, 3, 10))
+
+    def test_marcar_como_paga_quita_o_restante(self):
+        cobranca = criar_cobranca(self.client_obj)
+        Pagamento.objects.create(cobranca=cobranca, value=Decimal("40.00"))
+        cobranca.refresh_from_db()
+        self._atualizar(cobranca, status="paga")
+        cobranca.refresh_from_db()
+        self.assertEqual(cobranca.paid_value, Decimal("100.00"))
+        self.assertEqual(
+            sorted(cobranca.pagamentos.values_list("value", flat=True)), [Decimal("40.00"), Decimal("60.00")]
+        )
+
+    def test_valor_menor_que_o_pago_rejeitado(self):
+        cobranca = criar_cobranca(self.client_obj)
+        Pagamento.objects.create(cobranca=cobranca, value=Decimal("40.00"))
+        cobranca.refresh_from_db()
+        self._atualizar(cobranca, value="30,00")
+        cobranca.refresh_from_db()
+        self.assertEqual(cobranca.value, Decimal("100.00"))
+
+    def test_aumentar_valor_de_paga_reabre_sem_pagamento(self):
+        cobranca = criar_cobranca(self.client_obj, payment_date=date(2026, 2, 1))
+        cobranca.refresh_from_db()
+        self._atualizar(cobranca, value="150,00", payment_date="2026-02-01")
+        cobranca.refresh_from_db()
+        self.assertEqual(cobranca.pagamentos.count(), 1)
+        self.assertEqual(cobranca.paid_value, Decimal("100.00"))
+        self.assertEqual(cobranca.balance, Decimal("50.00"))
+        self.assertIsNone(cobranca.payment_date)
+
+    def test_edicao_nao_sobrescreve_pagamento_concorrente(self):
+        cobranca = criar_cobranca(self.client_obj)
+        lida = Cobranca.objects.get(pk=cobranca.pk)
+        Pagamento.objects.create(cobranca=cobranca, value=Decimal("40.00"))
+        lida.notes = "editada"
+        lida.save()
+        cobranca.refresh_from_db()
+        self.assertEqual(cobranca.notes, "editada")
+        self.assertEqual(cobranca.paid_value, Decimal("40.00"))
+        self.assertEqual(cobranca.balance, Decimal("60.00"))
+
+        # Quitada enquanto o formulário estava aberto: continua paga
+        lida = Cobranca.objects.get(pk=cobranca.pk)
+        Pagamento.objects.create(cobranca=cobranca, value=Decimal("60.00"), payment_date=date(2026, 3, 1))
+        lida.save()
+        cobranca.refresh_from_db()
+        self.assertEqual(cobranca.payment_date, date(2026, 3, 1))
+        self.assertEqual(cobranca.balance, Decimal("0.00"))
+        self.assertEqual(cobranca.pagamentos.count(), 2)
+
+    def test_linha_leva_os_dados_uma_vez(self):
+        cobranca = criar_cobranca(self.client_obj, notes='Aspas " e <tags>')
+        response = self.client.get(reverse("cobrancas"))
+        conteudo = response.content.decode()
+        self.assertEqual(conteudo.count("data-cobranca="), 1)
+        self.assertNotIn("data-due-date=", conteudo)
+        dados = json.loads(html.unescape(re.search(r'data-cobranca="([^"]*)"', conteudo).group(1)))
+        self.assertEqual(dados["id"], cobranca.pk)
+        self.assertEqual(dados["notes"], 'Aspas " e <tags>')
+        self.assertEqual(dados["dueDate"], cobranca.due_date.isoformat())
+
+    def test_totais_fecham(self):
+        today = timezone.localdate()
+        criar_cobranca(self.client_obj)
+        criar_cobranca(self.client_obj, value="50.00", due_date=today - timedelta(days=5))
+        criar_cobranca(self.client_obj, value="70.00", payment_date=today)
+        parcial = criar_cobranca(self.client_obj, value="80.00")
+        Pagamento.objects.create(cobranca=parcial, value=Decimal("30.00"))
+        self.client.post(reverse("cobrancas"), {
+            "client": self.client_obj.pk,
+            "value": "20,00",
+            "issue_date": today.isoformat(),
+            "due_date": today.isoformat(),
+            "payment_date": today.isoformat(),
+        })
+
+        response = self.client.get(reverse("cobrancas"))
+        context = response.context
+        self.assertEqual(context["total_value"], Decimal("320.00"))
+        self.assertEqual(context["paid_value"], Decimal("120.00"))
+        self.assertEqual(context["total_value"], context["paid_value"] + context["to_receive_value"])
+        self.assertEqual(
+            Pagamento.objects.aggregate(total=Sum("value"))["total"], context["paid_value"]
+        )
+
+
+@override_settings(COBRANCA_NUMBER_BLOCK=5)
+class NumberingTests(TestCase):
+    def setUp(self):
+        self.client_obj = Client.objects.create(name="Cliente Teste")
+        discard(prefix="NB", year=2030)
+        discard(year=2030)
+
+    def test_blocos_da_memoria(self):
+        criar_cobranca(self.client_obj, number="NB2030-000010")
+        self.assertEqual(allocate(3, prefix="NB", year=2030), ["NB2030-000011", "NB2030-000012", "NB2030-000013"])
+        with self.assertNumQueries(0):
+            self.assertEqual(allocate(3, prefix="NB", year=2030)[-1], "NB2030-000016")
+        self.assertEqual(
+            allocate(4, prefix="NB", year=2030),
+            ["NB2030-000017", "NB2030-000018", "NB2030-000019", "NB2030-000020"],
+        )
+        self.assertEqual(NumberSequence.objects.get(prefix="NB", year=2030).next_value, 26)
+
+        discard(prefix="NB", year=2030)
+        self.assertEqual(next_number(prefix="NB", year=2030), "NB2030-000026")
+
+    def test_numero_digitado_no_bloco_e_pulado(self):
+        emissao = {"issue_date": date(2030, 1, 1), "due_date": date(2030, 1, 31)}
+        self.assertEqual(criar_cobranca(self.client_obj, **emissao).number, "2030-000001")
+        criar_cobranca(self.client_obj, number="2030-000002", **emissao)
+        # O bloco em memória ainda tem o 2: descarta e reserva um novo
+        self.assertEqual(criar_cobranca(self.client_obj, **emissao).number, "2030-000007")
+
+
+class AuditTests(TestCase):
+    def test_alteracoes_por_campo_e_historico(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            client = Client.objects.create(name="Antigo")
+        with self.captureOnCommitCallbacks(execute=True):
+            client.name = "Novo"
+            client.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            client.save()  # sem mudanças: não registra
+
+        itens, antes = history(Client, client.pk, limit=1)
+        self.assertEqual([(i.action, i.changes) for i in itens], [("alterado", {"name": ["Antigo", "Novo"]})])
+        itens, antes = history(Client, client.pk, before=antes, limit=1)
+        self.assertEqual([i.action for i in itens], ["criado"])
+        self.assertIsNone(antes)
+
+    def test_alteracao_desfeita_nao_aparece(self):
+        client = Client.objects.create(name="Cliente Teste")
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    client.name = "Desfeito"
+                    client.save()
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+        self.assertFalse(AuditLog.objects.filter(action="alterado").exists())
+
+    def test_usuario_da_requisicao(self):
+        user = User.objects.create_user("operador", password="senha-teste")
+        self.client.force_login(user)
+        client = Client.objects.create(name="Cliente Teste")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("cliente_atualizar"), {"client_id": client.pk, "name": "Renomeado"})
+        registro = AuditLog.objects.get(model="client", object_id=client.pk, action="alterado")
+        self.assertEqual(registro.user, user)
+        self.assertEqual(registro.changes["name"], ["Cliente Teste", "Renomeado"])
+
+
+class LeaseTests(TestCase):
+    def test_lease_do_agendador(self):
+        self.assertTrue(acquire_lease("teste", timedelta(minutes=5), owner="a"))
+        self.assertFalse(acquire_lease("teste", timedelta(minutes=5), owner="b"))
+
+        # Lease vencido (processo morreu): outra instância assume
+        ScheduledTask.objects.filter(name="teste").update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertTrue(acquire_lease("teste", timedelta(minutes=5), owner="b"))
+
+        release_lease("teste", owner="a")
+        self.assertEqual(ScheduledTask.objects.get(name="teste").locked_by, "b")
+        release_lease("teste", owner="b")
+        self.assertTrue(acquire_lease("teste", timedelta(minutes=5), owner="a"))
+
+    def test_tarefa_em_segundo_plano_retomada(self):
+        task = BackgroundTask.objects.create(name="exportar_aging", params={})
+        self.assertEqual(claim(owner="a").pk, task.pk)
+        self.assertIsNone(claim(owner="b"))
+
+        BackgroundTask.objects.filter(pk=task.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        retomada = claim(owner="b")
+        self.assertEqual(retomada.pk, task.pk)
+        self.assertEqual(retomada.locked_by, "b")
+        self.assertEqual(retomada.attempts, 2)
+
+
+class LeaseHeartbeatTests(TransactionTestCase):
+    # Sem a transação do TestCase: a renovação grava por outra conexão
+    def test_lease_renovado_durante_a_execucao(self):
+        tentativas = []
+
+        def demorada():
+            time.sleep(0.5)
+            tentativas.append(acquire_lease("demorada", timedelta(minutes=5), owner="b"))
+            return 1
+
+        task = PeriodicTask(name="demorada", func=demorada, every=timedelta(hours=1), lease=timedelta(seconds=0.3))
+        run = run_task(task, owner="a")
+        self.assertTrue(run.success, run.error)
+        self.assertEqual(tentativas, [False])
+        self.assertEqual(ScheduledTask.objects.get(name="demorada").locked_by, "")
+
+
+@override_settings(ADMIN_EXACT_COUNT_LIMIT=3)
+class AdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", password="senha-teste"))
+        self.agro = Client.objects.create(name="Agro Norte")
+        Client.objects.create(name="Fazenda Agro")
+        for dias in range(5):
+            criar_cobranca(self.agro, due_date=timezone.localdate() - timedelta(days=dias + 1))
+
+    def test_listagem_sem_count_completo(self):
+        url = reverse("admin:app_financeiro_cobranca_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.context["cl"].result_count, 5)
+        counts = [q["sql"] for q in queries.captured_queries if "COUNT(" in q["sql"] and "cobranca" in q["sql"]]
+        self.assertTrue(counts)
+        self.assertTrue(all("LIMIT" in sql for sql in counts), counts)
+
+        # Filtrada: conta só até passar do limite
+        response = self.client.get(url, {"status": "vencida"})
+        self.assertEqual(response.context["cl"].result_count, 4)
+
+    def test_autocomplete_por_prefixo(self):
+        response = self.client.get(reverse("admin:autocomplete"), {
+            "app_label": "app_financeiro", "model_name": "cobranca", "field_name": "client", "term": "Agro",
+        })
+        self.assertEqual([r["text"] for r in response.json()["results"]], ["Agro Norte"])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("operador", password="senha-teste")
+        self.client.force_login(self.user)
+
+    def test_etag_muda_depois_de_gravar(self):
+        url = reverse("clientes")
+        self.client.get(url)  # grava o cookie CSRF, que entra no ETag
+        etag = self.client.get(url).headers["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.create(name="Novo Cliente")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+
+class InstrumentationTests(TestCase):
+    def test_metricas_por_view(self):
+        registry.reset()
+        staff = User.objects.create_user("admin", password="senha-teste", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse("clientes"))
+        self.assertRegex(response.headers["Server-Timing"], r'db;dur=[\d.]+;desc="\d+ queries"')
+
+        metrics = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('app_request_duration_seconds_count{view="clientes"} 1', metrics)
+        self.assertIn('app_db_queries_bucket{view="clientes",le="+Inf"} 1', metrics)
+
+    def test_consultas_de_varias_threads_somam_na_requisicao(self):
+        stats = RequestStats()
+
+        def consultar():
+            try:
+                with track_queries(stats):
+                    for _ in range(20):
+                        with connections["default"].cursor() as cursor:
+                            cursor.execute("SELECT 1")
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=consultar) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(stats.queries, 80)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix="perfis-teste-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_override = override_settings(PROFILE_DIR=directory, PROFILE_MAX_ENTRIES=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.staff = User.objects.create_user("admin", password="senha-teste", is_staff=True)
+
+    def test_captura_so_para_staff(self):
+        self.client.force_login(User.objects.create_user("operador", password="senha-teste"))
+        response = self.client.get(reverse("clientes"), {"_profile": "1"})
+        self.assertNotIn("X-Profile-Id", response.headers)
+        self.assertEqual(list_profiles(), [])
+
+    def test_captura_e_limite(self):
+        self.client.force_login(self.staff)
+        nomes = [
+            self.client.get(reverse("clientes"), {"_profile": "1"}).headers["X-Profile-Id"]
+            for _ in range(3)
+        ]
+        self.assertEqual([p["name"] for p in list_profiles()], nomes[:0:-1])
+        resumo = list_profiles()[0]
+        self.assertEqual(resumo["view"], "clientes")
+        self.assertEqual(resumo["query_count"], len(resumo["queries"]))
+        self.assertGreater(resumo["query_count"], 0)
+
+        response = self.client.get(reverse("profile_download", args=[nomes[-1], "prof"]))
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse("profile_download", args=[nomes[0], "prof"]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.client_obj = Client.objects.create(name="Cliente Teste")
+        self.today = timezone.localdate()
+        self.antiga = criar_cobranca(
+            self.client_obj, value="100.00", number="CB2020-000007",
+            issue_date=date(2020, 1, 1), due_date=date(2020, 1, 31), payment_date=date(2020, 1, 20),
+        )
+        self.aberta = criar_cobranca(self.client_obj, value="50.00")
+
+    def _arquivar(self):
+        return archive_settled(cutoff=self.today - timedelta(days=365))
+
+    def test_arquivar_e_restaurar(self):
+        self.assertEqual(self._arquivar(), 1)
+        self.assertFalse(Cobranca.objects.filter(pk=self.antiga.pk).exists())
+        self.assertEqual(ArchivedCobranca.objects.get(pk=self.antiga.pk).number, "CB2020-000007")
+        self.assertEqual(ArchivedPagamento.objects.filter(cobranca_id=self.antiga.pk).count(), 1)
+        self.assertEqual(
+            set(CobrancaHistory.objects.values_list("id", "archived")),
+            {(self.antiga.pk, True), (self.aberta.pk, False)},
+        )
+
+        self.assertEqual(restore([self.antiga.pk]), 1)
+        restaurada = Cobranca.objects.get(pk=self.antiga.pk)
+        self.assertEqual(restaurada.balance, Decimal("0.00"))
+        self.assertEqual(restaurada.pagamentos.get().value, Decimal("100.00"))
+        self.assertFalse(ArchivedCobranca.objects.exists())
+        self.assertFalse(ArchivedPagamento.objects.exists())
+
+    def test_totais_incluem_arquivadas(self):
+        user = User.objects.create_user("operador", password="senha-teste")
+        self.client.force_login(user)
+        self._arquivar()
+        context = self.client.get(reverse("cobrancas")).context
+        self.assertEqual(context["total_count"], 1)
+        self.assertEqual(context["history_count"], 2)
+        self.assertEqual(context["history_paga_count"], 1)
+        self.assertEqual(context["total_value"], Decimal("150.00"))
+        self.assertEqual(context["paid_value"], Decimal("100.00"))
+        self.assertEqual(context["total_value"], context["paid_value"] + context["to_receive_value"])
+
+    def test_numero_arquivado_nao_e_reusado(self):
+        self._arquivar()
+        repetida = Cobranca(
+            client=self.client_obj, number="CB2020-000007", value=Decimal("10.00"),
+            issue_date=self.today, due_date=self.today,
+        )
+        with self.assertRaises(ValidationError):
+            repetida.full_clean()
+        self.assertEqual(next_number(prefix="CB", year=2020), "CB2020-000008")
+
+
+class RecurrenceTests(TestCase):
+    def setUp(self):
+        client = Client.objects.create(name="Cliente Teste")
+        self.recorrencia = Recurrence.objects.create(
+            client=client, value=Decimal("300.00"), day_of_month=31, start_date=date(2025, 1, 1),
+        )
+        self.inicio, self.fim = date(2025, 1, 1), date(2025, 4, 1)
+
+    def test_gerar_de_novo_nao_duplica(self):
+        self.assertEqual(recurrence.generate(self.inicio, self.fim), 4)
+        self.assertEqual(recurrence.generate(self.inicio, self.fim), 0)
+        vencimentos = Cobranca.objects.filter(recurrence=self.recorrencia).order_by("period")
+        self.assertEqual(
+            list(vencimentos.values_list("due_date", flat=True)),
+            [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)],
+        )
+
+    def test_mes_gerado_por_outra_execucao_e_pulado(self):
+        build = recurrence._build
+
+        def build_concorrente(pending):
+            objs = build(pending)
+            if not Cobranca.objects.exists():
+                # Outra execução grava o primeiro mês entre a leitura e o INSERT
+                criar_cobranca(
+                    self.recorrencia.client, recurrence=self.recorrencia, period=objs[0].period,
+                    issue_date=objs[0].period, due_date=objs[0].due_date,
+                )
+            return objs
+
+        with mock.patch.object(recurrence, "_build", build_concorrente):
+            recurrence.generate(self.inicio, self.fim)
+        self.assertEqual(Cobranca.objects.filter(recurrence=self.recorrencia).count(), 4)
+
+    def test_numero_repetido_nao_e_ignorado(self):
+        criar_cobranca(self.recorrencia.client, number="2025-000001")
+        with mock.patch.object(recurrence, "allocate", lambda count, year: ["2025-000001"] * count):
+            with self.assertRaises(IntegrityError):
+                recurrence.generate(self.inicio, self.fim)
+        self.assertFalse(Cobranca.objects.filter(recurrence=self.recorrencia).exists())
+
+
+SESSIONS_DIR = tempfile.mkdtemp(prefix="sessions-teste-")
+
+
+@override_settings(
+    CACHES={
+        **settings.CACHES,
+        "sessions": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": SESSIONS_DIR},
+    },
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+    AUTH_USER_CACHE_SECONDS=300,
+)
+class CachedSessionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SESSIONS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user("operador", password="senha-teste")
+        self.client.login(username="operador", password="senha-teste")
+
+    def test_sessao_e_usuario_saem_do_cache(self):
+        url = reverse("notificacoes_list")
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertNotIn("django_session", sql)
+        self.assertNotIn('FROM "auth_user"', sql)
+
+    def test_desativacao_vale_na_hora(self):
+        url = reverse("notificacoes_list")
+        self.client.get(url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(url).status_code, 302)
@@ -1,17 +1,44 @@
+import asyncio
+import csv
+import json
+import time
+from datetime import date
 from decimal import Decimal, InvalidOperation
-from datetime import timedelta
 
-from django.contrib import messages
+from asgiref.sync import sync_to_async
+
+from django.contrib import admin, messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
 from django.db.models import Q, Sum, Count
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.views.decorators.http import require_POST
 from django.utils import timezone
 from django.contrib.auth.models import User
 
-from .models import Client, Job, Cobranca, Notification, SystemConfig
-from .forms import ClientForm, JobForm, CobrancaForm, SystemConfigForm, UserCreateForm
+from .models import (
+    BackgroundTask, Client, Job, Cobranca, CobrancaCube, CobrancaHistory, CubeState, DataVersion, Notification,
+    Pagamento, SystemConfig,
+    cobranca_status_q, effective_status_case,
+)
+from .forms import ClientForm, JobForm, CobrancaForm, PagamentoForm, SystemConfigForm, UserCreateForm
+from .archive import archived_totals
+from .audit import history as audit_history
+from .background import enqueue, result_file
+from .conditional import conditional_page
+from .cube import DIMENSIONS as CUBE_DIMENSIONS, FILTERS as CUBE_FILTERS, slice_cube
+from .dashboard_metrics import gather_metrics, get_groups as get_metric_groups, run_isolated
+from .instrumentation import render_prometheus
+from .profiling import list_profiles, profile_file
+from .reports import (
+    AGING_BUCKETS, AGING_KEYS, aging_by_client, aging_cobrancas, aging_totals, open_cobrancas, write_aging_csv,
+)
+from .routers import reporting_reads
+from .scheduler import get_tasks as get_periodic_tasks
 
 
 def get_base_context(request):
@@ -32,76 +59,96 @@ def get_base_context(request):
     return context
 
 
+def is_fragment(request):
+    """Pedido só do bloco de resultados e contadores (filtros/busca via fragments.js)"""
+    return request.GET.get("fragment") == "1"
+
+
+LIST_PAGE_SIZE = 50
+
+
+def list_page(request, queryset):
+    """Página pedida (?page=) das listas de clientes, jobs e cobranças"""
+    return Paginator(queryset, LIST_PAGE_SIZE).get_page(request.GET.get("page"))
+
+
+def _cobranca_payload(c):
+    """Dados da linha para os botões da lista (modais e ações) em JSON"""
+    return json.dumps({
+        "id": c.id,
+        "number": c.number,
+        "clientId": c.client_id,
+        "clientName": c.client.name,
+        "jobId": c.job_id or "",
+        "jobTitle": c.job.title if c.job else "",
+        "value": str(c.value),
+        "balance": str(c.balance),
+        "status": c.current_status,
+        "issueDate": c.issue_date.isoformat(),
+        "dueDate": c.due_date.isoformat(),
+        "paymentDate": c.payment_date.isoformat() if c.payment_date else "",
+        "notes": c.notes or "",
+        "daysOverdue": c.days_overdue,
+        "daysToDue": c.days_to_due,
+    })
+
+
+def _cobrancas_recentes(today):
+    # -id segue a ordem de inclusão pela chave primária (created_at não tem índice)
+    return list(
+        Cobranca.objects.select_related('client', 'job').with_status(today).order_by('-id')[:5]
+    )
+
+
 @login_required
-def dashboard(request):
-    """Dashboard principal com métricas e resumos"""
+@conditional_page(Cobranca, Client, Job, Notification)
+async def dashboard(request):
+    """Dashboard principal com métricas e resumos.
+
+    Os grupos de métricas (``dashboard_metrics``) e as cobranças recentes são
+    consultados ao mesmo tempo, cada um com a própria conexão.
+    """
     today = timezone.localdate()
-    
-    # Métricas básicas
-    total_clientes = Client.objects.filter(is_active=True).count()
-    jobs_ativos = Job.objects.filter(status__in=['pendente', 'em_andamento']).count()
-    
-    # Faturamento mensal (cobranças pagas no mês atual)
-    faturamento_mensal = Cobranca.objects.filter(
-        status='paga',
-        payment_date__year=today.year,
-        payment_date__month=today.month
-    ).aggregate(total=Sum('value'))['total'] or Decimal('0.00')
-    
-    # Faturamento mês anterior (para calcular crescimento)
-    mes_anterior = today.replace(day=1) - timedelta(days=1)
-    faturamento_mes_anterior = Cobranca.objects.filter(
-        status='paga',
-        payment_date__year=mes_anterior.year,
-        payment_date__month=mes_anterior.month
-    ).aggregate(total=Sum('value'))['total'] or Decimal('0.00')
-    
-    # Cálculo de crescimento
-    crescimento = 0
-    if faturamento_mes_anterior > 0:
-        crescimento = ((faturamento_mensal - faturamento_mes_anterior) / faturamento_mes_anterior) * 100
-    
-    # Cobranças vencidas
-    cobrancas_vencidas = Cobranca.objects.filter(
-        status='vencida'
-    ).count()
-    
-    # Resumo semanal
-    semana_inicio = today
-    semana_fim = today + timedelta(days=7)
-    
-    vencem_semana = Cobranca.objects.filter(
-        due_date__gte=semana_inicio,
-        due_date__lte=semana_fim,
-        status='pendente'
-    ).count()
-    
-    vencidas = Cobranca.objects.filter(status='vencida').count()
-    em_dia = Cobranca.objects.filter(status='paga').count()
-    
-    # Cobranças recentes
-    cobrancas_recentes = Cobranca.objects.select_related(
-        'client', 'job'
-    ).order_by('-created_at')[:5]
-    
-    context = get_base_context(request)
-    context.update({
-        'page_title': 'Dashboard',
-        'total_clientes': total_clientes,
-        'jobs_ativos': jobs_ativos,
-        'faturamento_mensal': faturamento_mensal,
-        'crescimento': round(crescimento, 2),
-        'cobrancas_vencidas': cobrancas_vencidas,
-        'vencem_semana': vencem_semana,
-        'vencidas': vencidas,
-        'em_dia': em_dia,
-        'cobrancas_recentes': cobrancas_recentes,
+    metricas, (cobrancas_recentes, _), context = await asyncio.gather(
+        gather_metrics(today),
+        run_isolated(_cobrancas_recentes, today),
+        sync_to_async(get_base_context)(request),
+    )
+
+    context['page_title'] = 'Dashboard'
+    for valores, _ in metricas.values():
+        context.update(valores)
+    context['cobrancas_recentes'] = cobrancas_recentes
+
+    return await sync_to_async(render)(request, 'dashboard/dashboard.html', context)
+
+
+@login_required
+@conditional_page(Cobranca, Client, Job)
+async def dashboard_metricas(request):
+    """Métricas do dashboard em JSON (?grupo=... para escolher os grupos)"""
+    today = timezone.localdate()
+    nomes = request.GET.getlist('grupo')
+    desconhecidos = sorted(set(nomes) - set(get_metric_groups()))
+    if desconhecidos:
+        return JsonResponse(
+            {'erro': f"Grupo(s) desconhecido(s): {', '.join(desconhecidos)}"}, status=400
+        )
+
+    start = time.perf_counter()
+    metricas = await gather_metrics(today, nomes)
+    return JsonResponse({
+        'data': today,
+        'duracao_ms': round((time.perf_counter() - start) * 1000, 2),
+        'grupos': {
+            nome: {'valores': valores, 'duracao_ms': round(duracao * 1000, 2)}
+            for nome, (valores, duracao) in metricas.items()
+        },
     })
-    
-    return render(request, 'dashboard/dashboard.html', context)
 
 
 @login_required
+@conditional_page(Client, Notification)
 def clientes(request):
     """Lista e cadastra clientes"""
     if request.method == "POST":
@@ -139,14 +186,22 @@ def clientes(request):
     elif status == "inativo":
         clients = clients.filter(is_active=False)
 
+    page = list_page(request, clients.order_by("name"))
+    results = {
+        "clients": page,
+        "page_obj": page,
+        "total_count": total_count,
+        "active_count": active_count,
+        "inactive_count": inactive_count,
+    }
+    if is_fragment(request):
+        return render(request, "clientes/_resultados.html", results)
+
     context = get_base_context(request)
+    context.update(results)
     context.update({
         "page_title": "Clientes",
         "form": form,
-        "clients": clients.order_by("name"),
-        "total_count": total_count,
-        "active_count": active_count,
-        "inactive_count": inactive_count,
     })
     
     return render(request, "clientes/clientes.html", context)
@@ -176,6 +231,7 @@ def cliente_atualizar(request):
 
 
 @login_required
+@conditional_page(Job, Client, Notification)
 def jobs(request):
     """Lista e cadastra jobs"""
     if request.method == "POST":
@@ -212,13 +268,10 @@ def jobs(request):
     pendente_count = Job.objects.filter(status="pendente").count()
     valor_total = Job.objects.aggregate(total=Sum('value'))['total'] or Decimal('0.00')
 
-    clients = Client.objects.filter(is_active=True).order_by("name")
-
-    context = get_base_context(request)
-    context.update({
-        "page_title": "Jobs",
-        "form": form,
-        "jobs": jobs_qs,
+    page = list_page(request, jobs_qs)
+    results = {
+        "jobs": page,
+        "page_obj": page,
         "total_count": total_count,
         "andamento_count": andamento_count,
         "concluido_count": concluido_count,
@@ -226,6 +279,17 @@ def jobs(request):
         "valor_total": valor_total,
         "search_query": q,
         "current_status": status,
+    }
+    if is_fragment(request):
+        return render(request, "jobs/_resultados.html", results)
+
+    clients = Client.objects.filter(is_active=True).order_by("name")
+
+    context = get_base_context(request)
+    context.update(results)
+    context.update({
+        "page_title": "Jobs",
+        "form": form,
         "clients": clients,
     })
     
@@ -276,12 +340,14 @@ def job_atualizar(request):
 
 
 @login_required
+@conditional_page(Cobranca, Client, Job, Notification)
 def cobrancas(request):
     """Lista e cadastra cobranças"""
     q = request.GET.get("q", "").strip()
     status = request.GET.get("status", "todos")
+    today = timezone.localdate()
 
-    cobrancas_qs = Cobranca.objects.select_related("client", "job")
+    cobrancas_qs = Cobranca.objects.select_related("client", "job").with_status(today)
 
     if q:
         cobrancas_qs = cobrancas_qs.filter(
@@ -291,22 +357,29 @@ def cobrancas(request):
         )
 
     if status in ("pendente", "paga", "vencida"):
-        cobrancas_qs = cobrancas_qs.filter(status=status)
-
-    total_count = Cobranca.objects.count()
-    pendente_count = Cobranca.objects.filter(status="pendente").count()
-    paga_count = Cobranca.objects.filter(status="paga").count()
-    vencida_count = Cobranca.objects.filter(status="vencida").count()
+        cobrancas_qs = cobrancas_qs.with_effective_status(status, today)
 
     totals = Cobranca.objects.aggregate(
+        total_count=Count("id"),
+        pendente_count=Count("id", filter=cobranca_status_q("pendente", today)),
+        paga_count=Count("id", filter=cobranca_status_q("paga", today)),
+        vencida_count=Count("id", filter=cobranca_status_q("vencida", today)),
         total_value=Sum("value"),
-        paid_value=Sum("value", filter=Q(status="paga")),
-        overdue_value=Sum("value", filter=Q(status="vencida")),
+        paid_value=Sum("paid_value"),
+        to_receive_value=Sum("balance"),
+        overdue_value=Sum("balance", filter=cobranca_status_q("vencida", today)),
     )
-    total_value = totals["total_value"] or Decimal("0")
-    paid_value = totals["paid_value"] or Decimal("0")
+    # As abas contam o que a lista mostra (tabela principal); os cartões de
+    # faturamento somam também as arquivadas (todas pagas, saldo zero)
+    archived = archived_totals()
+    total_count = totals["total_count"]
+    pendente_count = totals["pendente_count"]
+    paga_count = totals["paga_count"]
+    vencida_count = totals["vencida_count"]
+    total_value = (totals["total_value"] or Decimal("0")) + archived["value"]
+    paid_value = (totals["paid_value"] or Decimal("0")) + archived["paid_value"]
     overdue_value = totals["overdue_value"] or Decimal("0")
-    to_receive_value = total_value - paid_value
+    to_receive_value = totals["to_receive_value"] or Decimal("0")
 
     if request.method == "POST":
         form = CobrancaForm(request.POST)
@@ -317,23 +390,36 @@ def cobrancas(request):
     else:
         form = CobrancaForm()
 
-    clients = Client.objects.order_by("name")
-    jobs = Job.objects.select_related("client").order_by("title")
-
-    context = get_base_context(request)
-    context.update({
-        "page_title": "Cobranças",
-        "cobrancas": cobrancas_qs,
+    page = list_page(request, cobrancas_qs)
+    # Um payload por linha: os botões da linha leem do <li>
+    for c in page:
+        c.payload = _cobranca_payload(c)
+    results = {
+        "cobrancas": page,
+        "page_obj": page,
         "search_query": q,
         "current_status": status,
         "total_count": total_count,
         "pendente_count": pendente_count,
         "paga_count": paga_count,
         "vencida_count": vencida_count,
+        "history_count": total_count + archived["count"],
+        "history_paga_count": paga_count + archived["count"],
         "total_value": total_value,
         "paid_value": paid_value,
         "to_receive_value": to_receive_value,
         "overdue_value": overdue_value,
+    }
+    if is_fragment(request):
+        return render(request, "cobrancas/_resultados.html", results)
+
+    clients = Client.objects.order_by("name")
+    jobs = Job.objects.select_related("client").order_by("title")
+
+    context = get_base_context(request)
+    context.update(results)
+    context.update({
+        "page_title": "Cobranças",
         "form": form,
         "clients": clients,
         "jobs": jobs,
@@ -393,27 +479,249 @@ def cobranca_atualizar(request):
                 cobranca.payment_date = datetime.strptime(payment_date, '%Y-%m-%d').date()
             else:
                 cobranca.payment_date = payment_date
-        else:
-            cobranca.payment_date = None
+        # Em branco mantém a data: pagamento só é desfeito excluindo o Pagamento (estorno)
 
-        status = request.POST.get("status")
-        if status in ("pendente", "vencida", "paga"):
-            cobranca.status = status
+        # "Marcar como paga": save() quita o saldo em aberto com um Pagamento
+        if request.POST.get("status") == "paga":
+            cobranca.status = "paga"
 
         cobranca.notes = request.POST.get("notes", "")
 
+        # save() relê valor pago e data de pagamento com a linha travada
         cobranca.save()
         messages.success(request, "Cobrança atualizada com sucesso.")
+    except ValidationError as e:
+        messages.error(request, f"Erro ao atualizar cobrança: {'; '.join(e.messages)}")
     except Exception as e:
         messages.error(request, f"Erro ao atualizar cobrança: {str(e)}")
     
     return redirect("cobrancas")
 
 
+@login_required
+@require_POST
+def cobranca_pagamento(request):
+    """Registra um pagamento (parcial ou total) da cobrança"""
+    cobranca = get_object_or_404(Cobranca, pk=request.POST.get("cobranca_id"))
+    form = PagamentoForm(request.POST, instance=Pagamento(cobranca=cobranca))
+    if form.is_valid():
+        pagamento = form.save()
+        messages.success(request, f"Pagamento de R$ {pagamento.value} registrado na cobrança {cobranca.number}.")
+    else:
+        erros = "; ".join(e for errors in form.errors.values() for e in errors)
+        messages.error(request, f"Erro ao registrar pagamento: {erros}")
+    return redirect("cobrancas")
+
+
+AGING_PAGE_SIZE = 25
+
+
+def _aging_faixas(row):
+    """Faixas de uma linha do aging na ordem das colunas: [(rótulo, valor, quantidade)]"""
+    return [(label, row[key], row[f"{key}_count"]) for key, label, *_ in AGING_BUCKETS]
+
+
+def _aging_cliente(request):
+    cliente_id = request.GET.get("cliente", "")
+    if not cliente_id:
+        return None
+    if not cliente_id.isdigit():
+        raise Http404("Cliente não encontrado.")
+    return get_object_or_404(Client, pk=cliente_id)
+
+
+@login_required
+def relatorio_aging(request):
+    """Aging de recebíveis por cliente; com ?cliente=<id>, as cobranças em aberto do cliente"""
+    today = timezone.localdate()
+    cliente = _aging_cliente(request)
+    ordem = request.GET.get("ordem", "total")
+    if ordem not in AGING_KEYS:
+        ordem = "total"
+
+    with reporting_reads():
+        if cliente is None:
+            rows = list(aging_by_client(today))
+            totals = aging_totals(rows)
+            rows.sort(key=lambda row: row[ordem], reverse=True)
+            page = Paginator(rows, AGING_PAGE_SIZE).get_page(request.GET.get("page"))
+            names = Client.objects.in_bulk([row["client_id"] for row in page])
+            for row in page:
+                row["client"] = names.get(row["client_id"])
+                row["faixas"] = _aging_faixas(row)
+        else:
+            # Só as faixas deste cliente (índice por payment_date/cliente)
+            totals = aging_totals(aging_by_client(today, open_cobrancas().filter(client=cliente)))
+            cobrancas_qs = aging_cobrancas(cliente, today)
+            page = Paginator(cobrancas_qs, AGING_PAGE_SIZE).get_page(request.GET.get("page"))
+            labels = {key: label for key, label, *_ in AGING_BUCKETS}
+            for cobranca in page:
+                cobranca.faixa_label = labels.get(cobranca.faixa, "")
+
+    context = get_base_context(request)
+    context.update({
+        "page_title": "Relatórios",
+        "today": today,
+        "cliente": cliente,
+        "ordem": ordem,
+        "page_obj": page,
+        "buckets": [(key, label) for key, label, *_ in AGING_BUCKETS],
+        "totals": totals,
+        "total_faixas": _aging_faixas(totals),
+    })
+    return render(request, "relatorios/aging.html", context)
+
+
+@login_required
+def relatorio_aging_exportar(request):
+    """Exporta o aging em CSV (por cliente, ou as cobranças de ?cliente=<id>).
+
+    Com ?segundo_plano=1 a exportação vai para a fila e a resposta (202) traz
+    o id da tarefa; o arquivo sai em /tarefas/<id>/arquivo/ quando concluir.
+    """
+    today = timezone.localdate()
+    cliente = _aging_cliente(request)
+    if request.GET.get("segundo_plano") == "1":
+        task = enqueue("exportar_aging", user=request.user, cliente=cliente.pk if cliente else None)
+        return JsonResponse(_task_json(task), status=202)
+
+    filename = f"aging-{today:%Y-%m-%d}"
+    if cliente is not None:
+        filename += f"-cliente-{cliente.pk}"
+    response = HttpResponse(content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    response.write("\ufeff")  # BOM: o Excel abre os acentos corretamente
+    with reporting_reads():
+        write_aging_csv(csv.writer(response), today, cliente)
+    return response
+
+
+def _cube_month(value):
+    """'AAAA-MM' -> primeiro dia do mês"""
+    try:
+        year, month = (int(part) for part in value.split("-"))
+        return date(year, month, 1)
+    except ValueError:
+        raise ValueError(f"Mês inválido: {value} (use AAAA-MM)") from None
+
+
+@login_required
+@conditional_page(CobrancaCube)
+def relatorio_cubo(request):
+    """Fatiar e agrupar o cubo de cobranças em JSON.
+
+    ?por=tipo_cliente&por=trimestre agrupa; cliente, tipo_cliente, status_job
+    e status filtram; de/ate (AAAA-MM) limitam o mês de emissão.
+    """
+    dimensoes = [d for value in request.GET.getlist("por") for d in value.split(",") if d]
+    filtros = {name: request.GET[name] for name in CUBE_FILTERS if request.GET.get(name)}
+    try:
+        desconhecidas = [d for d in dimensoes if d not in CUBE_DIMENSIONS]
+        if desconhecidas:
+            raise ValueError(f"Dimensão(ões) desconhecida(s): {', '.join(desconhecidas)}")
+        inicio = _cube_month(request.GET["de"]) if request.GET.get("de") else None
+        fim = _cube_month(request.GET["ate"]) if request.GET.get("ate") else None
+    except ValueError as exc:
+        return JsonResponse({"erro": str(exc), "dimensoes": sorted(CUBE_DIMENSIONS)}, status=400)
+
+    state = CubeState.objects.filter(pk=1).first()
+    return JsonResponse({
+        "dimensoes": dimensoes,
+        "filtros": filtros,
+        "atualizado_em": state.refreshed_at if state else None,
+        "linhas": slice_cube(dimensoes, filtros, inicio, fim),
+    })
+
+
+HISTORICO_MODELOS = {"cliente": Client, "job": Job, "cobranca": Cobranca}
+
+
+@login_required
+def historico(request, tipo, object_id):
+    """Histórico de alterações de um cliente, job ou cobrança em JSON.
+
+    Paginação por chave: ?antes=<proximo da página anterior>.
+    """
+    model = HISTORICO_MODELOS.get(tipo)
+    if model is None:
+        raise Http404("Tipo de registro desconhecido")
+    antes = request.GET.get("antes") or None
+    if antes is not None and not antes.isdigit():
+        return JsonResponse({"erro": "Parâmetro 'antes' inválido"}, status=400)
+
+    itens, proximo = audit_history(model, object_id, before=int(antes) if antes else None)
+    return JsonResponse({
+        "tipo": tipo,
+        "id": object_id,
+        "itens": [
+            {
+                "id": item.id,
+                "acao": item.action,
+                "usuario": item.user.username if item.user else None,
+                "data": item.created_at,
+                "alteracoes": item.changes,
+            }
+            for item in itens
+        ],
+        "proximo": proximo,
+    })
+
+
+CLIENTE_COBRANCAS_PAGE_SIZE = 50
+
+
+@login_required
+@conditional_page(Cobranca, Client, Job)
+def cliente_cobrancas(request, client_id):
+    """Histórico de cobranças de um cliente (ativas e arquivadas) em JSON.
+
+    Da mais nova para a mais antiga (por id); paginação por chave:
+    ?antes=<proximo da página anterior>.
+    """
+    client = get_object_or_404(Client, pk=client_id)
+    antes = request.GET.get("antes") or None
+    if antes is not None and not antes.isdigit():
+        return JsonResponse({"erro": "Parâmetro 'antes' inválido"}, status=400)
+
+    cobrancas_qs = CobrancaHistory.objects.filter(client=client).annotate(
+        effective_status=effective_status_case(timezone.localdate())
+    )
+    if antes is not None:
+        cobrancas_qs = cobrancas_qs.filter(id__lt=int(antes))
+    itens = list(
+        cobrancas_qs.select_related("job").order_by("-id")[:CLIENTE_COBRANCAS_PAGE_SIZE + 1]
+    )
+    proximo = None
+    if len(itens) > CLIENTE_COBRANCAS_PAGE_SIZE:
+        itens = itens[:CLIENTE_COBRANCAS_PAGE_SIZE]
+        proximo = itens[-1].id
+    return JsonResponse({
+        "cliente": {"id": client.id, "nome": client.name},
+        "itens": [
+            {
+                "id": item.id,
+                "numero": item.number,
+                "job": item.job.title if item.job else None,
+                "valor": item.value,
+                "valor_pago": item.paid_value,
+                "saldo": item.balance,
+                "status": item.effective_status,
+                "emissao": item.issue_date,
+                "vencimento": item.due_date,
+                "pagamento": item.payment_date,
+                "arquivada": item.archived,
+            }
+            for item in itens
+        ],
+        "proximo": proximo,
+    })
+
+
 @login_required
 def configuracoes(request):
     """Página de configurações do sistema"""
-    config = SystemConfig.get_config()
+    # Carrega do banco: a instância de get_config() é compartilhada (cache)
+    config, created = SystemConfig.objects.get_or_create(pk=1)
     
     if request.method == 'POST':
         form = SystemConfigForm(request.POST, instance=config)
@@ -435,6 +743,7 @@ def configuracoes(request):
 
 
 @login_required
+@conditional_page(Notification)
 def notificacoes_list(request):
     """Lista todas as notificações do usuário"""
     notifications = Notification.objects.filter(user=request.user)
@@ -452,7 +761,8 @@ def notificacoes_list(request):
 @require_POST
 def notificacao_mark_all_read(request):
     """Marca todas as notificações como lidas"""
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    if Notification.objects.filter(user=request.user, is_read=False).update(is_read=True):
+        DataVersion.changed(Notification)
     messages.success(request, 'Todas as notificações foram marcadas como lidas.')
     
     next_url = request.POST.get('next', 'dashboard')
@@ -499,4 +809,109 @@ def usuario_toggle_active(request, user_id):
     status = 'ativado' if user.is_active else 'desativado'
     messages.success(request, f'Usuário {user.username} foi {status} com sucesso.')
     
-    return redirect('usuarios')
\ No newline at end of file
+    return redirect('usuarios')
+
+
+@staff_member_required
+def metrics(request):
+    """Histogramas por URL no formato texto do Prometheus (apenas staff)"""
+    return HttpResponse(
+        render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@staff_member_required
+def profiles_list(request):
+    """Capturas de perfil (cProfile) guardadas, para download (apenas staff)"""
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Perfis de requisições',
+        'profiles': list_profiles(),
+    }
+    return render(request, 'admin/profiles/list.html', context)
+
+
+@staff_member_required
+def profile_download(request, name, extension):
+    """Download de uma captura (.prof para o pstats/snakeviz, .json com o resumo)"""
+    path = profile_file(name, extension)
+    if path is None:
+        raise Http404('Perfil não encontrado.')
+    return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
+
+
+def _task_json(task):
+    return {
+        "id": task.pk,
+        "tarefa": task.name,
+        "status": task.status,
+        "progresso": task.progress,
+        "mensagem": task.message,
+        "tentativas": task.attempts,
+        "criada_em": task.created_at,
+        "concluida_em": task.finished_at,
+        "resultado": task.result,
+        "erro": task.error.strip().splitlines()[-1] if task.error else None,
+        "url": reverse("tarefa_status", args=[task.pk]),
+        "arquivo": reverse("tarefa_arquivo", args=[task.pk]) if result_file(task) else None,
+    }
+
+
+def _visible_task(request, task_id):
+    """Tarefa de quem a criou (staff vê todas)"""
+    tasks = BackgroundTask.objects.all()
+    if not request.user.is_staff:
+        tasks = tasks.filter(created_by=request.user)
+    return get_object_or_404(tasks, pk=task_id)
+
+
+@login_required
+def tarefa_status(request, task_id):
+    """Situação de uma tarefa em segundo plano em JSON (para acompanhar o progresso)"""
+    return JsonResponse(_task_json(_visible_task(request, task_id)))
+
+
+@login_required
+def tarefa_arquivo(request, task_id):
+    """Download do arquivo gerado por uma tarefa concluída"""
+    task = _visible_task(request, task_id)
+    path = result_file(task) if task.status == "concluida" else None
+    if path is None:
+        raise Http404("Arquivo não encontrado.")
+    filename = path.name.split("-", 1)[1]
+    return FileResponse(path.open("rb"), as_attachment=True, filename=filename)
+
+
+TAREFAS_PAGE_SIZE = 50
+
+
+@staff_member_required
+def tarefas(request):
+    """Fila de tarefas em segundo plano, com progresso; enfileira tarefas periódicas (apenas staff)"""
+    periodicas = sorted(get_periodic_tasks())
+    if request.method == 'POST':
+        nome = request.POST.get('periodica', '')
+        if request.POST.get('tarefa') == 'arquivar_cobrancas':
+            task = enqueue('arquivar_cobrancas', user=request.user)
+            messages.success(request, f'Tarefa #{task.pk} (arquivamento) enfileirada.')
+        elif nome not in periodicas:
+            messages.error(request, 'Tarefa periódica desconhecida.')
+        else:
+            task = enqueue('periodica', user=request.user, nome=nome)
+            messages.success(request, f'Tarefa #{task.pk} ({nome}) enfileirada.')
+        return redirect('tarefas')
+
+    recent = list(BackgroundTask.objects.select_related('created_by')[:TAREFAS_PAGE_SIZE])
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Tarefas em segundo plano',
+        'tasks': recent,
+        'periodicas': periodicas,
+        'counts': dict(
+            BackgroundTask.objects.filter(status__in=['pendente', 'executando'])
+            .order_by().values_list('status').annotate(n=Count('id'))
+        ),
+        'refresh': any(task.status in ('pendente', 'executando') for task in recent),
+    }
+    return render(request, 'admin/tasks/list.html', context)
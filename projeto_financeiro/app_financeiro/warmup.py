@@ -0,0 +1,124 @@
+"""
+Aquecimento do processo antes da primeira requisição.
+
+Num host que hiberna (Render), a primeira requisição depois de acordar paga
+tudo de uma vez: importar as views e os módulos que elas puxam, compilar as
+expressões do URL resolver, ler e compilar os templates e abrir a conexão com
+o banco. ``warmup`` faz essas etapas antecipadamente e devolve o tempo de
+cada uma. É chamado pelo hook ``post_fork`` do gunicorn (gunicorn.conf.py),
+em cada worker, e pelo comando ``manage.py warmup``.
+"""
+
+import time
+from importlib import import_module
+from importlib.util import find_spec
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+from django.urls import URLResolver, get_resolver
+
+# Módulos importados sob demanda pelas requisições (além do URLconf)
+APP_MODULES = ('views', 'forms', 'admin')
+
+
+def _is_local(path):
+    return Path(path).resolve().is_relative_to(Path(settings.BASE_DIR).resolve())
+
+
+def import_modules():
+    """Importa o URLconf (e com ele as views) e os módulos das apps do projeto"""
+    names = [settings.ROOT_URLCONF]
+    for app in apps.get_app_configs():
+        if not _is_local(app.path):
+            continue
+        names.extend(
+            f'{app.name}.{module}' for module in APP_MODULES
+            if find_spec(f'{app.name}.{module}') is not None
+        )
+    for name in names:
+        import_module(name)
+    return f'{len(names)} módulos'
+
+
+def _compile_patterns(resolver):
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex  # compilada sob demanda e guardada no pattern
+        count += 1
+        if isinstance(pattern, URLResolver):
+            count += _compile_patterns(pattern)
+    return count
+
+
+def compile_urls():
+    """Popula o resolver (reverse) e compila a regex de todas as rotas"""
+    resolver = get_resolver()
+    resolver.reverse_dict  # dispara o _populate
+    return f'{_compile_patterns(resolver)} rotas'
+
+
+def template_names():
+    """Nomes de todos os templates do projeto (DIRS e pastas templates das apps locais)"""
+    dirs = []
+    for engine in engines.all():
+        dirs.extend(engine.template_dirs)
+    dirs.extend(path for path in get_app_template_dirs('templates') if _is_local(path))
+
+    names = set()
+    for directory in dirs:
+        directory = Path(directory)
+        if directory.is_dir():
+            names.update(
+                path.relative_to(directory).as_posix()
+                for path in directory.rglob('*.html')
+            )
+    return sorted(names)
+
+
+def load_templates():
+    """Carrega (e, fora do DEBUG, guarda no cached loader) todos os templates"""
+    names = template_names()
+    for engine in engines.all():
+        for name in names:
+            engine.get_template(name)
+    return f'{len(names)} templates'
+
+
+def open_connection(alias=DEFAULT_DB_ALIAS):
+    """Abre a conexão (aplica os PRAGMAs) e lê o schema do SQLite
+
+    A conexão só é reaproveitada pela primeira requisição com CONN_MAX_AGE > 0
+    (DB_PROFILE=production); sem isso fica aquecido apenas o cache do sistema.
+    """
+    connection = connections[alias]
+    connection.ensure_connection()
+    tables = connection.introspection.table_names()
+    return f'{connection.vendor}, {len(tables)} tabelas'
+
+
+STAGES = [
+    ('imports', import_modules),
+    ('urls', compile_urls),
+    ('templates', load_templates),
+    ('database', open_connection),
+]
+
+
+def warmup(stages=None):
+    """Executa as etapas e retorna ``[(etapa, segundos, detalhe), ...]``"""
+    timings = []
+    for name, func in STAGES:
+        if stages and name not in stages:
+            continue
+        start = time.perf_counter()
+        detail = func()
+        timings.append((name, time.perf_counter() - start, detail))
+    return timings
+
+
+def format_timings(timings):
+    return ', '.join(f'{name}={seconds * 1000:.1f}ms ({detail})' for name, seconds, detail in timings)
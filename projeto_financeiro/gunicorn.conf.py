@@ -0,0 +1,36 @@
+"""
+Configuração do gunicorn (lida automaticamente quando iniciado nesta pasta):
+
+    gunicorn
+
+Cada worker é aquecido logo depois do fork (imports, URL resolver, templates
+e conexão com o banco, ver app_financeiro/warmup.py), então a primeira
+requisição depois de o host acordar não paga essa carga. Os tempos de cada
+etapa saem no log do gunicorn. WARMUP=0 desliga o aquecimento.
+"""
+
+import os
+
+wsgi_app = 'projeto_financeiro.wsgi:application'
+bind = f'0.0.0.0:{os.environ.get("PORT", "8000")}'
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+
+
+def post_fork(server, worker):
+    if os.environ.get('WARMUP', '1') == '0':
+        return
+
+    # O app ainda não foi carregado no worker (sem preload_app)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projeto_financeiro.settings')
+    import django
+    django.setup(set_prefix=False)
+
+    from app_financeiro.warmup import format_timings, warmup
+
+    try:
+        timings = warmup()
+    except Exception:
+        # A requisição vai mostrar o erro de verdade; o worker sobe mesmo assim
+        server.log.exception('Falha no aquecimento do worker %s', worker.pid)
+        return
+    server.log.info('Worker %s aquecido: %s', worker.pid, format_timings(timings))
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -36,6 +37,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Consultas, tempos e tamanho por URL (ver /metrics)
+    'app_financeiro.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     # Whitenoise para servir arquivos estáticos em produção
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -45,6 +48,10 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    # Usuário das alterações registradas na auditoria (app_financeiro.audit)
+    'app_financeiro.audit.AuditMiddleware',
+    # cProfile sob demanda para staff (?_profile=1 ou cabeçalho X-Profile)
+    'app_financeiro.profiling.ProfilingMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -52,8 +59,11 @@ ROOT_URLCONF = 'projeto_financeiro.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates com medição do tempo de renderização
+        'BACKEND': 'app_financeiro.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
+        # Sem 'loaders': o padrão do Django já usa o loader em cache (templates
+        # lidos e compilados uma vez por processo)
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -73,10 +83,72 @@ WSGI_APPLICATION = 'projeto_financeiro.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# Réplica de relatórios: snapshot do banco principal gerado com a API de
+# backup do SQLite (tarefa 'reporting_snapshot' do run_scheduler). Consultas
+# dentro de app_financeiro.routers.reporting_reads() leem dela, desde que o
+# snapshot tenha no máximo REPORTING_MAX_STALENESS segundos; senão, do default.
+DATABASES['reporting'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.environ.get('REPORTING_DATABASE_PATH', BASE_DIR / 'reporting.sqlite3'),
+    'TEST': {'MIRROR': 'default'},
+}
+
+DATABASE_ROUTERS = ['app_financeiro.routers.ReportingRouter']
+
+REPORTING_MAX_STALENESS = int(os.environ.get('REPORTING_MAX_STALENESS', '300'))
+REPORTING_SNAPSHOT_INTERVAL = int(os.environ.get('REPORTING_SNAPSHOT_INTERVAL', '120'))
+
+# Cubo de relatórios (app_financeiro.cube): intervalo da atualização
+# incremental (tarefa 'cube_refresh') e, acima deste número de clientes
+# alterados, recálculo completo em vez de cliente a cliente
+CUBE_REFRESH_INTERVAL = int(os.environ.get('CUBE_REFRESH_INTERVAL', '300'))
+CUBE_FULL_REFRESH_CLIENTS = int(os.environ.get('CUBE_FULL_REFRESH_CLIENTS', '2000'))
+
+# Numeração automática das cobranças (app_financeiro.numbering): prefixo
+# antes do ano e quantos números cada processo reserva por ida ao banco
+COBRANCA_NUMBER_PREFIX = os.environ.get('COBRANCA_NUMBER_PREFIX', '')
+COBRANCA_NUMBER_BLOCK = int(os.environ.get('COBRANCA_NUMBER_BLOCK', '20'))
+
+# Arquivamento (app_financeiro.archive, tarefa 'archive'): cobranças pagas há
+# mais de COBRANCA_ARCHIVE_AFTER_DAYS dias saem da tabela principal, em lotes
+# de COBRANCA_ARCHIVE_BATCH por transação (0 dias = não arquiva)
+COBRANCA_ARCHIVE_AFTER_DAYS = int(os.environ.get('COBRANCA_ARCHIVE_AFTER_DAYS', '730'))
+COBRANCA_ARCHIVE_BATCH = int(os.environ.get('COBRANCA_ARCHIVE_BATCH', '2000'))
+
+# Listagens grandes do admin: COUNT exato até este número de linhas; acima
+# dele a paginação usa uma estimativa (0 = sempre exato)
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get('ADMIN_EXACT_COUNT_LIMIT', '10000'))
+
+# Perfil do banco: 'default' (desenvolvimento) ou 'production' (gunicorn).
+# Em produção: conexões persistentes, transações IMMEDIATE (evita "database is
+# locked" na promoção de leitura para escrita) e os PRAGMAs abaixo, aplicados
+# a cada nova conexão por app_financeiro.signals.configure_sqlite.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+
+SQLITE_PRAGMAS = {}
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20000,          # ms
+        'mmap_size': 268435456,         # 256 MB
+        'cache_size': -64000,           # 64 MB (valor negativo = KiB)
+        'temp_store': 'MEMORY',
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -124,3 +196,134 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/login/'
+
+
+# =========================
+# CACHE
+# =========================
+
+# Com vários workers/hosts use um cache compartilhado para que as
+# invalidações valham para todos, ex.:
+#   CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#   CACHE_LOCATION=/var/tmp/controle_amazonia_cache
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', LOCMEM_CACHE),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    # {% cache %} dos templates (sidebar): em memória, some a cada deploy/restart
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template_fragments',
+    },
+    # Sessões e usuários autenticados (ver SESSÕES E AUTENTICAÇÃO). Em arquivos
+    # por padrão: compartilhado entre os workers do host, então um logout ou
+    # uma desativação valem para todos. Com vários hosts use Redis, ex.:
+    #   SESSION_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+    #   SESSION_CACHE_LOCATION=redis://127.0.0.1:6379/1
+    'sessions': {
+        'BACKEND': os.environ.get('SESSION_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get(
+            'SESSION_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'controle_amazonia_sessions'),
+        ),
+    },
+}
+
+# Intervalo (segundos) em que cada processo confere se a SystemConfig em
+# memória ainda é a versão atual no cache compartilhado (com o LocMem
+# padrão, no updated_at do banco: uma consulta por intervalo)
+SYSTEM_CONFIG_CHECK_SECONDS = float(os.environ.get('SYSTEM_CONFIG_CHECK_SECONDS', '5'))
+
+# Entra no ETag das páginas (app_financeiro.conditional): troque a cada deploy
+# que altere templates para os navegadores não reaproveitarem a versão antiga
+ETAG_SALT = os.environ.get('ETAG_SALT', '')
+
+
+# =========================
+# SESSÕES E AUTENTICAÇÃO
+# =========================
+
+# cached_db: lê a sessão do cache e só vai ao banco quando ela não está lá
+# (gravações vão para os dois). Com SESSION_CACHE_BACKEND apontando para o
+# LocMem cada worker teria a própria cópia e um logout só valeria no processo
+# que o atendeu: nesse caso a sessão é lida do banco.
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.db' if CACHES['sessions']['BACKEND'] == LOCMEM_CACHE
+    else 'django.contrib.sessions.backends.cached_db',
+)
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Usuário autenticado também sai do cache (invalidado a cada save do usuário).
+# A invalidação só alcança os outros workers com o cache 'sessions'
+# compartilhado (o padrão em arquivos ou Redis): com o LocMem o cache fica
+# desligado e o usuário é lido do banco uma vez por requisição.
+AUTHENTICATION_BACKENDS = ['app_financeiro.backends.CachedModelBackend']
+AUTH_USER_CACHE_ALIAS = 'sessions'
+AUTH_USER_CACHE_SECONDS = int(os.environ.get(
+    'AUTH_USER_CACHE_SECONDS', '0' if CACHES['sessions']['BACKEND'] == LOCMEM_CACHE else '300',
+))  # 0 desliga
+
+
+# =========================
+# AGENDADOR (run_scheduler)
+# =========================
+
+# Notificações lidas mais antigas que isso são removidas pela tarefa 'retention'
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', '90'))
+
+# Histórico de execuções das tarefas periódicas (e das tarefas em segundo plano encerradas)
+TASK_RUN_RETENTION_DAYS = int(os.environ.get('TASK_RUN_RETENTION_DAYS', '30'))
+
+
+# =========================
+# TAREFAS EM SEGUNDO PLANO (run_workers)
+# =========================
+
+# Processos do run_workers (padrão do --workers)
+BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS', '2'))
+
+# Segundos que um worker detém a tarefa sem reportar progresso; vencido, outro worker a retoma
+BACKGROUND_TASK_LEASE = int(os.environ.get('BACKGROUND_TASK_LEASE', '600'))
+
+# Espera antes da 2ª tentativa, dobrando a cada nova falha
+BACKGROUND_TASK_RETRY_DELAY = int(os.environ.get('BACKGROUND_TASK_RETRY_DELAY', '30'))
+
+# Arquivos gerados pelas tarefas (exportações)
+BACKGROUND_TASK_FILES_DIR = os.environ.get('BACKGROUND_TASK_FILES_DIR', BASE_DIR / 'exports')
+
+
+# =========================
+# MÉTRICAS E LOGS
+# =========================
+
+# Consultas mais lentas que isso vão para o logger app_financeiro.slow_queries
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '200'))
+
+# Capturas do cProfile (?_profile=1): diretório e quantas manter
+PROFILE_DIR = os.environ.get('PROFILE_DIR', BASE_DIR / 'profiles')
+PROFILE_MAX_ENTRIES = int(os.environ.get('PROFILE_MAX_ENTRIES', '50'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '{asctime} {levelname} {name}: {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'app_financeiro': {
+            'handlers': ['console'],
+            'level': os.environ.get('APP_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
@@ -4,6 +4,11 @@ from django.contrib.auth import views as auth_views
 from app_financeiro import views
 
 urlpatterns = [
+    # Perfis de requisições e fila de tarefas (antes do admin para não cair no catch-all dele)
+    path('admin/perfis/', views.profiles_list, name='profiles_list'),
+    path('admin/perfis/<str:name>.<str:extension>', views.profile_download, name='profile_download'),
+    path('admin/tarefas/', views.tarefas, name='tarefas'),
+
     # Admin
     path('admin/', admin.site.urls),
 
@@ -22,10 +27,12 @@ urlpatterns = [
 
     # Dashboard
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/metricas/', views.dashboard_metricas, name='dashboard_metricas'),
 
     # Clientes
     path('clientes/', views.clientes, name='clientes'),
     path('clientes/atualizar/', views.cliente_atualizar, name='cliente_atualizar'),
+    path('clientes/<int:client_id>/cobrancas/', views.cliente_cobrancas, name='cliente_cobrancas'),
 
     # Jobs
     path('jobs/', views.jobs, name='jobs'),
@@ -34,6 +41,15 @@ urlpatterns = [
     # Cobranças
     path('cobrancas/', views.cobrancas, name='cobrancas'),
     path('cobrancas/atualizar/', views.cobranca_atualizar, name='cobranca_atualizar'),
+    path('cobrancas/pagamento/', views.cobranca_pagamento, name='cobranca_pagamento'),
+
+    # Relatórios
+    path('relatorios/aging/', views.relatorio_aging, name='relatorio_aging'),
+    path('relatorios/aging/exportar/', views.relatorio_aging_exportar, name='relatorio_aging_exportar'),
+    path('relatorios/cubo/', views.relatorio_cubo, name='relatorio_cubo'),
+
+    # Auditoria
+    path('historico/<slug:tipo>/<int:object_id>/', views.historico, name='historico'),
 
     # Configurações
     path('configuracoes/', views.configuracoes, name='configuracoes'),
@@ -45,4 +61,11 @@ urlpatterns = [
     # Usuários (apenas para staff)
     path('usuarios/', views.usuarios, name='usuarios'),
     path('usuarios/<int:user_id>/toggle-active/', views.usuario_toggle_active, name='usuario_toggle_active'),
+
+    # Tarefas em segundo plano
+    path('tarefas/<int:task_id>/', views.tarefa_status, name='tarefa_status'),
+    path('tarefas/<int:task_id>/arquivo/', views.tarefa_arquivo, name='tarefa_arquivo'),
+
+    # Métricas (apenas para staff)
+    path('metrics', views.metrics, name='metrics'),
 ]
\ No newline at end of file